@@ -0,0 +1,118 @@
+import json
+import logging
+import functools
+from collections.abc import Mapping
+from typing import Dict, Any, Callable, Iterator
+
+from services.blob_store import BlobStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# State fields that are moved to the blob store when they are large
+BLOB_FIELDS = (
+    "research_results",
+    "vector_db_results",
+    "combined_research",
+    "draft",
+    "persona_suggestions"
+)
+
+# Values smaller than this stay inline in the graph state
+DEFAULT_MIN_BLOB_BYTES = 1024
+
+# Key marking a blob reference in the graph state
+BLOB_REF_KEY = "$blob"
+
+def is_blob_ref(value: Any) -> bool:
+    """Check whether a state value is a reference to a stored blob."""
+    return isinstance(value, dict) and len(value) == 1 and BLOB_REF_KEY in value
+
+def resolve(value: Any, store: BlobStore) -> Any:
+    """Return the stored value for a blob reference, or the value itself."""
+    if is_blob_ref(value):
+        return store.get(value[BLOB_REF_KEY])
+    return value
+
+def resolve_refs(values: Dict[str, Any], store: BlobStore) -> Dict[str, Any]:
+    """Resolve every blob reference in a state dictionary or update."""
+    return {key: resolve(value, store) for key, value in values.items()}
+
+class LazyState(Mapping):
+    """Read-only view of the graph state that loads blobs when a node reads them."""
+
+    def __init__(self, state: Dict[str, Any], store: BlobStore):
+        self._state = state
+        self._store = store
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._loaded:
+            self._loaded[key] = resolve(self._state[key], self._store)
+        return self._loaded[key]
+
+    def raw(self, key: str) -> Any:
+        """Get a value as stored in the graph state, without loading blobs."""
+        return self._state[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._state)
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+def raw_value(state: Mapping, key: str) -> Any:
+    """Get a state value without loading it from the blob store.
+
+    Use this for values that are only passed along, such as the draft in an
+    interrupt payload, so the checkpoint stores the reference rather than the text.
+    """
+    if isinstance(state, LazyState):
+        return state.raw(key)
+    return state[key]
+
+def externalise(update: Dict[str, Any], store: BlobStore, min_bytes: int = DEFAULT_MIN_BLOB_BYTES) -> Dict[str, Any]:
+    """Replace the large blob fields of a node update with references.
+
+    Args:
+        update: The state update returned by a node
+        store: The blob store to save the values in
+        min_bytes: Minimum serialised size for a value to be externalised
+
+    Returns:
+        update: The update with large values replaced by references
+    """
+    externalised = dict(update)
+    for key in BLOB_FIELDS:
+        value = update.get(key)
+        if value is None or is_blob_ref(value):
+            continue
+
+        if len(json.dumps(value, ensure_ascii=False)) >= min_bytes:
+            externalised[key] = {BLOB_REF_KEY: store.put(value)}
+
+    return externalised
+
+def with_blob_store(node: Callable, store: BlobStore, min_bytes: int = DEFAULT_MIN_BLOB_BYTES) -> Callable:
+    """Wrap a node so it reads blobs lazily and writes large fields to the store.
+
+    The node sees the same state it would without a blob store; only the
+    values written to the checkpoint change.
+
+    Args:
+        node: The node function
+        store: The blob store
+        min_bytes: Minimum serialised size for a value to be externalised
+
+    Returns:
+        wrapped: The wrapped node function
+    """
+    @functools.wraps(node)
+    def wrapped(state, *args, **kwargs):
+        update = node(LazyState(state, store), *args, **kwargs)
+        if not isinstance(update, dict):
+            return update
+        return externalise(update, store, min_bytes)
+
+    return wrapped
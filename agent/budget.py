@@ -0,0 +1,94 @@
+import functools
+import logging
+from typing import Dict, Any, Optional, Callable, Mapping
+
+from services.llm import track_usage
+from services.tokens import estimate_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Share of the budget after which the thread switches to economy mode
+ECONOMY_RATIO = 0.75
+
+# Most persona reviews per round (besides pinned personas) in economy mode
+ECONOMY_TOP_K = 1
+
+# Budget modes
+NORMAL, ECONOMY, EXHAUSTED = "normal", "economy", "exhausted"
+
+# Tokens reserved for a persona review's answer when estimating its cost
+PERSONA_REVIEW_TOKENS = 500
+
+def add_usage(current: Optional[Dict[str, int]], update: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """State reducer adding a node's token usage to the thread's totals."""
+    totals = dict(current or {})
+    for key, value in (update or {}).items():
+        totals[key] = totals.get(key, 0) + value
+    return totals
+
+def tokens_used(state: Mapping[str, Any]) -> int:
+    """Total tokens used by the thread so far."""
+    return (state.get("token_usage") or {}).get("total_tokens", 0)
+
+def remaining_tokens(state: Mapping[str, Any]) -> Optional[int]:
+    """Tokens left in the thread's budget, or None without a budget."""
+    budget = state.get("token_budget")
+    if not budget:
+        return None
+    return max(0, budget - tokens_used(state))
+
+def can_afford(state: Mapping[str, Any], estimate: int) -> bool:
+    """Whether a step estimated to cost `estimate` tokens fits in the budget."""
+    remaining = remaining_tokens(state)
+    return remaining is None or estimate <= remaining
+
+def budget_mode(state: Mapping[str, Any]) -> str:
+    """The thread's budget mode.
+
+    Returns:
+        mode: "normal", "economy" once ECONOMY_RATIO of the budget is used,
+            or "exhausted" once nothing is left
+    """
+    budget = state.get("token_budget")
+    if not budget:
+        return NORMAL
+    used = tokens_used(state)
+    if used >= budget:
+        return EXHAUSTED
+    if used >= ECONOMY_RATIO * budget:
+        return ECONOMY
+    return NORMAL
+
+def use_fast_models(state: Mapping[str, Any]) -> bool:
+    """Whether LLM calls should use the fast routes (fast mode or economy mode)."""
+    return bool(state.get("fast_mode")) or budget_mode(state) != NORMAL
+
+def budget_summary(state: Mapping[str, Any]) -> Dict[str, Any]:
+    """The thread's budget, usage, remaining tokens and mode, for display."""
+    return {
+        "budget": state.get("token_budget"),
+        "used": tokens_used(state),
+        "remaining": remaining_tokens(state),
+        "mode": budget_mode(state)
+    }
+
+def with_token_accounting(node: Callable) -> Callable:
+    """Wrap a node so the tokens of its LLM calls are added to `token_usage`.
+
+    Args:
+        node: The node function
+
+    Returns:
+        wrapped: The wrapped node function
+    """
+    @functools.wraps(node)
+    def wrapped(*args, **kwargs):
+        with track_usage() as usage:
+            update = node(*args, **kwargs)
+        if usage["calls"] and isinstance(update, dict):
+            update = {**update, "token_usage": dict(usage)}
+        return update
+
+    return wrapped
@@ -0,0 +1,258 @@
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from langgraph.types import Command
+
+from services.blob_store import BlobStore
+from services.dedupe import DEFAULT_THRESHOLD as DEFAULT_DEDUPE_THRESHOLD
+from services.llm import track_usage
+from services.search import search_internet
+from services.vector_db import query_vector_db
+from .blobs import resolve, resolve_refs
+from .graph import create_agent, get_thread_config, resolve_profile
+from .nodes import conduct_research, RAW_RESEARCH_TOKENS
+from .recovery import failed_node
+from .state import FeedbackType
+from .utils import compact_sources
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Articles researched, drafted and reviewed at once
+DEFAULT_MAX_CONCURRENT = 4
+
+# Search and library results fetched per article on top of the shared research
+TOPUP_RESULTS = 3
+
+# Size of an article's own sources added to the shared research
+TOPUP_TOKENS = 400
+
+def result_key(result: Dict[str, Any]) -> str:
+    """Identify a research result by its URL, or its text if it has none."""
+    return result.get("url") or result.get("content") or result.get("body") or ""
+
+def research_campaign(
+    theme: str,
+    topics: List[str],
+    library_filter: Optional[Dict[str, Any]] = None,
+    fast_mode: bool = False,
+    fetch_pages: int = 0,
+    dedupe_threshold: float = DEFAULT_DEDUPE_THRESHOLD,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    synthesize: bool = True,
+    raw_research_tokens: int = RAW_RESEARCH_TOKENS
+) -> Dict[str, Any]:
+    """Research a campaign's theme once and top it up for each article.
+
+    The theme gets the full research step (search, library query and, unless
+    `synthesize` is off, synthesis). Each topic then gets a few search and library results of its
+    own, with no LLM call; those the shared research already has are left
+    out, and the rest are appended to the shared synthesis as compact sources.
+
+    Args:
+        theme: The theme shared by the articles
+        topics: The article topics
+        library_filter: ChromaDB metadata filter for the library queries
+        fast_mode: Whether the articles run in fast mode
+        fetch_pages: Number of top search results whose pages are fetched for the theme
+        dedupe_threshold: Similarity at which research results count as near-duplicates
+        max_concurrent: Most topics topped up at once
+        synthesize: Synthesise the theme's research (off for the fast path
+            profile, which drafts from compact raw sources)
+        raw_research_tokens: Size of the compact raw sources when not synthesising
+
+    Returns:
+        research: The research fields of each topic's state ("topics", by
+            topic) and the token "usage" of the shared research
+
+    Raises:
+        ValueError: If there are no topics
+    """
+    if not topics:
+        raise ValueError("A campaign needs at least one topic")
+
+    with track_usage() as usage:
+        shared = conduct_research(
+            {"topic": theme, "library_filter": library_filter, "fast_mode": fast_mode},
+            fetch_pages,
+            dedupe_threshold,
+            synthesize,
+            raw_research_tokens
+        )
+    seen = {result_key(result) for result in shared["research_results"] + shared["vector_db_results"]}
+
+    def top_up(topic: str) -> Dict[str, Any]:
+        search_results = [
+            result for result in search_internet(topic, max_results=TOPUP_RESULTS)
+            if result_key(result) not in seen
+        ]
+        vector_results = [
+            result for result in query_vector_db(topic, n_results=TOPUP_RESULTS, where=library_filter)
+            if result_key(result) not in seen
+        ]
+        research = shared["combined_research"]
+        sources = compact_sources(search_results + vector_results, TOPUP_TOKENS)
+        if sources:
+            research = f"{research}\n\n## Sources specific to {topic}\n{sources}"
+        return {
+            "research_results": shared["research_results"] + search_results,
+            "vector_db_results": shared["vector_db_results"] + vector_results,
+            "combined_research": research,
+            "research_dedupe": shared["research_dedupe"]
+        }
+
+    with ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="campaign-research") as executor:
+        researched = dict(zip(topics, executor.map(top_up, topics)))
+
+    logger.info(f"Researched the theme {theme!r} once for {len(topics)} articles ({usage['total_tokens']} tokens)")
+    return {"topics": researched, "usage": dict(usage)}
+
+def share_usage(usage: Dict[str, int], parts: int) -> List[Dict[str, int]]:
+    """Split a token usage evenly, so each article is charged its share of shared work.
+
+    The first share also carries the remainder, so the shares add up to the usage.
+    """
+    shares = [{key: value // parts for key, value in usage.items()} for _ in range(parts)]
+    for key, value in usage.items():
+        shares[0][key] += value % parts
+    # Each share's total stays the sum of its own prompt and completion tokens
+    if "total_tokens" in usage:
+        for share in shares:
+            share["total_tokens"] = share.get("prompt_tokens", 0) + share.get("completion_tokens", 0)
+    return shares
+
+def last_interrupt(chunks) -> Optional[Any]:
+    """Run a graph stream to its end and return the value of the interrupt it stopped at, if any."""
+    value = None
+    for chunk in chunks:
+        if "__interrupt__" in chunk:
+            value = chunk["__interrupt__"][0].value if chunk["__interrupt__"] else None
+    return value
+
+def run_campaign(
+    theme: str,
+    topics: List[str],
+    graph=None,
+    config: Optional[Dict[str, Any]] = None,
+    library_filter: Optional[Dict[str, Any]] = None,
+    fast_mode: bool = False,
+    token_budget: Optional[int] = None,
+    review: bool = True,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    blob_store: Optional[BlobStore] = None
+) -> Dict[str, Any]:
+    """Write a cluster of related articles from one shared research pass.
+
+    Every article gets its own graph thread, seeded with its research as if
+    `conduct_research` had run there, so the graph carries on from the draft.
+    The drafts are written concurrently. With `review`, each thread then goes
+    through a persona round and stops where the editor selects suggestions.
+    The graph made here starts persona reviews in the background as each
+    draft is written, so the reviews of all the drafts share one worker pool.
+    The reviews are pooled rather than batched: each draft is still reviewed
+    in its own completions (one per persona, or one with `panel_reviews`),
+    because each thread's reviews must come back as its own suggestions.
+
+    The threads are ordinary graph threads: the editor continues each article
+    with the same graph (e.g. through `GraphRunner`) and its thread ID. An
+    article that fails does not stop the others; it is reported with its
+    "error" and "failed_node", and can be retried from its checkpoint like
+    any failed thread.
+
+    Args:
+        theme: The theme shared by the articles
+        topics: The article topics
+        graph: A compiled agent graph (by default one is created from `config`
+            with speculative reviews on)
+        config: Configuration options for `create_agent`; its profile also
+            applies to the shared research
+        library_filter: ChromaDB metadata filter for the library queries
+        fast_mode: Whether the articles run in fast mode
+        token_budget: Maximum tokens per article (None for no limit)
+        review: Run a persona round for every draft
+        max_concurrent: Most articles worked on at once
+        blob_store: The graph's blob store, so the drafts and interrupts
+            returned carry values instead of their digests
+
+    Returns:
+        campaign: The "graph", the "articles" (topic, thread ID, draft,
+            pending interrupt, error and failed node of each, in topic order),
+            the shared research "usage" and the wall time in "seconds"
+
+    Raises:
+        ValueError: If there are no topics (checked before any research)
+    """
+    if not topics:
+        raise ValueError("A campaign needs at least one topic")
+
+    config = resolve_profile(config or {})
+    if graph is None:
+        graph, _ = create_agent({**config, "speculative_reviews": True})
+
+    start = time.perf_counter()
+    research = research_campaign(
+        theme,
+        topics,
+        library_filter,
+        fast_mode,
+        config.get("fetch_pages", 0),
+        config.get("dedupe_threshold", DEFAULT_DEDUPE_THRESHOLD),
+        max_concurrent,
+        config.get("synthesize_research", True),
+        config.get("raw_research_tokens", RAW_RESEARCH_TOKENS)
+    )
+    shares = dict(zip(topics, share_usage(research["usage"], len(topics))))
+
+    def write(topic: str, thread_id: str) -> Dict[str, Any]:
+        thread = get_thread_config(thread_id)
+        graph.update_state(
+            thread,
+            {
+                "topic": topic,
+                "fast_mode": fast_mode,
+                "token_budget": token_budget,
+                "library_filter": library_filter,
+                "token_usage": shares[topic],
+                **research["topics"][topic]
+            },
+            as_node="conduct_research"
+        )
+        interrupt = last_interrupt(graph.stream(None, config=thread, stream_mode="updates"))
+        if review and interrupt is not None and FeedbackType.PERSONA.value in interrupt.get("options", []):
+            interrupt = last_interrupt(
+                graph.stream(Command(resume=FeedbackType.PERSONA), config=thread, stream_mode="updates")
+            )
+        draft = graph.get_state(thread).values.get("draft")
+        if blob_store is not None:
+            draft = resolve(draft, blob_store)
+            if isinstance(interrupt, dict):
+                interrupt = resolve_refs(interrupt, blob_store)
+        return {"draft": draft, "interrupt": interrupt, "error": None, "failed_node": None}
+
+    threads = [str(uuid.uuid4()) for _ in topics]
+    articles = []
+    with ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="campaign-article") as executor:
+        futures = [executor.submit(write, topic, thread_id) for topic, thread_id in zip(topics, threads)]
+        for topic, thread_id, future in zip(topics, threads, futures):
+            article = {"topic": topic, "thread_id": thread_id}
+            try:
+                article.update(future.result())
+            except Exception as e:
+                logger.error(f"Campaign article {topic!r} failed: {str(e)}")
+                failure = failed_node(graph, get_thread_config(thread_id))
+                article.update({
+                    "draft": None,
+                    "interrupt": None,
+                    "error": str(e),
+                    "failed_node": failure["node"] if failure else None
+                })
+            articles.append(article)
+
+    seconds = round(time.perf_counter() - start, 3)
+    failed = sum(article["error"] is not None for article in articles)
+    logger.info(f"Campaign {theme!r}: {len(articles) - failed} of {len(articles)} articles drafted in {seconds}s")
+    return {"graph": graph, "articles": articles, "usage": research["usage"], "seconds": seconds}
@@ -0,0 +1,136 @@
+import re
+import logging
+from typing import Dict, Any, List, Set
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Suggestions whose shingle sets overlap at least this much are merged
+DEFAULT_SIMILARITY = 0.7
+
+# Characters per shingle
+SHINGLE_SIZE = 4
+
+# Suggestions with fewer shingles (about 20 characters) are only compared by
+# Jaccard similarity, since almost any longer text contains a short one
+MIN_CONTAINED_SHINGLES = 20
+
+ITEM_MARKER = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+
+def split_items(text: str) -> List[str]:
+    """Split a persona's suggestion text into individual suggestions.
+
+    Numbered and bulleted lines start a new suggestion; other lines continue
+    the previous one. Text without list markers is split into paragraphs.
+
+    Args:
+        text: The suggestion text of one persona
+
+    Returns:
+        items: The individual suggestions
+    """
+    if not any(ITEM_MARKER.match(line) for line in text.splitlines()):
+        return [paragraph.strip() for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()]
+
+    items: List[str] = []
+    for line in text.splitlines():
+        if ITEM_MARKER.match(line):
+            items.append(ITEM_MARKER.sub("", line).strip())
+        elif line.strip() and items:
+            items[-1] += " " + line.strip()
+    return [item for item in items if item]
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Character shingles of a text, ignoring case, punctuation and spacing."""
+    normalized = " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+    return {normalized[i:i + size] for i in range(max(1, len(normalized) - size + 1))}
+
+def similarity(a: Set[str], b: Set[str], min_contained: int = MIN_CONTAINED_SHINGLES) -> float:
+    """Similarity of two shingle sets.
+
+    This is their Jaccard similarity, or their overlap coefficient (shared
+    elements over the smaller set) if the smaller set has at least
+    `min_contained` shingles. The overlap coefficient lets a suggestion
+    repeated inside a longer one ("End with a clear call-to-action" and "End
+    with a clear call-to-action that links to the product") score high; the
+    minimum keeps a short suggestion ("Cut the intro.") from matching a longer
+    one that merely mentions the same thing ("Expand the intro with a story.").
+    """
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    if min(len(a), len(b)) >= min_contained:
+        return shared / min(len(a), len(b))
+    return shared / len(a | b)
+
+def distinct_wordings(items: List[str]) -> List[str]:
+    """The wordings of a cluster, longest first, without those another wording contains."""
+    wordings: List[str] = []
+    for item in sorted(items, key=len, reverse=True):
+        normalized = " ".join(re.findall(r"[a-z0-9]+", item.lower()))
+        if not any(normalized in " ".join(re.findall(r"[a-z0-9]+", kept.lower())) for kept in wordings):
+            wordings.append(item)
+    return wordings
+
+def consolidate_suggestions(suggestions: List[Dict[str, str]], threshold: float = DEFAULT_SIMILARITY) -> List[Dict[str, Any]]:
+    """Merge the near-duplicate suggestions of several personas into one list.
+
+    Every suggestion joins the cluster holding its most similar earlier
+    suggestion, if that similarity reaches `threshold`. Each cluster keeps
+    every distinct wording, so a persona's advice is never replaced by a
+    different persona's take on it, and clusters raised by more personas come
+    first.
+
+    Args:
+        suggestions: Persona suggestions, each with "persona" and "suggestion"
+        threshold: Minimum shingle similarity (0-1, see `similarity`) for two
+            suggestions to merge
+
+    Returns:
+        items: The consolidated suggestions, each with the most detailed
+            (longest) "suggestion" text, the other distinct "wordings" and
+            the contributing "personas", in priority order
+    """
+    clusters: List[Dict[str, Any]] = []
+    for entry in suggestions:
+        for item in split_items(entry["suggestion"]):
+            item_shingles = shingles(item)
+            best, best_score = None, threshold
+            for cluster in clusters:
+                score = max(similarity(item_shingles, member) for member in cluster["shingles"])
+                if score >= best_score:
+                    best, best_score = cluster, score
+
+            if best is None:
+                best = {"items": [], "shingles": [], "personas": [], "order": len(clusters)}
+                clusters.append(best)
+            best["items"].append(item)
+            best["shingles"].append(item_shingles)
+            if entry["persona"] not in best["personas"]:
+                best["personas"].append(entry["persona"])
+
+    clusters.sort(key=lambda cluster: (-len(cluster["personas"]), -len(cluster["items"]), cluster["order"]))
+    items = []
+    for cluster in clusters:
+        wordings = distinct_wordings(cluster["items"])
+        items.append({"suggestion": wordings[0], "wordings": wordings[1:], "personas": cluster["personas"]})
+    return items
+
+def format_consolidated(items: List[Dict[str, Any]]) -> str:
+    """Format consolidated suggestions as a numbered list tagged with their personas.
+
+    Other wordings of a suggestion follow it as indented lines.
+    """
+    lines = []
+    for i, item in enumerate(items, 1):
+        lines.append(f"{i}. {item['suggestion']} ({', '.join(item['personas'])})")
+        lines += [f"   Also: {wording}" for wording in item.get("wordings", [])]
+    return "\n".join(lines)
+
+def format_raw(suggestions: List[Dict[str, str]]) -> str:
+    """Format persona suggestions as they were given, one persona after another."""
+    return "\n".join(
+        f"Persona: {suggestion['persona']}\n{suggestion['suggestion']}"
+        for suggestion in suggestions
+    )
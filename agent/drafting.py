@@ -0,0 +1,264 @@
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.llm import get_completion, resolve_route, track_usage, add_tracked_usage
+from services.tokens import estimate_tokens
+from prompts import load_prompt, load_system_prompt
+from config import load_guide
+from .utils import most_relevant_section
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Main sections an outline must have (besides the introduction and conclusion)
+MIN_SECTIONS = 3
+MAX_SECTIONS = 5
+
+# Maximum number of sections written at once
+DEFAULT_MAX_WORKERS = 8
+
+# Outlines requested before falling back to a single-completion draft
+OUTLINE_ATTEMPTS = 2
+
+def parse_outline(outline: str) -> Optional[Dict[str, Any]]:
+    """Parse a Markdown outline into the article title and its parts.
+
+    Args:
+        outline: The outline, with a "# " title and "## " headings each
+            followed by bullet points
+
+    Returns:
+        parsed: The "title" and the "parts" (each with a "heading" and its
+            "points"), introduction first and conclusion last, or None if the
+            outline does not have an introduction, at least MIN_SECTIONS main
+            sections and a conclusion (main sections after the first
+            MAX_SECTIONS are dropped)
+    """
+    title = None
+    parts: List[Dict[str, Any]] = []
+    for line in outline.splitlines():
+        line = line.strip()
+        if line.startswith("## "):
+            parts.append({"heading": line[3:].strip(), "points": []})
+        elif line.startswith("# ") and title is None:
+            title = line[2:].strip()
+        elif re.match(r"^([-*+]|\d+\.)\s", line) and parts:
+            parts[-1]["points"].append(re.sub(r"^([-*+]|\d+\.)\s+", "", line))
+
+    if not title or len(parts) < MIN_SECTIONS + 2:
+        return None
+    if parts[0]["heading"].lower() != "introduction" or parts[-1]["heading"].lower() != "conclusion":
+        return None
+
+    # Keep at most MAX_SECTIONS main sections
+    parts = parts[:1] + parts[1:-1][:MAX_SECTIONS] + parts[-1:]
+    return {"title": title, "parts": parts}
+
+def format_part(part: Dict[str, Any]) -> str:
+    """Format an outline part as its heading followed by its points."""
+    return "\n".join([f"## {part['heading']}"] + [f"- {point}" for point in part["points"]])
+
+def slice_research(research: str, parts: List[Dict[str, Any]]) -> List[str]:
+    """Give each outline part the research notes relevant to it.
+
+    The research is split into notes (list items or paragraphs) and every
+    note goes to the main section that shares the most words with it. Notes
+    that match no main section go to the introduction; the conclusion gets
+    none, since it only summarises the other parts.
+
+    Args:
+        research: The research summary
+        parts: The outline parts, introduction first and conclusion last
+
+    Returns:
+        slices: The research notes of each part, in the order of `parts`
+    """
+    notes = [note.strip() for note in re.split(r"\n(?=\s*(?:[-*+]|\d+\.)\s)|\n\s*\n", research) if note.strip()]
+    slices: List[List[str]] = [[] for _ in parts]
+    body = [format_part(part) for part in parts[1:-1]]
+
+    for note in notes:
+        index = most_relevant_section(body, note) if body else 0
+        words = set(re.findall(r"[a-z0-9]{4,}", note.lower()))
+        if body and words & set(re.findall(r"[a-z0-9]{4,}", body[index].lower())):
+            slices[index + 1].append(note)
+        else:
+            slices[0].append(note)
+
+    return ["\n".join(notes) for notes in slices]
+
+def stitch_sections(title: str, sections: List[str], parts: List[Dict[str, Any]]) -> str:
+    """Join the written parts into one Markdown article.
+
+    The introduction goes right under the title without a heading; every
+    other part starts with its outline heading unless the writer included it.
+    """
+    pieces = [f"# {title}"]
+    for i, (part, text) in enumerate(zip(parts, sections)):
+        text = text.strip()
+        # Drop a heading repeated at the start of the part
+        heading = f"## {part['heading']}"
+        if text.lower().startswith(heading.lower()):
+            text = text[len(heading):].strip()
+        pieces.append(text if i == 0 else f"{heading}\n\n{text}")
+    return "\n\n".join(pieces)
+
+def parse_edits(reply: str) -> List[Tuple[str, str]]:
+    """Parse the REPLACE/WITH pairs of a coherence pass reply."""
+    edits = []
+    pending = None
+    for line in reply.splitlines():
+        line = line.strip()
+        if line.upper().startswith("REPLACE:"):
+            pending = line[len("REPLACE:"):].strip()
+        elif line.upper().startswith("WITH:") and pending:
+            edits.append((pending, line[len("WITH:"):].strip()))
+            pending = None
+    return edits
+
+def apply_edits(draft: str, edits: List[Tuple[str, str]]) -> Tuple[str, int]:
+    """Apply sentence replacements to a draft, skipping any that do not match exactly.
+
+    Returns:
+        draft: The edited draft
+        applied: The number of edits applied
+    """
+    applied = 0
+    for old, new in edits:
+        if old and old in draft:
+            draft = draft.replace(old, new, 1)
+            applied += 1
+    return draft, applied
+
+def write_section(
+    variables: Dict[str, Any],
+    part: Dict[str, Any],
+    research: str,
+    introduction: bool,
+    fast: bool
+) -> Tuple[str, Dict[str, int]]:
+    """Write one part of the article on a worker thread, returning it with its token usage."""
+    section = format_part(part)
+    if introduction:
+        section += "\n\nThis is the opening of the article: write it without a heading, directly under the title."
+
+    with track_usage() as usage:
+        text = get_completion(
+            load_prompt("section.yaml"),
+            {**variables, "section": section, "research": research or "(No specific notes; use the outline.)"},
+            system_template=load_system_prompt("section.yaml"),
+            node="write_section",
+            fast=fast
+        )
+    return text, usage
+
+def estimate_sectioned_draft_tokens(topic: str, research: str, fast: bool = False) -> int:
+    """Estimate the tokens of a sectioned draft at its largest.
+
+    Counts every outline attempt, a section call for each part of an outline
+    with MAX_SECTIONS main sections (each with the guides, the outline and
+    its slice of the research) and the coherence pass over the whole draft,
+    each with the max_tokens of its route.
+
+    Args:
+        topic: The article topic
+        research: The research summary
+        fast: Whether the thread runs in fast mode
+
+    Returns:
+        tokens: The estimated prompt and completion tokens
+    """
+    guides = estimate_tokens(topic + load_guide("tone_of_voice.yaml") + load_guide("content_structure.yaml"))
+    outline_tokens = resolve_route("draft_outline", fast)["max_tokens"]
+    section_tokens = resolve_route("write_section", fast)["max_tokens"]
+    parts = MAX_SECTIONS + 2
+
+    outline = OUTLINE_ATTEMPTS * (guides + estimate_tokens(research) + outline_tokens)
+    sections = parts * (guides + outline_tokens + section_tokens) + estimate_tokens(research)
+    coherence = parts * section_tokens + resolve_route("coherence_pass", fast)["max_tokens"]
+    return outline + sections + coherence
+
+def write_sectioned_draft(topic: str, research: str, fast: bool = False,
+                          max_workers: int = DEFAULT_MAX_WORKERS) -> Optional[str]:
+    """Write a draft outline first, with its sections written in parallel.
+
+    An outline following the content structure guide is generated first,
+    and asked for again if it does not have MIN_SECTIONS-MAX_SECTIONS main
+    sections. Every part of the outline is then written concurrently with the outline
+    and its slice of the research, the parts are stitched together, and a
+    light coherence pass replaces a few sentences to smooth the transitions.
+
+    Args:
+        topic: The article topic
+        research: The research summary
+        fast: Whether the thread runs in fast mode
+        max_workers: Maximum number of sections written at once
+
+    Returns:
+        draft: The Markdown draft, or None if no usable outline was written
+            in OUTLINE_ATTEMPTS tries
+    """
+    variables = {
+        "topic": topic,
+        "tone_of_voice": load_guide("tone_of_voice.yaml"),
+        "content_structure": load_guide("content_structure.yaml")
+    }
+
+    outline = None
+    for attempt in range(1, OUTLINE_ATTEMPTS + 1):
+        outline_text = get_completion(
+            load_prompt("outline.yaml"),
+            {**variables, "research": research},
+            system_template=load_system_prompt("outline.yaml"),
+            node="draft_outline",
+            fast=fast
+        )
+        outline = parse_outline(outline_text)
+        if outline is not None:
+            break
+        logger.warning(f"Outline {attempt} of {OUTLINE_ATTEMPTS} is unusable (needs {MIN_SECTIONS}-{MAX_SECTIONS} main sections)")
+    if outline is None:
+        return None
+
+    parts = outline["parts"]
+    slices = slice_research(research, parts)
+    variables["outline"] = "\n\n".join([f"# {outline['title']}"] + [format_part(part) for part in parts])
+
+    logger.info(f"Writing {len(parts)} draft sections in parallel")
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(parts)), thread_name_prefix="draft-section") as executor:
+        futures = [
+            executor.submit(write_section, variables, part, slices[i], i == 0, fast)
+            for i, part in enumerate(parts)
+        ]
+
+    # Token usage of the worker threads belongs to the calling node, including
+    # that of the sections written before another one failed
+    sections = []
+    error = None
+    for future in futures:
+        try:
+            text, usage = future.result()
+        except Exception as e:
+            error = error or e
+            continue
+        add_tracked_usage(usage)
+        sections.append(text)
+    if error is not None:
+        raise error
+
+    draft = stitch_sections(outline["title"], sections, parts)
+
+    reply = get_completion(
+        load_prompt("coherence.yaml"),
+        {"topic": topic, "draft": draft},
+        system_template=load_system_prompt("coherence.yaml"),
+        node="coherence_pass",
+        fast=fast
+    )
+    draft, applied = apply_edits(draft, parse_edits(reply))
+    logger.info(f"Coherence pass applied {applied} edits")
+
+    return draft
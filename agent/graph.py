@@ -1,118 +1,217 @@
 import uuid
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Optional
 
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph
 from langgraph.constants import START, END
 
+from services.article_store import open_article_store
+from services.blob_store import open_blob_store
+from services.dedupe import DEFAULT_THRESHOLD as DEFAULT_DEDUPE_THRESHOLD
+from services.tracing import with_tracing
+from .blobs import with_blob_store, DEFAULT_MIN_BLOB_BYTES
+from .budget import with_token_accounting
+from .recovery import retry_policy
+from .speculative import with_speculative_reviews
 from .state import State, FeedbackType
 from .nodes import (
     conduct_research,
     write_draft,
+    await_editor_action,
     process_human_feedback,
     generate_persona_feedback,
+    select_persona_suggestions,
     update_draft,
-    finalize_draft
+    finalize_draft,
+    RAW_RESEARCH_TOKENS
 )
 
-def should_get_human_feedback(state: State) -> str:
-    """Conditional router to determine if we need human feedback."""
-    return "get_human_feedback" if state["feedback_type"] == FeedbackType.HUMAN else "router"
+# Graph profiles: named sets of config defaults, overridden by explicit keys
+PROFILES = {
+    "standard": {},
+    # Short-form pieces: the draft is written straight from compact raw
+    # sources, skipping the research synthesis call
+    "fast_path": {"synthesize_research": False, "raw_research_tokens": 1200}
+}
 
-def should_get_persona_feedback(state: State) -> str:
-    """Conditional router to determine if we need persona feedback."""
-    return "get_persona_feedback" if state["feedback_type"] == FeedbackType.PERSONA else "router"
+def resolve_profile(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the config's graph profile, whose settings the explicit keys override.
+    
+    Raises:
+        ValueError: If the profile is not in PROFILES
+    """
+    profile = config.get("profile", "standard")
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown graph profile: {profile}")
+    return {**PROFILES[profile], **config}
+
+def route_editor_action(state: State) -> str:
+    """Conditional router for the action the editor chose while the graph was waiting."""
+    if state["feedback_type"] == FeedbackType.HUMAN:
+        return "get_human_feedback"
+    
+    if state["feedback_type"] == FeedbackType.PERSONA:
+        return "get_persona_feedback"
+    
+    if state["feedback_type"] == FeedbackType.LINT:
+        return "update_draft_lint"
+    
+    # No feedback requested means the editor is happy with the draft
+    return "finalize_draft"
 
-def should_continue_editing(state: State) -> str:
-    """Conditional router to determine if we should continue editing or finalize the draft."""
-    # Only proceed to finalize if feedback_type is NONE and final_article is not set
-    if state["feedback_type"] == FeedbackType.NONE and "final_article" not in state:
-        return "finalize_draft"
-    
-    # If we have human feedback, update the draft
-    if state["feedback_type"] == FeedbackType.HUMAN and "human_feedback" in state:
+def should_update_from_human_feedback(state: State) -> str:
+    """Conditional router to determine if the human feedback should be applied."""
+    if state["feedback_type"] == FeedbackType.HUMAN and state.get("human_feedback"):
         return "update_draft_human"
     
-    # If we have persona feedback, update the draft
-    if (state["feedback_type"] == FeedbackType.PERSONA and 
-        "selected_persona_suggestions" in state and 
-        state["selected_persona_suggestions"]):
+    # Feedback was skipped, wait for the next action
+    return "await_editor_action"
+
+def should_update_from_persona_feedback(state: State) -> str:
+    """Conditional router to determine if the selected persona suggestions should be applied."""
+    if state["feedback_type"] == FeedbackType.PERSONA and state.get("selected_persona_suggestions"):
         return "update_draft_persona"
     
-    # Default back to the router (should only happen if feedback type is set but no actual feedback provided)
-    return "router"
+    # No suggestions were selected, wait for the next action
+    return "await_editor_action"
 
-def create_agent(config: Dict[str, Any] = None) -> tuple:
+def create_agent(config: Dict[str, Any] = None, checkpointer: Optional[BaseCheckpointSaver] = None) -> tuple:
     """Create the content writer agent workflow.
     
     Args:
-        config: Configuration options for the agent
+        config: Configuration options for the agent. Supported keys:
+            profile: Name of a graph profile in PROFILES whose settings are
+                used as defaults ("standard" or "fast_path")
+            blob_store: URI of a blob store (see `open_blob_store`); when set,
+                large state fields are saved there and the graph state keeps
+                only their digests
+            blob_min_bytes: Minimum size of a value moved to the blob store
+            speculative_reviews: Start persona reviews in the background for
+                every new draft version, so persona feedback is ready when
+                the editor asks for it
+            panel_reviews: Review each draft from all the selected personas in
+                one completion with bounded JSON output, instead of one
+                completion per persona
+            fetch_pages: Number of top search results whose full pages are
+                fetched (concurrently, with a disk cache) for the research
+            dedupe_threshold: Similarity (estimated Jaccard, 0-1) at which research
+                results count as near-duplicates and are dropped (0 keeps them all)
+            synthesize_research: Synthesise the research with an LLM call
+                before drafting (default), or give the draft the raw sources
+            raw_research_tokens: Size of the raw sources given to the draft
+                when the research is not synthesised
+            section_drafting: Write the first draft from an outline, with its
+                sections written in parallel, instead of in one completion
+            article_store: Directory of the article store (see
+                `open_article_store`); when set, finalised articles are saved
+                and indexed there and added to the content library
+            retry_policies: Retry settings replacing those of
+                config/retries.yaml (see `retry_policy`)
+        checkpointer: Checkpointer to use (defaults to a new in-memory saver)
         
     Returns:
         graph: The compiled graph
         thread_id: A unique ID for this thread
     """
+    config = resolve_profile(config or {})
+    
     # Generate a unique thread ID
     thread_id = str(uuid.uuid4())
     
     # Create memory checkpointer for interrupts
-    checkpointer = MemorySaver()
+    if checkpointer is None:
+        checkpointer = MemorySaver()
     
     # Initialize the graph
     builder = StateGraph(State)
     
+    # Keep large fields out of the checkpoints when a blob store is configured
+    blob_store = open_blob_store(config["blob_store"]) if config.get("blob_store") else None
+    
+    def add_node(name: str, node: Callable) -> None:
+        # Every node adds the tokens of its LLM calls to the thread's usage
+        node = with_token_accounting(node)
+        if blob_store is not None:
+            node = with_blob_store(node, blob_store, config.get("blob_min_bytes", DEFAULT_MIN_BLOB_BYTES))
+        # Recent spans are dumped if the node fails (no cost while tracing is off).
+        # Transient errors are retried; other errors halt the graph at its last
+        # checkpoint, from which the failed node can be re-run
+        builder.add_node(name, with_tracing(node, name), retry=retry_policy(name, config.get("retry_policies")))
+    
+    # Drafting nodes start persona reviews for each new version when speculating
+    speculative = config.get("speculative_reviews", False)
+    panel_reviews = config.get("panel_reviews", False)
+    drafting = (lambda node: with_speculative_reviews(node, panel_reviews)) if speculative else (lambda node: node)
+    
     # Add all the nodes
-    builder.add_node("conduct_research", conduct_research)
-    builder.add_node("write_draft", write_draft)
-    builder.add_node("get_human_feedback", process_human_feedback)
-    builder.add_node("get_persona_feedback", generate_persona_feedback)
-    builder.add_node("update_draft_human", lambda state: update_draft(state, FeedbackType.HUMAN))
-    builder.add_node("update_draft_persona", lambda state: update_draft(state, FeedbackType.PERSONA))
-    builder.add_node("finalize_draft", finalize_draft)
+    fetch_pages = config.get("fetch_pages", 0)
+    dedupe_threshold = config.get("dedupe_threshold", DEFAULT_DEDUPE_THRESHOLD)
+    synthesize = config.get("synthesize_research", True)
+    raw_research_tokens = config.get("raw_research_tokens", RAW_RESEARCH_TOKENS)
+    add_node(
+        "conduct_research",
+        lambda state: conduct_research(state, fetch_pages, dedupe_threshold, synthesize, raw_research_tokens)
+    )
+    section_drafting = config.get("section_drafting", False)
+    add_node("write_draft", drafting(lambda state: write_draft(state, section_drafting)))
+    add_node("get_human_feedback", process_human_feedback)
+    add_node(
+        "get_persona_feedback",
+        lambda state, config: generate_persona_feedback(state, config, speculative, panel_reviews)
+    )
+    add_node("select_persona_suggestions", select_persona_suggestions)
+    add_node("update_draft_human", drafting(lambda state: update_draft(state, FeedbackType.HUMAN)))
+    add_node("update_draft_persona", drafting(lambda state: update_draft(state, FeedbackType.PERSONA)))
+    add_node("update_draft_lint", drafting(lambda state: update_draft(state, FeedbackType.LINT)))
+    article_store = open_article_store(config["article_store"]) if config.get("article_store") else None
+    add_node("finalize_draft", lambda state, config: finalize_draft(state, config, speculative, article_store))
     
-    # Add the routing node
-    builder.add_node("router", lambda state: state)
+    # Add the node that waits for the editor between drafts
+    add_node("await_editor_action", await_editor_action)
     
     # Create the workflow
     builder.add_edge(START, "conduct_research")
     builder.add_edge("conduct_research", "write_draft")
-    builder.add_edge("write_draft", "router")
+    builder.add_edge("write_draft", "await_editor_action")
     
-    # Routing logic
+    # Routing logic: the graph is paused in await_editor_action until the
+    # editor resumes it, so an idle session runs no supersteps at all
     builder.add_conditional_edges(
-        "router",
-        should_get_human_feedback,
+        "await_editor_action",
+        route_editor_action,
         {
             "get_human_feedback": "get_human_feedback",
-            "router": "router"
+            "get_persona_feedback": "get_persona_feedback",
+            "update_draft_lint": "update_draft_lint",
+            "finalize_draft": "finalize_draft"
         }
     )
     
     builder.add_conditional_edges(
-        "router",
-        should_get_persona_feedback,
+        "get_human_feedback",
+        should_update_from_human_feedback,
         {
-            "get_persona_feedback": "get_persona_feedback", 
-            "router": "router"
+            "update_draft_human": "update_draft_human",
+            "await_editor_action": "await_editor_action"
         }
     )
     
+    builder.add_edge("get_persona_feedback", "select_persona_suggestions")
+    
     builder.add_conditional_edges(
-        "router",
-        should_continue_editing,
+        "select_persona_suggestions",
+        should_update_from_persona_feedback,
         {
-            "update_draft_human": "update_draft_human",
             "update_draft_persona": "update_draft_persona",
-            "finalize_draft": "finalize_draft",
-            "router": "router"  # Fallback case
+            "await_editor_action": "await_editor_action"
         }
     )
     
-    # Connect the update nodes back to the router
-    builder.add_edge("update_draft_human", "router")
-    builder.add_edge("update_draft_persona", "router")
-    builder.add_edge("get_human_feedback", "router")
-    builder.add_edge("get_persona_feedback", "router")
+    # Connect the update nodes back to the wait state
+    builder.add_edge("update_draft_human", "await_editor_action")
+    builder.add_edge("update_draft_persona", "await_editor_action")
+    builder.add_edge("update_draft_lint", "await_editor_action")
     
     # Connect finalize to END
     builder.add_edge("finalize_draft", END)
@@ -0,0 +1,457 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.types import Command
+
+from services.blob_store import BlobStore
+from .blobs import resolve_refs
+from .graph import get_thread_config
+from .recovery import failed_node
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Default number of jobs running the graph at once
+DEFAULT_WORKERS = 4
+
+# Default maximum number of commands waiting for a worker
+DEFAULT_MAX_QUEUED = 100
+
+# Events kept in memory per job for progress streams
+MAX_EVENTS_PER_JOB = 500
+
+# Job statuses; a job is active while it is queued or running
+QUEUED, RUNNING, WAITING, COMPLETED, FAILED = "queued", "running", "waiting", "completed", "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# Job fields a finished command can set besides the interrupt
+JOB_FIELDS = ("article", "error", "failed_node", "tokens_used")
+
+def checkpoint_path(db_path: str) -> str:
+    """Path of the graph checkpoint database kept next to a job database (e.g. jobs.checkpoints.db)."""
+    if db_path == ":memory:":
+        return db_path
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.checkpoints{ext or '.db'}"
+
+def open_checkpointer(path: str) -> SqliteSaver:
+    """Open a SQLite checkpointer, so waiting and failed jobs can continue after a restart.
+
+    Args:
+        path: The SQLite file (":memory:" for a checkpointer that lasts as long as the process)
+
+    Returns:
+        checkpointer: A checkpointer that the job workers can share
+    """
+    if path != ":memory:" and os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return SqliteSaver(conn)
+
+class JobQueueFull(Exception):
+    """Raised when a command is submitted while the queue is at capacity."""
+
+class JobStateError(Exception):
+    """Raised when a command does not fit the job's current status."""
+
+class JobQueue:
+    """SQLite-backed job table and command queue.
+
+    Every start, resume or retry of a job is a command row. Commands are claimed
+    oldest first and stay in the database until they finish, so a restarted
+    server picks up the work that was queued or running when it stopped.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, thread_id TEXT NOT NULL, topic TEXT NOT NULL, fast_mode INTEGER NOT NULL, "
+                "token_budget INTEGER, tokens_used INTEGER NOT NULL DEFAULT 0, "
+                "status TEXT NOT NULL, interrupt TEXT, article TEXT, error TEXT, failed_node TEXT, "
+                "created REAL, updated REAL)"
+            )
+            # Job tables created before failed nodes were recorded
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            if "failed_node" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN failed_node TEXT")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS commands ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, kind TEXT NOT NULL, "
+                "payload TEXT, status TEXT NOT NULL DEFAULT 'pending')"
+            )
+
+    def create(self, topic: str, fast_mode: bool = False, token_budget: Optional[int] = None) -> str:
+        """Add a job and queue its start command.
+
+        Args:
+            topic: The article topic
+            fast_mode: Whether the job runs in fast mode
+            token_budget: Maximum tokens for the article (None for no limit)
+
+        Returns:
+            job_id: The new job's ID
+        """
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, thread_id, topic, fast_mode, token_budget, status, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, str(uuid.uuid4()), topic, int(fast_mode), token_budget, QUEUED, now, now)
+            )
+            self._conn.execute("INSERT INTO commands (job_id, kind) VALUES (?, 'start')", (job_id,))
+        return job_id
+
+    def enqueue_resume(self, job_id: str, value: Any) -> None:
+        """Queue a resume command for a job waiting on an interrupt.
+
+        Raises:
+            JobStateError: If the job is not waiting for input
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, interrupt = NULL, updated = ? WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, WAITING)
+            )
+            if cursor.rowcount == 0:
+                raise JobStateError(f"Job {job_id} is not waiting for input")
+            self._conn.execute(
+                "INSERT INTO commands (job_id, kind, payload) VALUES (?, 'resume', ?)",
+                (job_id, json.dumps(value))
+            )
+
+    def enqueue_retry(self, job_id: str) -> None:
+        """Queue a retry command for a failed job.
+
+        Raises:
+            JobStateError: If the job has not failed
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = NULL, failed_node = NULL, updated = ? WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, FAILED)
+            )
+            if cursor.rowcount == 0:
+                raise JobStateError(f"Job {job_id} has not failed")
+            self._conn.execute("INSERT INTO commands (job_id, kind) VALUES (?, 'retry')", (job_id,))
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Take the oldest pending command and mark its job as running."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT seq, job_id, kind, payload FROM commands WHERE status = 'pending' ORDER BY seq LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE commands SET status = 'running' WHERE seq = ?", (row["seq"],))
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (RUNNING, time.time(), row["job_id"])
+            )
+        command = dict(row)
+        command["payload"] = json.loads(command["payload"]) if command["payload"] is not None else None
+        return command
+
+    def finish(self, seq: int, job_id: str, status: str, **fields: Any) -> None:
+        """Remove a finished command and record the job's new status.
+
+        Args:
+            seq: The command's sequence number
+            job_id: The job the command belonged to
+            status: The job's status after the command
+            **fields: interrupt, article, error, failed_node or tokens_used values to store on the job
+        """
+        values = {"status": status, "updated": time.time()}
+        if "interrupt" in fields:
+            values["interrupt"] = json.dumps(fields["interrupt"], default=str)
+        for key in JOB_FIELDS:
+            if key in fields:
+                values[key] = fields[key]
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM commands WHERE seq = ?", (seq,))
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values.values(), job_id))
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """Get a job.
+
+        Raises:
+            KeyError: If there is no such job
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        job = dict(row)
+        job["fast_mode"] = bool(job["fast_mode"])
+        job["interrupt"] = json.loads(job["interrupt"]) if job["interrupt"] else None
+        return job
+
+    def pending_count(self) -> int:
+        """Number of commands waiting for a worker."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM commands WHERE status = 'pending'").fetchone()[0]
+
+    def recover(self) -> int:
+        """Return commands left running by a previous process to the queue.
+
+        Returns:
+            recovered: The number of commands requeued
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute("UPDATE commands SET status = 'pending' WHERE status = 'running'")
+            self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE id IN (SELECT job_id FROM commands WHERE status = 'pending')",
+                (QUEUED,)
+            )
+        return cursor.rowcount
+
+class JobManager:
+    """Runs article jobs on a bounded pool of worker threads.
+
+    Jobs share one compiled graph; each job has its own graph thread. Workers
+    take commands from the persistent `JobQueue`, stream the graph and publish
+    progress events that clients can follow with `wait_for_events`. A job
+    pauses in the "waiting" status at every interrupt until it is resumed.
+
+    Resuming and retrying continue from the job's graph checkpoint, so the
+    graph needs a persistent checkpointer (see `open_checkpointer`) for jobs
+    to survive a restart. Once a job is completed and no client is reading
+    its events, only its final event is kept.
+    """
+
+    def __init__(
+        self,
+        graph,
+        queue: Optional[JobQueue] = None,
+        workers: int = DEFAULT_WORKERS,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+        blob_store: Optional[BlobStore] = None
+    ):
+        self.graph = graph
+        self.queue = queue or JobQueue()
+        self.workers = workers
+        self.max_queued = max_queued
+        self.blob_store = blob_store
+        self._events: Dict[str, List[Dict[str, Any]]] = {}
+        self._subscribers: Dict[str, int] = {}
+        self._changed = threading.Condition()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "JobManager":
+        """Requeue interrupted work and start the workers."""
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info(f"Requeued {recovered} commands from a previous run")
+        self._stopped.clear()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers once their current commands finish."""
+        self._stopped.set()
+        with self._changed:
+            self._changed.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, topic: str, fast_mode: bool = False, token_budget: Optional[int] = None) -> Dict[str, Any]:
+        """Create a job for a topic.
+
+        Raises:
+            JobQueueFull: If too many commands are already waiting
+        """
+        self._check_capacity()
+        job_id = self.queue.create(topic, fast_mode, token_budget)
+        self._emit(job_id, "queued")
+        return self.queue.get(job_id)
+
+    def resume(self, job_id: str, value: Any) -> Dict[str, Any]:
+        """Answer a job's pending interrupt.
+
+        Args:
+            job_id: The job
+            value: The value for the interrupt (an editor action, feedback text
+                or the selected persona names)
+
+        Raises:
+            KeyError: If there is no such job
+            JobStateError: If the job is not waiting for input
+            JobQueueFull: If too many commands are already waiting
+        """
+        self.queue.get(job_id)
+        self._check_capacity()
+        self.queue.enqueue_resume(job_id, value)
+        self._emit(job_id, "queued")
+        return self.queue.get(job_id)
+
+    def retry(self, job_id: str) -> Dict[str, Any]:
+        """Re-run the node a failed job stopped in, from its last checkpoint.
+
+        The steps the job completed before the failure are not repeated.
+
+        Raises:
+            KeyError: If there is no such job
+            JobStateError: If the job has not failed
+            JobQueueFull: If too many commands are already waiting
+        """
+        self.queue.get(job_id)
+        self._check_capacity()
+        self.queue.enqueue_retry(job_id)
+        self._emit(job_id, "queued")
+        return self.queue.get(job_id)
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """Get a job (KeyError if there is none)."""
+        return self.queue.get(job_id)
+
+    def wait_for_events(self, job_id: str, after: int = 0, timeout: float = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """Get a job's events newer than `after`, waiting while it is active.
+
+        Args:
+            job_id: The job
+            after: ID of the last event the caller has seen
+            timeout: Seconds to wait for a new event if the job is active
+
+        Returns:
+            events: The new events, oldest first
+            active: Whether the job is still queued or running
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            self._subscribers[job_id] = self._subscribers.get(job_id, 0) + 1
+            status = None
+            try:
+                while True:
+                    events = [event for event in self._events.get(job_id, []) if event["id"] > after]
+                    status = self.queue.get(job_id)["status"]
+                    remaining = deadline - time.monotonic()
+                    if events or status not in ACTIVE_STATUSES or remaining <= 0:
+                        return events, status in ACTIVE_STATUSES
+                    self._changed.wait(remaining)
+            finally:
+                self._subscribers[job_id] -= 1
+                if not self._subscribers[job_id]:
+                    del self._subscribers[job_id]
+                    if status == COMPLETED:
+                        self._trim_events(job_id)
+
+    def wait(self, job_id: str, timeout: float = 30.0) -> Dict[str, Any]:
+        """Block until a job stops being active and return it."""
+        deadline = time.monotonic() + timeout
+        after = 0
+        while time.monotonic() < deadline:
+            events, active = self.wait_for_events(job_id, after, deadline - time.monotonic())
+            if events:
+                after = events[-1]["id"]
+            if not active:
+                break
+        return self.queue.get(job_id)
+
+    def _check_capacity(self) -> None:
+        if self.queue.pending_count() >= self.max_queued:
+            raise JobQueueFull(f"{self.max_queued} commands are already queued")
+
+    def _emit(self, job_id: str, event_type: str, **data: Any) -> None:
+        with self._changed:
+            self._append_event(job_id, event_type, data)
+            self._changed.notify_all()
+
+    def _append_event(self, job_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        events = self._events.setdefault(job_id, [])
+        event_id = events[-1]["id"] + 1 if events else 1
+        events.append({"id": event_id, "type": event_type, "timestamp": time.time(), **data})
+        del events[:-MAX_EVENTS_PER_JOB]
+
+    def _trim_events(self, job_id: str) -> None:
+        # A completed job has no more events; its last one tells late clients how it ended
+        del self._events.get(job_id, [])[:-1]
+
+    def _finish(self, command: Dict[str, Any], status: str, event_type: str, **data: Any) -> None:
+        # The status change and its event are published together, so a client
+        # that sees the job become inactive has also seen the final event
+        fields = {key: value for key, value in data.items() if key == "interrupt" or key in JOB_FIELDS}
+        with self._changed:
+            self.queue.finish(command["seq"], command["job_id"], status, **fields)
+            self._append_event(command["job_id"], event_type, data)
+            if status == COMPLETED and not self._subscribers.get(command["job_id"]):
+                self._trim_events(command["job_id"])
+            self._changed.notify_all()
+
+    def _work(self) -> None:
+        while not self._stopped.is_set():
+            command = self.queue.claim()
+            if command is None:
+                with self._changed:
+                    self._changed.wait(0.2)
+                continue
+            self._run(command)
+
+    def _run(self, command: Dict[str, Any]) -> None:
+        job = self.queue.get(command["job_id"])
+        config = get_thread_config(job["thread_id"])
+
+        if command["kind"] == "start":
+            payload = {"topic": job["topic"], "fast_mode": job["fast_mode"], "token_budget": job["token_budget"]}
+        elif not self.graph.get_state(config).values:
+            # Without its checkpoint the job cannot continue where it stopped
+            logger.error(f"No checkpoint for job {job['id']}, cannot {command['kind']} it")
+            self._finish(
+                command, FAILED, "error",
+                error=f"The job's checkpoint is missing, so its {command['kind']} cannot run; start a new job"
+            )
+            return
+        elif command["kind"] == "resume":
+            payload = Command(resume=command["payload"])
+        else:
+            # With no input the graph continues from the checkpoint, re-running the failed node
+            payload = None
+
+        self._emit(job["id"], "started")
+        pending_interrupt = None
+        try:
+            for chunk in self.graph.stream(payload, config=config, stream_mode="updates"):
+                for node, update in chunk.items():
+                    if node == "__interrupt__":
+                        pending_interrupt = self._resolve(update[0].value if update else None)
+                    else:
+                        self._emit(job["id"], "update", node=node, data=self._resolve(update or {}))
+
+            values = self.graph.get_state(config).values
+            tokens_used = (values.get("token_usage") or {}).get("total_tokens", 0)
+            if pending_interrupt is not None:
+                self._finish(command, WAITING, "interrupt", interrupt=pending_interrupt, tokens_used=tokens_used)
+            else:
+                article = self._resolve(dict(values)).get("final_article")
+                self._finish(command, COMPLETED, "completed", article=article, tokens_used=tokens_used)
+        except Exception as e:
+            logger.error(f"Error running job {job['id']}: {str(e)}")
+            failure = failed_node(self.graph, config)
+            self._finish(command, FAILED, "error", error=str(e), failed_node=failure["node"] if failure else None)
+
+    def _resolve(self, value: Any) -> Any:
+        if self.blob_store is not None and isinstance(value, dict):
+            return resolve_refs(value, self.blob_store)
+        return value
@@ -0,0 +1,214 @@
+import re
+import logging
+import unicodedata
+from typing import Dict, Any, List
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Rules from config/content_structure.yaml and config/tone_of_voice.yaml
+MAX_TITLE_CHARS = 65
+MIN_SECTIONS = 3
+MAX_SECTIONS = 5
+MAX_PARAGRAPH_SENTENCES = 5
+MIN_LISTS = 1
+MAX_LISTS = 2
+MAX_EXCLAMATIONS = 2
+
+# Readability: sentences over LONG_SENTENCE_WORDS words should be rare, and
+# the Flesch reading ease should stay above MIN_READING_EASE (plain English)
+LONG_SENTENCE_WORDS = 30
+MAX_LONG_SENTENCE_SHARE = 0.2
+MIN_READING_EASE = 50.0
+
+# Sentence lengths should vary ("vary sentence length to create rhythm"):
+# minimum standard deviation relative to the mean length
+MIN_SENTENCE_LENGTH_VARIATION = 0.25
+
+CLOSING_HEADINGS = re.compile(r"conclusion|final thoughts|wrapping up|key takeaways|summary|next steps", re.IGNORECASE)
+CALL_TO_ACTION = re.compile(
+    r"\b(start|try|get started|sign up|subscribe|download|contact|join|book|share|learn more|read more|"
+    r"take the first step|give it a try|put .{1,40} into practice)\b",
+    re.IGNORECASE
+)
+LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+
+_A, _Z = ord("a"), ord("z")
+_VOWELS = np.zeros(256, dtype=bool)
+_VOWELS[[ord(c) for c in "aeiouy"]] = True
+_SENTENCE_ENDS = np.zeros(256, dtype=bool)
+_SENTENCE_ENDS[[ord(c) for c in ".!?"]] = True
+
+def parse_draft(draft: str) -> Dict[str, Any]:
+    """Parse a Markdown draft into its title, sections, paragraphs and lists.
+
+    Returns:
+        parsed: The "title" (None if missing), the level-two "headings", the
+            prose "paragraphs" (with the index of the "section" they are in, 0
+            being the introduction), the number of "lists" and the text of the
+            "last_section"
+    """
+    title = None
+    headings: List[str] = []
+    paragraphs: List[Dict[str, Any]] = []
+    lists = 0
+    last_section: List[str] = []
+
+    for block in re.split(r"\n\s*\n", draft):
+        lines = [line for line in block.strip().splitlines() if line.strip()]
+        if not lines:
+            continue
+
+        # A block can start with a heading followed directly by text
+        while lines and lines[0].lstrip().startswith("#"):
+            heading = lines.pop(0).strip()
+            level = len(heading) - len(heading.lstrip("#"))
+            text = heading.lstrip("#").strip()
+            if level == 1 and title is None:
+                title = text
+            elif level == 2:
+                headings.append(text)
+                last_section = []
+        if not lines:
+            continue
+
+        last_section.append("\n".join(lines))
+        if all(LIST_ITEM.match(line) or line.startswith("  ") for line in lines):
+            lists += 1
+        elif not lines[0].lstrip().startswith((">", "|", "---", "```")):
+            paragraphs.append({"text": " ".join(lines), "section": len(headings)})
+
+    return {
+        "title": title,
+        "headings": headings,
+        "paragraphs": paragraphs,
+        "lists": lists,
+        "last_section": "\n\n".join(last_section)
+    }
+
+def text_statistics(paragraphs: List[str]) -> Dict[str, Any]:
+    """Sentence-length and readability statistics of some paragraphs, in one vectorised pass.
+
+    The paragraphs are joined and scanned as a byte array: words start at a
+    letter that follows a non-letter, syllables are counted as groups of
+    vowels (less a silent final "e"), and sentences end at ".", "!" or "?" (so sentence boundaries are
+    approximate around abbreviations and decimals).
+
+    Returns:
+        stats: "words", "sentences", the mean, spread (standard deviation) and
+            maximum "sentence_length" in words, the share of long sentences,
+            the Flesch reading ease and the number of sentences per paragraph
+    """
+    text = "\n".join(paragraph + "." for paragraph in paragraphs).lower()
+    # Accented letters become plain ones; other non-ASCII characters separate words
+    text = re.sub(r"[^\x00-\x7f]", " ", unicodedata.normalize("NFKD", text))
+    chars = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    if not len(chars):
+        return {"words": 0, "sentences": 0}
+
+    letters = ((chars >= _A) & (chars <= _Z)) | ((chars >= ord("0")) & (chars <= ord("9")))
+    previous_letters = np.concatenate(([False], letters[:-1]))
+    word_starts = letters & ~previous_letters
+    word_ids = np.cumsum(word_starts) - 1
+    words = int(word_starts.sum())
+    if not words:
+        return {"words": 0, "sentences": 0}
+
+    vowels = _VOWELS[chars]
+    previous_vowels = np.concatenate(([False], vowels[:-1]))
+    syllable_starts = vowels & ~previous_vowels
+    # A final "e" after a consonant is usually silent ("practice", "one")
+    word_ends = letters & ~np.concatenate((letters[1:], [False]))
+    silent = (chars == ord("e")) & word_ends & ~previous_vowels & previous_letters
+    syllables = np.bincount(word_ids[syllable_starts], minlength=words) - np.bincount(word_ids[silent], minlength=words)
+    syllables = np.maximum(syllables, 1)
+
+    # A sentence ends at the first terminator after a word; its words are
+    # those starting before it
+    ends = _SENTENCE_ENDS[chars] & previous_letters
+    sentence_ids = np.cumsum(ends) - ends
+    word_sentences = sentence_ids[word_starts]
+    sentence_lengths = np.bincount(word_sentences)
+    sentence_lengths = sentence_lengths[sentence_lengths > 0]
+
+    # Paragraph boundaries are the newlines between the joined paragraphs
+    paragraph_ids = np.cumsum(chars == ord("\n"))
+    sentence_paragraphs = paragraph_ids[ends]
+    sentences_per_paragraph = np.bincount(sentence_paragraphs, minlength=len(paragraphs))
+
+    sentences = len(sentence_lengths)
+    reading_ease = 206.835 - 1.015 * (words / sentences) - 84.6 * (syllables.sum() / words)
+    return {
+        "words": words,
+        "sentences": sentences,
+        "sentence_length": round(float(sentence_lengths.mean()), 1),
+        "sentence_length_spread": round(float(sentence_lengths.std()), 1),
+        "longest_sentence": int(sentence_lengths.max()),
+        "long_sentence_share": round(float((sentence_lengths > LONG_SENTENCE_WORDS).mean()), 2),
+        "reading_ease": round(float(reading_ease), 1),
+        "sentences_per_paragraph": sentences_per_paragraph.tolist()
+    }
+
+def lint_draft(draft: str) -> Dict[str, Any]:
+    """Check a draft against the mechanical rules of the content guides.
+
+    Args:
+        draft: The Markdown draft
+
+    Returns:
+        report: The "findings" (each with the "rule" broken and a "message"
+            saying what to fix) and the draft's text "stats"
+    """
+    parsed = parse_draft(draft)
+    paragraphs = parsed["paragraphs"]
+    stats = text_statistics([paragraph["text"] for paragraph in paragraphs])
+    findings: List[Dict[str, str]] = []
+
+    def find(rule: str, message: str) -> None:
+        findings.append({"rule": rule, "message": message})
+
+    title = parsed["title"]
+    if not title:
+        find("title", "Add a title as a level-one heading.")
+    elif len(title) > MAX_TITLE_CHARS:
+        find("title", f"Shorten the title to {MAX_TITLE_CHARS} characters or fewer (it has {len(title)}).")
+
+    headings = parsed["headings"]
+    closing = [heading for heading in headings if CLOSING_HEADINGS.search(heading)]
+    sections = len(headings) - len(closing)
+    if not MIN_SECTIONS <= sections <= MAX_SECTIONS:
+        find("sections", f"Use {MIN_SECTIONS}-{MAX_SECTIONS} main sections with H2 headings (the draft has {sections}).")
+    if not closing:
+        find("conclusion", "Add a conclusion section that summarises the key takeaways.")
+    if not CALL_TO_ACTION.search(parsed["last_section"]):
+        find("call_to_action", "End with a clear call-to-action telling the reader what to do next.")
+
+    if parsed["lists"] < MIN_LISTS:
+        find("lists", "Add a bulleted or numbered list where it helps the reader scan.")
+    elif parsed["lists"] > MAX_LISTS:
+        find("lists", f"Use at most {MAX_LISTS} lists (the draft has {parsed['lists']}); turn the others into prose.")
+
+    for paragraph, count in zip(paragraphs, stats.get("sentences_per_paragraph", [])):
+        if count > MAX_PARAGRAPH_SENTENCES:
+            start = " ".join(paragraph["text"].split()[:8])
+            find("paragraph_length", f"Split the paragraph starting \"{start}...\" ({count} sentences; keep paragraphs to 2-{MAX_PARAGRAPH_SENTENCES}).")
+
+    if draft.count("!") > MAX_EXCLAMATIONS:
+        find("exclamations", f"Remove most exclamation points (the draft has {draft.count('!')}).")
+
+    if stats["words"]:
+        if stats["long_sentence_share"] > MAX_LONG_SENTENCE_SHARE:
+            find("sentence_length", f"Shorten long sentences: {stats['long_sentence_share']:.0%} are over {LONG_SENTENCE_WORDS} words.")
+        if stats["reading_ease"] < MIN_READING_EASE:
+            find("readability", f"Use shorter words and sentences (Flesch reading ease {stats['reading_ease']}, aim for {MIN_READING_EASE:.0f}+).")
+        if stats["sentences"] >= 5 and stats["sentence_length_spread"] < MIN_SENTENCE_LENGTH_VARIATION * stats["sentence_length"]:
+            find("sentence_variety", "Vary sentence length to create rhythm; most sentences are about the same length.")
+
+    return {"findings": findings, "stats": {key: value for key, value in stats.items() if key != "sentences_per_paragraph"}}
+
+def format_findings(findings: List[Dict[str, str]]) -> str:
+    """Format linter findings as a numbered list of fixes."""
+    return "\n".join(f"{i}. {finding['message']}" for i, finding in enumerate(findings, 1))
@@ -1,52 +1,116 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from langchain_core.runnables import RunnableConfig
+from langgraph.errors import GraphInterrupt
 from langgraph.types import interrupt
 
+from .blobs import raw_value
+from .lint import lint_draft, format_findings
+from .consolidation import consolidate_suggestions, format_consolidated, format_raw
+from .drafting import write_sectioned_draft, estimate_sectioned_draft_tokens
+from .personas import (
+    load_personas, select_personas, review_draft, review_draft_panel, panel_fallback_limit, PANEL_TOKENS_PER_PERSONA
+)
+from .speculative import get_speculative_reviewer, collect_reviews
+from .recovery import FatalNodeError
 from .state import State, FeedbackType
-from services.llm import get_completion
+from .budget import (
+    NORMAL, EXHAUSTED, ECONOMY_TOP_K, PERSONA_REVIEW_TOKENS,
+    budget_mode, budget_summary, can_afford, estimate_tokens, remaining_tokens, use_fast_models
+)
+from .utils import split_sections, most_relevant_section, compact_sources
+from services.llm import get_completion, resolve_route, add_tracked_usage
+from services.tokens import ContextOverflowError
+from services.article_store import ArticleStore
 from services.search import search_internet
+from services.dedupe import dedupe_results, DEFAULT_THRESHOLD as DEFAULT_DEDUPE_THRESHOLD
 from services.vector_db import query_vector_db
-from prompts import load_prompt
+from prompts import load_prompt, load_system_prompt
+from config import load_guide
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def conduct_research(state: State) -> Dict[str, Any]:
-    """Conduct research on the topic by searching the internet and vector DB."""
+# Size of the raw sources given to the draft when research is not synthesised
+RAW_RESEARCH_TOKENS = 1500
+
+def conduct_research(
+    state: State,
+    fetch_pages: int = 0,
+    dedupe_threshold: float = DEFAULT_DEDUPE_THRESHOLD,
+    synthesize: bool = True,
+    raw_research_tokens: int = RAW_RESEARCH_TOKENS
+) -> Dict[str, Any]:
+    """Conduct research on the topic by searching the internet and vector DB.
+    
+    With `fetch_pages` set, the full text of that many top search results is
+    fetched and given to the synthesis alongside the snippets. Results that
+    nearly duplicate an earlier one (estimated Jaccard similarity of at least
+    `dedupe_threshold`) are left out of the synthesis; 0 keeps them all.
+    
+    Without `synthesize`, no synthesis call is made: the sources are trimmed
+    to `raw_research_tokens` and passed to the draft as they are.
+    """
     try:
         topic = state["topic"]
         logger.info(f"Conducting research on topic: {topic}")
         
         # Search the internet
-        search_results = search_internet(topic)
+        search_results = search_internet(topic, fetch_top=fetch_pages)
         
-        # Query the vector DB
-        vector_results = query_vector_db(topic)
+        # Query the vector DB, restricted to the library filter if one is given
+        vector_results = query_vector_db(topic, where=state.get("library_filter"))
         
-        # Combine the results
+        # Combine the results, dropping syndicated copies and repeated library chunks
         all_results = search_results + vector_results
+        dedupe_report = {"results": len(all_results), "duplicates": 0, "tokens_removed": 0}
+        if dedupe_threshold:
+            all_results, dedupe_report = dedupe_results(all_results, dedupe_threshold)
+            logger.info(
+                f"Dropped {dedupe_report['duplicates']} near-duplicate research results "
+                f"({dedupe_report['tokens_removed']} tokens)"
+            )
+        fast = use_fast_models(state)
         
-        # Format the research into a single string
-        research_prompt = load_prompt("research.yaml")
-        combined_research = get_completion(
-            research_prompt,
-            {"results": all_results, "topic": topic}
-        )
+        estimate = estimate_tokens(str(all_results)) + resolve_route("conduct_research", fast)["max_tokens"]
+        if not synthesize:
+            # Fast path: one round trip less before the first draft
+            combined_research = compact_sources(all_results, raw_research_tokens)
+        elif can_afford(state, estimate):
+            # Format the research into a single string
+            research_prompt = load_prompt("research.yaml")
+            combined_research = get_completion(
+                research_prompt,
+                {"results": all_results, "topic": topic},
+                system_template=load_system_prompt("research.yaml"),
+                node="conduct_research",
+                fast=fast
+            )
+        else:
+            # Keep the budget for the draft and use the sources as they are
+            logger.warning("Token budget too small for research synthesis, using the raw sources")
+            combined_research = compact_sources(all_results, raw_research_tokens)
         
         logger.info("Research completed successfully")
         
         return {
             "research_results": search_results,
             "vector_db_results": vector_results,
-            "combined_research": combined_research
+            "combined_research": combined_research,
+            "research_dedupe": dedupe_report
         }
     except Exception as e:
         logger.error(f"Error in conduct_research: {str(e)}")
-        return {"error": f"Research error: {str(e)}"}
+        raise
 
-def write_draft(state: State) -> Dict[str, Any]:
-    """Write a draft based on the research and guidelines."""
+def write_draft(state: State, sections: bool = False) -> Dict[str, Any]:
+    """Write a draft based on the research and guidelines.
+    
+    With `sections` set, an outline is written first and its sections are
+    written in parallel (see `write_sectioned_draft`); if the outline cannot
+    be used, the draft is written in one completion instead.
+    """
     try:
         topic = state["topic"]
         research = state["combined_research"]
@@ -55,17 +119,35 @@ def write_draft(state: State) -> Dict[str, Any]:
         
         # Load the prompt template
         draft_prompt = load_prompt("draft.yaml")
+        variables = {
+            "topic": topic,
+            "research": research,
+            "tone_of_voice": load_guide("tone_of_voice.yaml"),
+            "content_structure": load_guide("content_structure.yaml")
+        }
+        
+        # Stop before the budget is exceeded rather than after
+        fast = use_fast_models(state)
+        estimate = estimate_tokens(str(variables)) + resolve_route("write_draft", fast)["max_tokens"]
+        if not can_afford(state, estimate):
+            raise FatalNodeError(f"Token budget too small to write a draft (needs about {estimate} tokens)")
+        
+        # The outline, section and coherence calls cost more than one completion
+        if sections and not can_afford(state, estimate_sectioned_draft_tokens(topic, research, fast)):
+            logger.info("Token budget too small for section drafting, writing the draft in one completion")
+            sections = False
+        
+        draft = write_sectioned_draft(topic, research, fast) if sections else None
         
         # Get the draft from the LLM
-        draft = get_completion(
-            draft_prompt,
-            {
-                "topic": topic,
-                "research": research,
-                "tone_of_voice": "config/tone_of_voice.yaml",
-                "content_structure": "config/content_structure.yaml"
-            }
-        )
+        if draft is None:
+            draft = get_completion(
+                draft_prompt,
+                variables,
+                system_template=load_system_prompt("draft.yaml"),
+                node="write_draft",
+                fast=fast
+            )
         
         logger.info("Draft written successfully")
         
@@ -76,7 +158,59 @@ def write_draft(state: State) -> Dict[str, Any]:
         }
     except Exception as e:
         logger.error(f"Error in write_draft: {str(e)}")
-        return {"error": f"Draft writing error: {str(e)}"}
+        raise
+
+def await_editor_action(state: State) -> Dict[str, Any]:
+    """Wait for the editor to choose the next step using interrupt.
+    
+    The editor resumes the graph with a FeedbackType: HUMAN or PERSONA to
+    request feedback, LINT to apply the fixes the local linter found, or NONE
+    to finalize the draft. Any other value, or an action not available for
+    this draft (e.g. a review once the budget is used up), repeats the
+    request with an "error" explaining the valid options.
+    """
+    logger.info("Waiting for editor action")
+    
+    # The linter runs locally, so its findings come with every request
+    findings = lint_draft(state.get("draft") or "")["findings"]
+    
+    # Once the token budget is used up, the draft can only be finalized
+    options = [feedback_type.value for feedback_type in FeedbackType]
+    if not findings:
+        options.remove(FeedbackType.LINT.value)
+    if budget_mode(state) == EXHAUSTED:
+        options = [FeedbackType.NONE.value]
+    
+    request = {
+        "task": "Choose the next step for the draft",
+        "options": options,
+        "lint": findings,
+        "version": state.get("draft_version")
+    }
+    if state.get("token_budget"):
+        request["budget"] = budget_summary(state)
+    
+    action = interrupt(request)
+    
+    # Ask again, with the reason, until the editor answers with an available FeedbackType
+    while True:
+        try:
+            feedback_type = FeedbackType(action)
+        except ValueError:
+            logger.warning(f"Invalid editor action: {action!r}")
+            action = interrupt({**request, "error": f"Unknown action {action!r}; choose one of {', '.join(options)}"})
+            continue
+        if feedback_type.value in options:
+            break
+        logger.warning(f"{feedback_type.value} is not available for this draft")
+        action = interrupt({
+            **request,
+            "error": f"{feedback_type.value} is not available for this draft; choose one of {', '.join(options)}"
+        })
+    
+    logger.info(f"Editor chose: {feedback_type.value}")
+    
+    return {"feedback_type": feedback_type}
 
 def process_human_feedback(state: State) -> Dict[str, Any]:
     """Process human feedback using interrupt."""
@@ -87,7 +221,7 @@ def process_human_feedback(state: State) -> Dict[str, Any]:
         result = interrupt(
             {
                 "task": "Review the draft and provide feedback for improvements",
-                "draft": state["draft"],
+                "draft": raw_value(state, "draft"),
                 "topic": state["topic"],
                 "version": state["draft_version"]
             }
@@ -100,46 +234,126 @@ def process_human_feedback(state: State) -> Dict[str, Any]:
             return {"feedback_type": FeedbackType.NONE}
         
         return {"human_feedback": result}
+    except GraphInterrupt:
+        # Let the interrupt reach the graph so it can pause for input
+        raise
     except Exception as e:
         logger.error(f"Error in process_human_feedback: {str(e)}")
-        return {"error": f"Human feedback error: {str(e)}"}
+        raise
 
-def generate_persona_feedback(state: State) -> Dict[str, Any]:
-    """Generate feedback from different personas."""
+def generate_persona_feedback(
+    state: State,
+    config: RunnableConfig,
+    speculative: bool = False,
+    panel: bool = False
+) -> Dict[str, Any]:
+    """Generate feedback from the personas most relevant to the draft.
+    
+    With speculative reviews enabled, the reviews started in the background
+    when this draft version was written are used instead of new calls. With
+    `panel` set, the other reviews are made in one completion that reviews
+    the draft from all the selected personas (see `review_draft_panel`).
+    """
     try:
         logger.info("Generating persona feedback")
         
-        # Load the persona prompt template
-        persona_prompt = load_prompt("persona.yaml")
+        draft = state["draft"]
+        fast = use_fast_models(state)
+        personas, selection = load_personas()
         
-        # Get the personas from config
-        from ..config import load_config
-        personas = load_config("personas.yaml")
+        # Fewer personas review once the thread is short of budget
+        if budget_mode(state) != NORMAL:
+            selection = {**selection, "top_k": min(selection.get("top_k") or len(personas), ECONOMY_TOP_K)}
         
-        # Generate suggestions from each persona
-        suggestions = []
-        for persona in personas:
-            suggestion = get_completion(
-                persona_prompt,
-                {
-                    "draft": state["draft"],
-                    "persona_name": persona["name"],
-                    "persona_description": persona["description"],
-                    "topic": state["topic"]
-                }
-            )
+        reviewer = get_speculative_reviewer() if speculative else None
+        entry = reviewer.take(config["configurable"]["thread_id"], draft) if reviewer else None
+        
+        if entry is not None:
+            chosen = entry["chosen"]
+            suggestions = collect_reviews(entry, chosen["selected"], draft, state["topic"], fast)
+            logger.info(f"Used speculative persona reviews: {reviewer.report()}")
+        else:
+            # Only the personas most relevant to this draft review it
+            chosen = select_personas(personas, state["topic"], draft, selection)
             
-            suggestions.append({
-                "persona": persona["name"],
-                "suggestion": suggestion
-            })
+            # Run only as many reviews as the remaining budget covers
+            remaining = remaining_tokens(state)
+            if remaining is not None:
+                if panel:
+                    # The draft is sent once, whatever the number of personas
+                    affordable = max(0, remaining - estimate_tokens(draft)) // PANEL_TOKENS_PER_PERSONA
+                else:
+                    affordable = remaining // (estimate_tokens(draft) + PERSONA_REVIEW_TOKENS)
+                if affordable < len(chosen["selected"]):
+                    logger.warning(f"Token budget covers {affordable} of {len(chosen['selected'])} persona reviews")
+                    dropped = [persona["name"] for persona in chosen["selected"][affordable:]]
+                    chosen = {
+                        **chosen,
+                        "selected": chosen["selected"][:affordable],
+                        "skipped": chosen["skipped"] + dropped
+                    }
+            
+            # Generate suggestions from each selected persona
+            if panel:
+                # Personas missing from the panel's answer are only reviewed alone while the budget allows
+                fallbacks = 0 if budget_mode(state) != NORMAL else panel_fallback_limit(remaining, draft, len(chosen["selected"]))
+                suggestions = review_draft_panel(chosen["selected"], draft, state["topic"], fast, fallbacks)
+            else:
+                suggestions = [
+                    review_draft(persona, draft, state["topic"], fast)
+                    for persona in chosen["selected"]
+                ]
+        
+        # Speculative reviews are charged whether they were used or not
+        if reviewer is not None:
+            add_tracked_usage(reviewer.bill(config["configurable"]["thread_id"]))
+        
+        # A panel review can skip personas its answer left out
+        reviewed = {suggestion["persona"] for suggestion in suggestions}
+        missing = [persona["name"] for persona in chosen["selected"] if persona["name"] not in reviewed]
+        if missing:
+            chosen = {
+                **chosen,
+                "selected": [persona for persona in chosen["selected"] if persona["name"] in reviewed],
+                "skipped": chosen["skipped"] + missing
+            }
+        
+        logger.info(
+            f"Ran {len(chosen['selected'])} of {len(personas)} persona reviews, "
+            f"skipped {len(chosen['skipped'])}: {', '.join(chosen['skipped']) or 'none'}"
+        )
+        
+        return {
+            "persona_suggestions": suggestions,
+            "persona_selection": {
+                "reviewed": [persona["name"] for persona in chosen["selected"]],
+                "skipped": chosen["skipped"],
+                "scores": chosen["scores"]
+            }
+        }
+    except Exception as e:
+        logger.error(f"Error in generate_persona_feedback: {str(e)}")
+        raise
+
+def select_persona_suggestions(state: State) -> Dict[str, Any]:
+    """Let the editor choose which persona suggestions to apply using interrupt.
+    
+    This is a separate node from the reviews because a node is re-run from the
+    start when it is resumed; keeping the LLM calls out of it means resuming
+    never repeats them.
+    """
+    try:
+        # Nothing to choose from if the reviews failed
+        if not state.get("persona_suggestions"):
+            return {"feedback_type": FeedbackType.NONE}
         
         # Use interrupt to let the user select which suggestions to incorporate
         result = interrupt(
             {
                 "task": "Select which persona suggestions you would like to incorporate",
-                "draft": state["draft"],
-                "suggestions": suggestions,
+                "draft": raw_value(state, "draft"),
+                "suggestions": raw_value(state, "persona_suggestions"),
+                "skipped_personas": state.get("persona_selection", {}).get("skipped", []),
                 "version": state["draft_version"]
             }
         )
@@ -150,16 +364,28 @@ def generate_persona_feedback(state: State) -> Dict[str, Any]:
         if not result or not isinstance(result, list) or len(result) == 0:
             return {"feedback_type": FeedbackType.NONE}
         
-        return {
-            "persona_suggestions": suggestions,
-            "selected_persona_suggestions": result
-        }
+        return {"selected_persona_suggestions": result}
+    except GraphInterrupt:
+        # Let the interrupt reach the graph so it can pause for input
+        raise
     except Exception as e:
-        logger.error(f"Error in generate_persona_feedback: {str(e)}")
-        return {"error": f"Persona feedback error: {str(e)}"}
+        logger.error(f"Error in select_persona_suggestions: {str(e)}")
+        raise
 
 def update_draft(state: State, feedback_type: FeedbackType) -> Dict[str, Any]:
-    """Update the draft based on feedback."""
+    """Update the draft based on feedback.
+    
+    LINT feedback is the list of fixes from the local linter. Persona
+    suggestions are consolidated first, so advice that several
+    personas repeat is sent once. When the thread is short of token budget,
+    only the section the feedback is most about is rewritten, with the
+    cheaper model. The same happens when the draft is too long to rewrite
+    whole within any model's context window.
+    
+    If even the section cannot be afforded, the draft is left as it is and
+    the update returns an "error" for the editor instead of failing the node
+    (a draft that does not fit any context window still fails it).
+    """
     try:
         current_draft = state["draft"]
         topic = state["topic"]
@@ -172,6 +398,13 @@ def update_draft(state: State, feedback_type: FeedbackType) -> Dict[str, Any]:
         feedback = ""
         if feedback_type == FeedbackType.HUMAN and "human_feedback" in state:
             feedback = state["human_feedback"]
+        elif feedback_type == FeedbackType.LINT:
+            # Mechanical fixes go straight to the update, without a review round
+            findings = lint_draft(current_draft)["findings"]
+            if not findings:
+                logger.info("The linter found nothing to fix")
+                return {}
+            feedback = format_findings(findings)
         elif feedback_type == FeedbackType.PERSONA and "selected_persona_suggestions" in state:
             # Get the full suggestions for the selected personas
             selected_ids = state["selected_persona_suggestions"]
@@ -182,47 +415,137 @@ def update_draft(state: State, feedback_type: FeedbackType) -> Dict[str, Any]:
                 if suggestion["persona"] in selected_ids
             ]
             
-            # Combine the selected suggestions
-            feedback = "\n".join([
-                f"Persona: {suggestion['persona']}\n{suggestion['suggestion']}"
-                for suggestion in selected_suggestions
-            ])
-        
-        # Get the updated draft from the LLM
-        updated_draft = get_completion(
-            update_prompt,
-            {
-                "topic": topic,
-                "current_draft": current_draft,
-                "feedback": feedback,
-                "feedback_type": feedback_type,
-                "tone_of_voice": "config/tone_of_voice.yaml",
-                "content_structure": "config/content_structure.yaml"
-            }
-        )
+            # Merge the suggestions the personas repeat into one prioritised list
+            consolidated = consolidate_suggestions(selected_suggestions)
+            feedback = format_consolidated(consolidated)
+            logger.info(
+                f"Consolidated the suggestions of {len(selected_suggestions)} personas into {len(consolidated)} items "
+                f"({estimate_tokens(format_raw(selected_suggestions))} -> {estimate_tokens(feedback)} tokens)"
+            )
+        
+        fast = use_fast_models(state)
+        sections = split_sections(current_draft)
+        full_estimate = 2 * estimate_tokens(current_draft) + estimate_tokens(feedback)
+        
+        updated_draft = None
+        overflow = None
+        if budget_mode(state) == NORMAL and can_afford(state, full_estimate):
+            # Get the updated draft from the LLM
+            try:
+                updated_draft = get_completion(
+                    update_prompt,
+                    {
+                        "topic": topic,
+                        "current_draft": current_draft,
+                        "feedback": feedback,
+                        "feedback_type": feedback_type.value,
+                        "tone_of_voice": load_guide("tone_of_voice.yaml"),
+                        "content_structure": load_guide("content_structure.yaml")
+                    },
+                    system_template=load_system_prompt("update.yaml"),
+                    node="update_draft",
+                    fast=fast
+                )
+            except ContextOverflowError as e:
+                # Too long to rewrite whole: the other sections are sent as an outline
+                logger.warning(f"Draft too long to update in one completion, updating one section: {str(e)}")
+                overflow = e
+        
+        if updated_draft is None:
+            # Short of budget or context: rewrite only the section the feedback is most about
+            index = most_relevant_section(sections, feedback)
+            outline = "\n".join(section.splitlines()[0] for section in sections)
+            estimate = 2 * estimate_tokens(sections[index]) + estimate_tokens(feedback + outline)
+            if len(sections) < 2 or not can_afford(state, estimate):
+                if overflow is not None:
+                    raise overflow
+                # Not a node failure: the current draft stays valid and the
+                # editor can still finalize it, whereas a failed node would be
+                # retried with the same budget and leave the article stranded
+                logger.warning("Token budget exhausted, the draft was not updated")
+                return {"error": "Token budget exhausted: the draft was not updated"}
+            
+            logger.info(f"Updating section {index + 1} of {len(sections)}")
+            revised = get_completion(
+                load_prompt("update_section.yaml"),
+                {
+                    "topic": topic,
+                    "outline": outline,
+                    "section": sections[index],
+                    "feedback": feedback,
+                    "feedback_type": feedback_type.value,
+                    "tone_of_voice": load_guide("tone_of_voice.yaml"),
+                    "content_structure": load_guide("content_structure.yaml")
+                },
+                system_template=load_system_prompt("update_section.yaml"),
+                node="update_draft",
+                fast=fast
+            ).strip()
+            
+            # Keep the original heading if the reply left it out
+            heading = sections[index].splitlines()[0]
+            if heading.startswith("#") and not revised.startswith("#"):
+                revised = f"{heading}\n\n{revised}"
+            sections[index] = revised + ("\n" if index < len(sections) - 1 else "")
+            updated_draft = "\n".join(sections)
         
         logger.info("Draft updated successfully")
         
         return {
             "draft": updated_draft,
             "draft_version": state.get("draft_version", 1) + 1,
-            "feedback_type": FeedbackType.NONE  # Reset feedback type
+            "feedback_type": FeedbackType.NONE,  # Reset feedback type
+            "error": None
         }
     except Exception as e:
         logger.error(f"Error in update_draft: {str(e)}")
-        return {"error": f"Draft update error: {str(e)}"}
+        raise
 
-def finalize_draft(state: State) -> Dict[str, Any]:
-    """Finalize the draft and save it."""
+def finalize_draft(
+    state: State,
+    config: RunnableConfig,
+    speculative: bool = False,
+    article_store: Optional[ArticleStore] = None
+) -> Dict[str, Any]:
+    """Finalize the draft and save it.
+    
+    With an `article_store`, the article is saved there (and queued for the
+    content library) along with its thread and token cost.
+    """
     try:
         final_draft = state["draft"]
+        thread_id = config["configurable"]["thread_id"]
+        
+        # Reviews started for this draft are no longer needed; those that
+        # finished are still charged to the article
+        if speculative:
+            reviewer = get_speculative_reviewer()
+            reviewer.discard(thread_id)
+            add_tracked_usage(reviewer.bill(thread_id, close=True))
         
         logger.info(f"Finalizing draft version {state['draft_version']}")
         
         # Return only the final_article key to avoid concurrent updates
-        return {
+        update = {
             "final_article": final_draft
         }
+        
+        if article_store is not None:
+            try:
+                article = article_store.save(
+                    final_draft,
+                    state["topic"],
+                    state.get("draft_version"),
+                    thread_id=thread_id,
+                    token_usage=state.get("token_usage"),
+                    final=True
+                )
+                update["saved_article"] = {key: article[key] for key in ("id", "path", "version", "duplicate")}
+            except Exception as e:
+                # The article is still returned; only saving it failed
+                logger.error(f"Error saving the final article: {str(e)}")
+        
+        return update
     except Exception as e:
         logger.error(f"Error in finalize_draft: {str(e)}")
-        return {"error": f"Draft finalization error: {str(e)}"}
\ No newline at end of file
+        raise
\ No newline at end of file
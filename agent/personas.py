@@ -0,0 +1,290 @@
+import json
+import logging
+from typing import Dict, Any, List, Tuple, Optional
+
+from config import load_config
+from services.embeddings import embed_texts, cosine_similarity
+from services.llm import get_completion
+from prompts import load_prompt, load_system_prompt
+from .budget import estimate_tokens, PERSONA_REVIEW_TOKENS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Characters of the draft used when ranking personas against it
+RANKING_DRAFT_CHARS = 4000
+
+# Bounds on each persona's part of a panel review: suggestions, words per
+# suggestion and tokens (the completion's max_tokens is sized from these)
+PANEL_MAX_SUGGESTIONS = 4
+PANEL_SUGGESTION_WORDS = 35
+PANEL_TOKENS_PER_PERSONA = 220
+
+# Tokens of a panel review's JSON outside the personas' parts
+PANEL_OVERHEAD_TOKENS = 40
+
+PRIORITIES = ("high", "medium", "low")
+
+def load_personas() -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Load the personas and their selection settings from config.
+
+    Returns:
+        personas: The configured personas
+        selection: The selection settings (top_k, min_similarity, always_include)
+    """
+    data = load_config("personas.yaml")
+
+    # A plain list of personas has no selection settings
+    if isinstance(data, list):
+        return data, {}
+
+    return data.get("personas", []), data.get("selection") or {}
+
+def rank_personas(personas: List[Dict[str, Any]], topic: str, draft: str) -> List[Tuple[Dict[str, Any], float]]:
+    """Rank personas by the similarity of their description to the topic and draft.
+
+    Persona embeddings are cached, so only the draft is embedded on each call.
+
+    Args:
+        personas: The personas to rank
+        topic: The article topic
+        draft: The current draft
+
+    Returns:
+        ranked: (persona, similarity) pairs, most relevant first
+    """
+    persona_texts = [
+        f"{persona['name']}: {persona['description']} {' '.join(persona.get('keywords', []))}"
+        for persona in personas
+    ]
+    persona_vectors = embed_texts(persona_texts)
+    draft_vector = embed_texts([f"{topic}\n\n{draft[:RANKING_DRAFT_CHARS]}"], cache=False)[0]
+
+    scored = [
+        (persona, cosine_similarity(vector, draft_vector))
+        for persona, vector in zip(personas, persona_vectors)
+    ]
+    return sorted(scored, key=lambda item: item[1], reverse=True)
+
+def select_personas(
+    personas: List[Dict[str, Any]],
+    topic: str,
+    draft: str,
+    selection: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Choose which personas review the draft.
+
+    Pinned personas always review. The others are ranked by relevance, those
+    below `min_similarity` are dropped and at most `top_k` of the rest are kept.
+    Without selection settings, or if ranking fails, every persona reviews.
+
+    Args:
+        personas: The configured personas
+        topic: The article topic
+        draft: The current draft
+        selection: The selection settings
+
+    Returns:
+        result: "selected" personas, "skipped" persona names and "scores" by name
+    """
+    top_k = selection.get("top_k")
+    min_similarity = selection.get("min_similarity")
+    pinned = set(selection.get("always_include") or [])
+
+    if top_k is None and min_similarity is None:
+        return {"selected": list(personas), "skipped": [], "scores": {}}
+
+    try:
+        ranked = rank_personas(personas, topic, draft)
+    except Exception as e:
+        logger.warning(f"Persona ranking failed, using all personas: {str(e)}")
+        return {"selected": list(personas), "skipped": [], "scores": {}}
+
+    candidates = [
+        persona for persona, score in ranked
+        if persona["name"] not in pinned and (min_similarity is None or score >= min_similarity)
+    ]
+    if top_k is not None:
+        candidates = candidates[:top_k]
+
+    chosen = {persona["name"] for persona in candidates} | pinned
+
+    # Keep the configured order so reviews are presented consistently
+    return {
+        "selected": [persona for persona in personas if persona["name"] in chosen],
+        "skipped": [persona["name"] for persona in personas if persona["name"] not in chosen],
+        "scores": {persona["name"]: round(score, 4) for persona, score in ranked}
+    }
+
+def review_draft(persona: Dict[str, Any], draft: str, topic: str, fast: bool = False) -> Dict[str, str]:
+    """Get one persona's suggestions for a draft.
+
+    Args:
+        persona: The reviewing persona
+        draft: The draft to review
+        topic: The article topic
+        fast: Whether the thread runs in fast mode
+
+    Returns:
+        suggestion: The persona name and its suggestions
+    """
+    persona_prompt = load_prompt("persona.yaml")
+    suggestion = get_completion(
+        persona_prompt,
+        {
+            "draft": draft,
+            "persona_name": persona["name"],
+            "persona_description": persona["description"],
+            "topic": topic
+        },
+        system_template=load_system_prompt("persona.yaml"),
+        node="persona_review",
+        fast=fast
+    )
+
+    return {
+        "persona": persona["name"],
+        "suggestion": suggestion
+    }
+
+def format_panel(personas: List[Dict[str, Any]]) -> str:
+    """List the personas of a panel review, one "- name: description" line each."""
+    return "\n".join(f"- {persona['name']}: {' '.join(persona['description'].split())}" for persona in personas)
+
+def parse_panel_review(
+    text: str,
+    personas: List[Dict[str, Any]],
+    max_suggestions: int = PANEL_MAX_SUGGESTIONS,
+    tokens_per_persona: int = PANEL_TOKENS_PER_PERSONA
+) -> Dict[str, Dict[str, Any]]:
+    """Validate a panel review and turn it into persona suggestions.
+
+    The review must be a JSON object with a "reviews" list; each review needs
+    one of the personas' names and a list of suggestion strings. Reviews that
+    don't fit are left out, an unknown priority becomes "medium", and each
+    persona keeps at most `max_suggestions` suggestions within
+    `tokens_per_persona` tokens.
+
+    Args:
+        text: The completion
+        personas: The personas that were asked to review
+        max_suggestions: Most suggestions kept per persona
+        tokens_per_persona: Most tokens of suggestions kept per persona
+
+    Returns:
+        suggestions: Persona suggestions by persona name, each with the
+            "suggestion" text (a numbered list), the "suggestions" and the "priority"
+    """
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        logger.warning(f"Panel review is not valid JSON: {str(e)}")
+        return {}
+    reviews = data.get("reviews") if isinstance(data, dict) else None
+    if not isinstance(reviews, list):
+        logger.warning("Panel review has no list of reviews")
+        return {}
+
+    names = {persona["name"] for persona in personas}
+    parsed = {}
+    for review in reviews:
+        if not isinstance(review, dict) or review.get("persona") not in names or review["persona"] in parsed:
+            continue
+        items = review.get("suggestions")
+        if not isinstance(items, list):
+            continue
+
+        kept, tokens = [], 0
+        for item in items:
+            if not isinstance(item, str) or not item.strip():
+                continue
+            tokens += estimate_tokens(item)
+            if len(kept) == max_suggestions or (kept and tokens > tokens_per_persona):
+                break
+            kept.append(item.strip())
+        if not kept:
+            continue
+
+        priority = str(review.get("priority", "")).lower()
+        parsed[review["persona"]] = {
+            "persona": review["persona"],
+            "suggestion": "\n".join(f"{i}. {item}" for i, item in enumerate(kept, 1)),
+            "suggestions": kept,
+            "priority": priority if priority in PRIORITIES else "medium"
+        }
+    return parsed
+
+def panel_fallback_limit(remaining: Optional[int], draft: str, count: int) -> Optional[int]:
+    """Count the personas missing from a panel review that the budget lets be reviewed on their own.
+
+    Args:
+        remaining: Tokens left in the thread's budget (None for no limit)
+        draft: The draft being reviewed
+        count: Number of personas in the panel review
+
+    Returns:
+        limit: Most single reviews affordable after the panel review, or None for no limit
+    """
+    if remaining is None:
+        return None
+    left = remaining - estimate_tokens(draft) - count * PANEL_TOKENS_PER_PERSONA - PANEL_OVERHEAD_TOKENS
+    return max(0, left) // (estimate_tokens(draft) + PERSONA_REVIEW_TOKENS)
+
+def review_draft_panel(
+    personas: List[Dict[str, Any]],
+    draft: str,
+    topic: str,
+    fast: bool = False,
+    max_fallbacks: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Get the suggestions of several personas for a draft in one completion.
+
+    The draft is sent once instead of once per persona, and the answer is a
+    JSON review per persona with bounded suggestions (see `parse_panel_review`).
+    Personas missing from the answer are reviewed on their own, up to
+    `max_fallbacks` of them; the rest are skipped.
+
+    Args:
+        personas: The reviewing personas
+        draft: The draft to review
+        topic: The article topic
+        fast: Whether the thread runs in fast mode
+        max_fallbacks: Most personas reviewed on their own when missing from
+            the answer (None for all of them, 0 when the budget is short)
+
+    Returns:
+        suggestions: One suggestion per persona reviewed, in persona order
+    """
+    if not personas:
+        return []
+
+    completion = get_completion(
+        load_prompt("persona_panel.yaml"),
+        {
+            "draft": draft,
+            "topic": topic,
+            "personas": format_panel(personas),
+            "max_suggestions": PANEL_MAX_SUGGESTIONS,
+            "suggestion_words": PANEL_SUGGESTION_WORDS
+        },
+        system_template=load_system_prompt("persona_panel.yaml"),
+        node="persona_review",
+        fast=fast,
+        max_tokens=len(personas) * PANEL_TOKENS_PER_PERSONA + PANEL_OVERHEAD_TOKENS,
+        response_format={"type": "json_object"}
+    )
+    parsed = parse_panel_review(completion, personas)
+
+    suggestions = []
+    fallbacks = 0
+    for persona in personas:
+        if persona["name"] in parsed:
+            suggestions.append(parsed[persona["name"]])
+        elif max_fallbacks is None or fallbacks < max_fallbacks:
+            logger.warning(f"Panel review has no valid review from {persona['name']}, running it on its own")
+            suggestions.append(review_draft(persona, draft, topic, fast))
+            fallbacks += 1
+        else:
+            logger.warning(f"Panel review has no valid review from {persona['name']}, skipped to stay within the token budget")
+    return suggestions
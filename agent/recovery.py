@@ -0,0 +1,104 @@
+import logging
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+import httpx
+from langgraph.types import RetryPolicy
+from openai import APIConnectionError, APIStatusError
+
+from config import load_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Retry policies per node (in the config directory)
+RETRY_POLICIES_FILE = "retries.yaml"
+
+# Used when the policy file is missing
+DEFAULT_POLICY = {
+    "max_attempts": 3, "initial_interval": 1.0, "backoff_factor": 2.0, "max_interval": 30.0, "jitter": True
+}
+
+# Errors from the network rather than the request; another attempt may succeed
+TRANSIENT_ERRORS = (APIConnectionError, httpx.TimeoutException, httpx.NetworkError, TimeoutError, ConnectionError)
+
+# HTTP statuses worth another attempt: timeouts, conflicts, rate limits and server errors
+TRANSIENT_STATUSES = (408, 409, 429)
+
+class FatalNodeError(Exception):
+    """Raised by a node for a failure that retrying cannot fix, such as a token budget too small for the step."""
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error is worth retrying the node for.
+
+    Rate limits, timeouts, dropped connections and 5xx responses are
+    transient; everything else (bad requests, authentication, bugs) is fatal.
+    """
+    if isinstance(error, FatalNodeError):
+        return False
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, APIStatusError):
+        status = error.status_code
+    elif isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    else:
+        return False
+    return status in TRANSIENT_STATUSES or status >= 500
+
+@lru_cache(maxsize=None)
+def load_retry_policies() -> Dict[str, Any]:
+    """Load the per-node retry policy table, or an empty table if it is missing."""
+    try:
+        return load_config(RETRY_POLICIES_FILE) or {}
+    except Exception as e:
+        logger.warning(f"No retry policy table, using the default policy everywhere: {str(e)}")
+        return {}
+
+def retry_policy(node: str, overrides: Optional[Dict[str, Any]] = None) -> RetryPolicy:
+    """Get the retry policy for a node.
+
+    Args:
+        node: The node's name in the graph
+        overrides: Settings replacing those of the policy file, with the same
+            shape ("default" and "nodes" sections)
+
+    Returns:
+        policy: A policy retrying the node for transient errors only
+    """
+    settings = dict(DEFAULT_POLICY)
+    for table in (load_retry_policies(), overrides or {}):
+        settings.update(table.get("default") or {})
+    for table in (load_retry_policies(), overrides or {}):
+        settings.update((table.get("nodes") or {}).get(node) or {})
+    return RetryPolicy(
+        initial_interval=settings["initial_interval"],
+        backoff_factor=settings["backoff_factor"],
+        max_interval=settings["max_interval"],
+        max_attempts=settings["max_attempts"],
+        jitter=settings["jitter"],
+        retry_on=is_transient
+    )
+
+def failed_node(graph, config: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """Find the node a thread's last run failed in.
+
+    A failed node halts the graph without writing anything, so the thread's
+    checkpoint is the one after the last node that succeeded and the failed
+    node is still its next step. Streaming the graph with no input
+    (`graph.stream(None, config)`) re-runs only that node; steps that had
+    completed are not repeated.
+
+    Args:
+        graph: The compiled graph
+        config: The thread's config
+
+    Returns:
+        failure: The failed node's name and error, or None if the thread's
+            last run did not fail
+    """
+    for task in graph.get_state(config).tasks:
+        if task.error:
+            return {"node": task.name, "error": str(task.error)}
+    return None
@@ -0,0 +1,148 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from langgraph.types import Command
+
+from services.blob_store import BlobStore
+from .blobs import resolve_refs
+from .graph import get_thread_config
+from .recovery import failed_node
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class GraphRunner:
+    """Run a compiled graph for a single thread on a background worker.
+
+    The caller submits work with `start` or `resume` and collects progress with
+    `poll`; neither call blocks on the graph. Interrupts are surfaced as events
+    and answered with `resume`, which continues from the checkpoint so
+    completed nodes are never executed again.
+
+    A run that fails stops at the failed node's checkpoint; `retry` re-runs
+    that node without repeating the steps before it.
+
+    When the graph keeps large fields in a blob store, pass the same store so
+    update and interrupt events carry the values instead of their digests.
+    """
+
+    def __init__(self, graph, thread_id: str, blob_store: Optional[BlobStore] = None):
+        self.graph = graph
+        self.thread_id = thread_id
+        self.blob_store = blob_store
+        self.config = get_thread_config(thread_id)
+        self.pending_interrupt: Optional[Any] = None
+        self.last_node: Optional[str] = None
+        self.failure: Optional[Dict[str, str]] = None
+        self._events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def busy(self) -> bool:
+        """Whether a graph run is currently in progress."""
+        return self._worker is not None and self._worker.is_alive()
+
+    def start(self, input_data: Dict[str, Any]) -> None:
+        """Start a graph run with new input for this thread.
+
+        Args:
+            input_data: The input state passed to the graph
+        """
+        self._submit(input_data)
+
+    def resume(self, value: Any) -> None:
+        """Answer the pending interrupt and continue the run.
+
+        Args:
+            value: The value returned from `interrupt()` inside the node
+        """
+        self._submit(Command(resume=value))
+
+    def retry(self) -> None:
+        """Re-run the node the last run failed in, from its checkpoint.
+
+        Raises:
+            RuntimeError: If the last run did not fail in a node
+        """
+        if self.failure is None:
+            raise RuntimeError(f"No failed step to retry for thread {self.thread_id}")
+        self._submit(None)
+
+    def poll(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Drain the events produced since the last poll.
+
+        Args:
+            timeout: Seconds to wait for the first event (None returns immediately)
+
+        Returns:
+            events: The events in the order they were produced
+        """
+        events = []
+        try:
+            if timeout is not None:
+                events.append(self._events.get(timeout=timeout))
+            while True:
+                events.append(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the current run finishes.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            finished: True if no run is in progress anymore
+        """
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+        return not self.busy
+
+    def _submit(self, payload: Any) -> None:
+        with self._lock:
+            if self.busy:
+                raise RuntimeError(f"A graph run is already in progress for thread {self.thread_id}")
+            self.pending_interrupt = None
+            self.failure = None
+            self._worker = threading.Thread(
+                target=self._run,
+                args=(payload,),
+                name=f"graph-runner-{self.thread_id[:8]}",
+                daemon=True
+            )
+            self._worker.start()
+
+    def _emit(self, event_type: str, **data: Any) -> None:
+        self._events.put({"type": event_type, "timestamp": time.time(), **data})
+
+    def _run(self, payload: Any) -> None:
+        self._emit("started")
+        try:
+            for chunk in self.graph.stream(payload, config=self.config, stream_mode="updates"):
+                for node, update in chunk.items():
+                    if node == "__interrupt__":
+                        value = update[0].value if update else None
+                        if self.blob_store is not None and isinstance(value, dict):
+                            value = resolve_refs(value, self.blob_store)
+                        self.pending_interrupt = value
+                        self._emit("interrupt", value=value)
+                    else:
+                        self.last_node = node
+                        data = update or {}
+                        if self.blob_store is not None:
+                            data = resolve_refs(data, self.blob_store)
+                        self._emit("update", node=node, data=data)
+
+            self._emit("done", interrupted=self.pending_interrupt is not None)
+        except Exception as e:
+            logger.error(f"Error running graph for thread {self.thread_id}: {str(e)}")
+            self.failure = failed_node(self.graph, self.config)
+            self._emit("error", message=str(e), node=self.failure["node"] if self.failure else None)
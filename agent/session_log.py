@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional
+
+# Default retention limits for a UI session
+DEFAULT_MAX_EVENTS = 200
+DEFAULT_MAX_DRAFTS = 10
+
+# Longest event text kept in the log; longer text is truncated
+MAX_EVENT_TEXT = 500
+
+class SessionLog:
+    """Bounded activity log for an editing session.
+
+    Events are small records that point at draft versions instead of embedding
+    the article text. Each draft version is stored once, and both the events and
+    the stored drafts are capped so a long session keeps a fixed footprint.
+    """
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS, max_drafts: int = DEFAULT_MAX_DRAFTS):
+        self.events: "deque[Dict[str, Any]]" = deque(maxlen=max_events)
+        self.max_drafts = max_drafts
+        self.total_events = 0
+        self._drafts: "OrderedDict[int, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def add_draft(self, version: int, text: str) -> None:
+        """Store the text of a draft version, evicting the oldest versions.
+
+        Args:
+            version: The draft version number
+            text: The draft text
+        """
+        self._drafts[version] = text
+        self._drafts.move_to_end(version)
+        while len(self._drafts) > self.max_drafts:
+            self._drafts.popitem(last=False)
+
+    def get_draft(self, version: int) -> Optional[str]:
+        """Get the text of a stored draft version, if it is still retained."""
+        return self._drafts.get(version)
+
+    @property
+    def draft_versions(self) -> List[int]:
+        """The draft versions currently retained, oldest first."""
+        return list(self._drafts)
+
+    def record(
+        self,
+        role: str,
+        text: str,
+        draft_version: Optional[int] = None,
+        details: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Append an event to the log.
+
+        Args:
+            role: Who produced the event ("agent" or "user")
+            text: A short description of the event
+            draft_version: The draft version the event refers to
+            details: Optional short labels (e.g. persona names)
+
+        Returns:
+            event: The recorded event
+        """
+        if len(text) > MAX_EVENT_TEXT:
+            text = text[:MAX_EVENT_TEXT] + "…"
+
+        self.total_events += 1
+        event = {
+            "id": self.total_events,
+            "role": role,
+            "text": text,
+            "draft_version": draft_version,
+            "details": details or [],
+            "timestamp": time.time()
+        }
+        self.events.append(event)
+        return event
+
+    def record_interrupt(self, value: Any) -> Dict[str, Any]:
+        """Record an interrupt payload without keeping its draft or suggestion text.
+
+        Args:
+            value: The value passed to `interrupt()` by the node
+
+        Returns:
+            event: The recorded event
+        """
+        if not isinstance(value, dict):
+            return self.record("agent", str(value))
+
+        version = value.get("version")
+        if "draft" in value and version is not None:
+            self.add_draft(version, value["draft"])
+
+        personas = [suggestion["persona"] for suggestion in value.get("suggestions", [])]
+        return self.record("agent", value.get("task", "Waiting for input"), version, personas)
+
+    def page(self, page: int = 0, page_size: int = 20) -> List[Dict[str, Any]]:
+        """Get a page of events, newest first.
+
+        Args:
+            page: Zero-based page number
+            page_size: Number of events per page
+
+        Returns:
+            events: The events on the requested page
+        """
+        newest_first = list(reversed(self.events))
+        start = page * page_size
+        return newest_first[start:start + page_size]
+
+    def page_count(self, page_size: int = 20) -> int:
+        """Number of pages of retained events."""
+        return max(1, -(-len(self.events) // page_size))
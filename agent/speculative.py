@@ -0,0 +1,286 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from langchain_core.runnables import RunnableConfig
+
+from services.llm import track_usage, add_tracked_usage
+from .budget import budget_mode, remaining_tokens, NORMAL
+from .personas import load_personas, select_personas, review_draft, review_draft_panel, panel_fallback_limit
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Maximum number of persona reviews running in the background at once
+DEFAULT_MAX_WORKERS = 4
+
+# Key of the single review future of a panel review
+PANEL_REVIEW = "__panel__"
+
+def draft_hash(draft: str) -> str:
+    """Hash identifying a draft version by its content."""
+    return hashlib.sha256(draft.encode("utf-8")).hexdigest()
+
+def tracked_review(persona: Dict[str, Any], draft: str, topic: str, fast: bool = False) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """Run a persona review on a worker thread, returning it with its token usage."""
+    with track_usage() as usage:
+        suggestion = review_draft(persona, draft, topic, fast)
+    return suggestion, usage
+
+def tracked_panel_review(
+    personas: List[Dict[str, Any]],
+    draft: str,
+    topic: str,
+    fast: bool = False,
+    max_fallbacks: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Run a panel review on a worker thread, returning the suggestions with their token usage."""
+    with track_usage() as usage:
+        suggestions = review_draft_panel(personas, draft, topic, fast, max_fallbacks)
+    return suggestions, usage
+
+class SpeculativeReviewer:
+    """Runs persona reviews in the background as soon as a draft version exists.
+
+    Reviews are keyed by thread and draft hash. Scheduling a new version for a
+    thread cancels the reviews of the previous one, and when the editor asks for
+    persona feedback the finished reviews are taken instead of making new calls.
+
+    Every review that finishes is charged to its thread, whether it is used or
+    not: its usage waits in the thread's account until a node of the thread
+    calls `bill`, so wasted speculation still counts against the token budget.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative-review")
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._unbilled: Dict[str, Dict[str, int]] = {}
+        self.stats = {"scheduled": 0, "used": 0, "wasted": 0, "cancelled": 0, "hits": 0, "misses": 0}
+
+    def schedule(
+        self,
+        thread_id: str,
+        topic: str,
+        draft: str,
+        fast: bool = False,
+        panel: bool = False,
+        remaining: Optional[int] = None
+    ) -> None:
+        """Start persona reviews for a new draft version of a thread.
+
+        Args:
+            thread_id: The graph thread the draft belongs to
+            topic: The article topic
+            draft: The new draft
+            fast: Whether the thread runs in fast mode
+            panel: Review from all the selected personas in one completion
+                (see `review_draft_panel`) instead of one per persona
+            remaining: Tokens left in the thread's budget (None for no
+                limit), which caps the personas a panel review may review
+                on their own
+        """
+        personas, selection = load_personas()
+        chosen = select_personas(personas, topic, draft, selection)
+
+        with self._lock:
+            self._unbilled.setdefault(thread_id, {})
+
+        if panel and chosen["selected"]:
+            fallbacks = panel_fallback_limit(remaining, draft, len(chosen["selected"]))
+            futures = {
+                PANEL_REVIEW: self._submit(thread_id, tracked_panel_review, chosen["selected"], draft, topic, fast, fallbacks)
+            }
+        else:
+            futures = {
+                persona["name"]: self._submit(thread_id, tracked_review, persona, draft, topic, fast)
+                for persona in chosen["selected"]
+            }
+
+        with self._lock:
+            self._discard(thread_id)
+            self._pending[thread_id] = {"hash": draft_hash(draft), "chosen": chosen, "futures": futures}
+            self.stats["scheduled"] += len(futures)
+
+        logger.info(f"Started {len(futures)} speculative persona reviews for thread {thread_id}")
+
+    def take(self, thread_id: str, draft: str) -> Optional[Dict[str, Any]]:
+        """Take the speculative reviews for a draft, if they were started.
+
+        Args:
+            thread_id: The graph thread
+            draft: The draft the editor wants reviewed
+
+        Returns:
+            entry: The persona selection ("chosen") and review futures by persona
+                name, or None if no reviews were started for this draft
+        """
+        with self._lock:
+            entry = self._pending.get(thread_id)
+            if entry is None or entry["hash"] != draft_hash(draft):
+                self.stats["misses"] += 1
+                return None
+
+            del self._pending[thread_id]
+            self.stats["hits"] += 1
+            return entry
+
+    def discard(self, thread_id: str) -> None:
+        """Drop the speculative reviews of a thread that no longer needs them."""
+        with self._lock:
+            self._discard(thread_id)
+
+    def bill(self, thread_id: str, close: bool = False) -> Dict[str, int]:
+        """Take the usage of a thread's finished reviews that has not been charged yet.
+
+        Args:
+            thread_id: The graph thread
+            close: The thread is finished, so reviews finishing later are not kept
+
+        Returns:
+            usage: The token usage to add to the thread's `token_usage`
+        """
+        with self._lock:
+            usage = self._unbilled.pop(thread_id, {}) if close else self._unbilled.get(thread_id, {})
+            if not close and usage:
+                self._unbilled[thread_id] = {}
+        return usage
+
+    def record_used(self, count: int) -> None:
+        """Record that speculative reviews were used instead of new calls."""
+        with self._lock:
+            self.stats["used"] += count
+
+    def report(self) -> Dict[str, Any]:
+        """Speculation counters, with the hit rate over persona feedback requests."""
+        with self._lock:
+            stats = dict(self.stats)
+        requests = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / requests, 3) if requests else 0.0
+        return stats
+
+    def _submit(self, thread_id: str, review: Callable, *args) -> Future:
+        def run():
+            result, usage = review(*args)
+            # Charged before the result is visible, so a node that waits for it can bill it
+            self._charge(thread_id, usage)
+            return result
+
+        return self._executor.submit(run)
+
+    def _charge(self, thread_id: str, usage: Dict[str, int]) -> None:
+        with self._lock:
+            unbilled = self._unbilled.get(thread_id)
+            if unbilled is None:
+                return
+            for key, value in usage.items():
+                unbilled[key] = unbilled.get(key, 0) + value
+
+    def _discard(self, thread_id: str) -> None:
+        entry = self._pending.pop(thread_id, None)
+        if entry is None:
+            return
+
+        for future in entry["futures"].values():
+            # Reviews that already started cannot be stopped; their calls are wasted
+            if future.cancel():
+                self.stats["cancelled"] += 1
+            else:
+                self.stats["wasted"] += 1
+
+# Shared reviewer, created on first use
+_reviewer: Optional[SpeculativeReviewer] = None
+_reviewer_lock = threading.Lock()
+
+def get_speculative_reviewer() -> SpeculativeReviewer:
+    """Get the shared speculative reviewer."""
+    global _reviewer
+    with _reviewer_lock:
+        if _reviewer is None:
+            _reviewer = SpeculativeReviewer()
+        return _reviewer
+
+def collect_reviews(
+    entry: Dict[str, Any],
+    personas: List[Dict[str, Any]],
+    draft: str,
+    topic: str,
+    fast: bool = False
+) -> List[Dict[str, str]]:
+    """Gather the speculative reviews, running any that failed or were cancelled.
+
+    The reviews' usage is charged through `SpeculativeReviewer.bill`, not here.
+
+    Args:
+        entry: The entry returned by `SpeculativeReviewer.take`
+        personas: The personas whose reviews are needed
+        draft: The draft being reviewed
+        topic: The article topic
+        fast: Whether the thread runs in fast mode
+
+    Returns:
+        suggestions: One suggestion per persona reviewed, in persona order
+    """
+    # A panel review answers for all its personas at once; those it skipped
+    # to stay within the budget are not reviewed again here
+    panel: Optional[Dict[str, Dict[str, Any]]] = None
+    if PANEL_REVIEW in entry["futures"]:
+        try:
+            reviews = entry["futures"][PANEL_REVIEW].result()
+            panel = {review["persona"]: review for review in reviews}
+        except Exception as e:
+            logger.warning(f"Speculative panel review unavailable, running the reviews now: {str(e)}")
+
+    suggestions = []
+    used = 0
+    for persona in personas:
+        future: Optional[Future] = entry["futures"].get(persona["name"])
+        try:
+            if panel is not None:
+                if persona["name"] in panel:
+                    suggestions.append(panel[persona["name"]])
+                    used += 1
+                continue
+            if future is None:
+                raise LookupError(persona["name"])
+            suggestions.append(future.result())
+            used += 1
+        except Exception as e:
+            logger.warning(f"Speculative review for {persona['name']} unavailable, running it now: {str(e)}")
+            suggestions.append(review_draft(persona, draft, topic, fast))
+
+    get_speculative_reviewer().record_used(used)
+    return suggestions
+
+def with_speculative_reviews(node: Callable, panel: bool = False) -> Callable:
+    """Wrap a drafting node so each new draft version starts persona reviews.
+
+    Args:
+        node: A node that returns a new "draft"
+        panel: Start panel reviews instead of one review per persona
+
+    Returns:
+        wrapped: The wrapped node function
+    """
+    def wrapped(state, config: RunnableConfig):
+        update = node(state)
+        thread_id = config["configurable"]["thread_id"]
+        reviewer = get_speculative_reviewer()
+        # Reviews of earlier versions that finished since the last node are charged here
+        add_tracked_usage(reviewer.bill(thread_id))
+        # Speculation could waste tokens a thread short of budget needs
+        if isinstance(update, dict) and update.get("draft") and budget_mode(state) == NORMAL:
+            try:
+                reviewer.schedule(
+                    thread_id, state["topic"], update["draft"], state.get("fast_mode", False), panel,
+                    remaining_tokens(state)
+                )
+            except Exception as e:
+                logger.warning(f"Could not start speculative persona reviews: {str(e)}")
+        return update
+
+    wrapped.__name__ = getattr(node, "__name__", "node")
+    return wrapped
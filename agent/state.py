@@ -1,20 +1,32 @@
-from typing import TypedDict, List, Dict, Optional, Any, Union
+from typing import TypedDict, List, Dict, Optional, Any, Union, Annotated
 from enum import Enum
 
+from .budget import add_usage
+
 class FeedbackType(str, Enum):
     HUMAN = "human"
     PERSONA = "persona"
+    LINT = "lint"  # apply the fixes found by the local structure and style linter
     NONE = "none"
 
 class State(TypedDict, total=False):
-    """State for the content writer agent workflow."""
+    """State for the content writer agent workflow.
+    
+    When the agent is created with a blob store, the research, draft and persona
+    suggestion fields hold `{"$blob": digest}` references instead of values
+    (see `agent.blobs`). Nodes always see the resolved values.
+    """
     # Input
     topic: str
+    fast_mode: bool  # route LLM calls to the faster models in config/models.yaml
+    token_budget: Optional[int]  # maximum tokens for the article (None for no limit)
+    library_filter: Optional[Dict[str, Any]]  # ChromaDB metadata filter for the content library (e.g. {"vertical": "seo"})
     
     # Research
     research_results: List[Dict[str, Any]]
     vector_db_results: List[Dict[str, Any]]
     combined_research: str
+    research_dedupe: Dict[str, int]  # results, near-duplicates dropped and tokens removed
     
     # Draft
     draft: str
@@ -26,12 +38,17 @@ class State(TypedDict, total=False):
     # Persona feedback
     persona_suggestions: List[Dict[str, str]]
     selected_persona_suggestions: List[str]
+    persona_selection: Dict[str, Any]  # reviewed/skipped persona names and relevance scores
+    
+    # Token usage of the thread, summed over every LLM call
+    token_usage: Annotated[Dict[str, int], add_usage]
     
     # Workflow control
     feedback_type: FeedbackType
     
     # Final output
     final_article: Optional[str]
+    saved_article: Optional[Dict[str, Any]]  # index record of the article in the article store
     
-    # Error handling
+    # Why the last draft update was skipped (cleared by the next update)
     error: Optional[str]
\ No newline at end of file
@@ -1,56 +1,82 @@
-import os
+import re
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def save_markdown(content: str, topic: str, version: Optional[int] = None) -> str:
-    """Save content as a markdown file.
+def format_error(error: str) -> Dict[str, Any]:
+    """Format an error message for the UI.
     
     Args:
-        content: The content to save
-        topic: The topic of the content (used for filename)
-        version: Optional version number to include in the filename
+        error: The error message
         
     Returns:
-        filepath: The path where the file was saved
+        error_dict: A dictionary with the formatted error
     """
-    try:
-        # Create a directory for saved content if it doesn't exist
-        os.makedirs("saved_articles", exist_ok=True)
-        
-        # Create a safe filename from the topic
-        safe_topic = "".join(c if c.isalnum() else "_" for c in topic)
-        
-        # Add version if provided
-        version_str = f"_v{version}" if version is not None else ""
-        
-        # Create the filepath
-        filepath = f"saved_articles/{safe_topic}{version_str}.md"
-        
-        # Save the content
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content)
+    return {
+        "error": True,
+        "message": error
+    }
+
+def split_sections(draft: str) -> List[str]:
+    """Split a Markdown draft into sections at its level-two headings.
+    
+    The text before the first "## " heading (title and introduction) is the
+    first section. Sections that are only whitespace are dropped, so joining
+    the sections with newlines gives the draft back without those blank runs.
+    
+    Args:
+        draft: The Markdown draft
         
-        logger.info(f"Saved content to {filepath}")
+    Returns:
+        sections: The sections, in order
+    """
+    sections = re.split(r"\n(?=## )", draft)
+    return [section for section in sections if section.strip()] or [draft]
+
+def most_relevant_section(sections: List[str], text: str) -> int:
+    """Find the section that shares the most words with a piece of feedback.
+    
+    Args:
+        sections: The draft sections
+        text: The feedback
         
-        return filepath
-    except Exception as e:
-        logger.error(f"Error saving markdown: {str(e)}")
-        return f"Error saving file: {str(e)}"
+    Returns:
+        index: The index of the most relevant section (the first one on a tie)
+    """
+    words = set(re.findall(r"[a-z0-9]{4,}", text.lower()))
+    overlaps = [len(words & set(re.findall(r"[a-z0-9]{4,}", section.lower()))) for section in sections]
+    return max(range(len(sections)), key=lambda i: (overlaps[i], -i))
 
-def format_error(error: str) -> Dict[str, Any]:
-    """Format an error message for the UI.
+def compact_sources(results: List[Dict[str, Any]], max_tokens: int, max_chars_per_source: int = 600) -> str:
+    """Format research results as a compact list of sources that fits a token budget.
+    
+    Each source is cut at a sentence boundary after `max_chars_per_source`
+    characters, and sources are added in order until `max_tokens` (about four
+    characters per token) is reached.
     
     Args:
-        error: The error message
+        results: Search and vector DB results
+        max_tokens: Maximum size of the formatted sources
+        max_chars_per_source: Maximum characters of text per source
         
     Returns:
-        error_dict: A dictionary with the formatted error
+        sources: One "- title (url): text" line per source
     """
-    return {
-        "error": True,
-        "message": error
-    }
\ No newline at end of file
+    lines = []
+    remaining = max_tokens * 4
+    for result in results:
+        text = " ".join((result.get("content") or result.get("body") or "").split())
+        if len(text) > max_chars_per_source:
+            cut = text.rfind(". ", 0, max_chars_per_source)
+            text = text[:cut + 1] if cut > 0 else text[:max_chars_per_source] + "..."
+        
+        url = result.get("url")
+        line = f"- {result.get('title', '')}{f' ({url})' if url else ''}: {text}"
+        if len(line) > remaining:
+            break
+        lines.append(line)
+        remaining -= len(line) + 1
+    return "\n".join(lines)
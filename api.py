@@ -0,0 +1,297 @@
+"""HTTP job server for the content writer agent.
+
+Exposes the agent graph as jobs that many clients can share:
+
+    POST /jobs                    {"topic": "...", "fast_mode": false, "token_budget": null}  -> 202 job
+    GET  /jobs/<id>               -> job (status, pending interrupt, article)
+    POST /jobs/<id>/resume        {"value": ...}  -> 202 job
+    POST /jobs/<id>/retry         -> 202 job (re-runs the failed node from the last checkpoint)
+    GET  /jobs/<id>/events        -> server-sent events until the job stops running
+    GET  /jobs/<id>/article       -> {"article": "..."} once the job is completed
+    GET  /articles?q=&topic=&final=1  -> saved articles (newest first, or best matches for q)
+    GET  /articles/<id>           -> a saved article with its content
+    GET  /health                  -> worker and queue status
+
+A job stops in the "waiting" status at every interrupt. Its `interrupt` field
+says what is expected, and the answer is posted to /resume: an editor action
+("human", "persona", "lint" or "none"), the feedback text, or the list of
+persona names whose suggestions to apply. An unknown editor action repeats
+the request with an "error".
+
+Graph checkpoints are stored next to the job queue, so a job waiting for
+input when the server stops can be resumed after it restarts.
+
+Transient errors (rate limits, timeouts) are retried inside the job. A job
+that still fails stops in the "failed" status with its `failed_node`; posting
+to /retry runs that node again without repeating the steps before it.
+
+Usage:
+    python api.py --port 8000 --workers 4 --db jobs.db
+"""
+
+import os
+import re
+import json
+import logging
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from dotenv import load_dotenv
+
+from agent.graph import create_agent
+from agent.jobs import (
+    JobManager, JobQueue, JobQueueFull, JobStateError, COMPLETED, DEFAULT_WORKERS, checkpoint_path, open_checkpointer
+)
+from services.article_store import ArticleStore, open_article_store, DEFAULT_DIRECTORY as DEFAULT_ARTICLE_STORE
+from services.blob_store import open_blob_store
+from services.dedupe import DEFAULT_THRESHOLD as DEFAULT_DEDUPE_THRESHOLD
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_KEEPALIVE = 15.0
+
+# Same settings as the Streamlit app
+BLOB_STORE_URI = os.getenv("BLOB_STORE_URI")
+SPECULATIVE_REVIEWS = os.getenv("SPECULATIVE_REVIEWS", "").lower() in ("1", "true", "yes")
+FETCH_PAGES = int(os.getenv("FETCH_PAGES", "0"))
+GRAPH_PROFILE = os.getenv("GRAPH_PROFILE", "standard")
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", str(DEFAULT_DEDUPE_THRESHOLD)))
+SECTION_DRAFTING = os.getenv("SECTION_DRAFTING", "").lower() in ("1", "true", "yes")
+PANEL_REVIEWS = os.getenv("PANEL_REVIEWS", "").lower() in ("1", "true", "yes")
+ARTICLE_STORE = os.getenv("ARTICLE_STORE", DEFAULT_ARTICLE_STORE)
+
+# Maximum saved articles per listing
+MAX_ARTICLES_LISTED = 100
+
+JOB_PATH = re.compile(r"^/jobs/([0-9a-f-]+)(?:/(resume|retry|events|article))?$")
+ARTICLE_PATH = re.compile(r"^/articles(?:/(\d+))?$")
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """Routes the job API requests to the server's JobManager."""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def manager(self) -> JobManager:
+        return self.server.manager
+
+    @property
+    def article_store(self) -> Optional[ArticleStore]:
+        return self.server.article_store
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._send_json(200, {
+                "status": "ok",
+                "workers": self.manager.workers,
+                "queued": self.manager.queue.pending_count()
+            })
+
+        match = ARTICLE_PATH.match(url.path)
+        if match:
+            return self._send_articles(match.group(1), parse_qs(url.query))
+
+        match = JOB_PATH.match(url.path)
+        if not match or match.group(2) in ("resume", "retry"):
+            return self._send_json(404, {"error": "Not found"})
+
+        job_id, action = match.groups()
+        try:
+            job = self.manager.get(job_id)
+        except KeyError:
+            return self._send_json(404, {"error": f"No job {job_id}"})
+
+        if action == "events":
+            try:
+                after = int(self.headers.get("Last-Event-ID") or parse_qs(url.query).get("after", ["0"])[0])
+            except ValueError:
+                return self._send_json(400, {"error": "Last-Event-ID and after must be integers"})
+            return self._stream_events(job_id, after)
+
+        if action == "article":
+            if job["status"] != COMPLETED:
+                return self._send_json(409, {"error": f"Job is {job['status']}", "status": job["status"]})
+            return self._send_json(200, {"id": job_id, "topic": job["topic"], "article": job["article"]})
+
+        return self._send_json(200, job)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            return self._send_json(400, {"error": f"Invalid JSON body: {str(e)}"})
+
+        try:
+            if url.path == "/jobs":
+                topic = (body.get("topic") or "").strip()
+                if not topic:
+                    return self._send_json(400, {"error": "A topic is required"})
+                job = self.manager.submit(topic, bool(body.get("fast_mode")), body.get("token_budget") or None)
+                return self._send_json(202, job)
+
+            match = JOB_PATH.match(url.path)
+            if match and match.group(2) == "resume":
+                if "value" not in body:
+                    return self._send_json(400, {"error": "A resume value is required"})
+                return self._send_json(202, self.manager.resume(match.group(1), body["value"]))
+            if match and match.group(2) == "retry":
+                return self._send_json(202, self.manager.retry(match.group(1)))
+        except KeyError as e:
+            return self._send_json(404, {"error": f"No job {str(e)}"})
+        except JobStateError as e:
+            return self._send_json(409, {"error": str(e)})
+        except JobQueueFull as e:
+            return self._send_json(429, {"error": str(e)})
+
+        return self._send_json(404, {"error": "Not found"})
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length))
+        if not isinstance(body, dict):
+            raise ValueError("expected an object")
+        return body
+
+    def _send_json(self, status: int, data: Any) -> None:
+        payload = json.dumps(data, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_articles(self, article_id: Optional[str], query: Dict[str, List[str]]) -> None:
+        if self.article_store is None:
+            return self._send_json(404, {"error": "No article store configured"})
+
+        if article_id is not None:
+            try:
+                return self._send_json(200, self.article_store.get(int(article_id)))
+            except KeyError:
+                return self._send_json(404, {"error": f"No article {article_id}"})
+
+        try:
+            limit = min(int(query.get("limit", ["20"])[0]), MAX_ARTICLES_LISTED)
+            offset = int(query.get("offset", ["0"])[0])
+        except ValueError:
+            return self._send_json(400, {"error": "limit and offset must be integers"})
+
+        if query.get("q"):
+            articles = self.article_store.search(query["q"][0], limit)
+        else:
+            articles = self.article_store.list_articles(
+                topic=query.get("topic", [None])[0],
+                final_only="final" in query,
+                limit=limit,
+                offset=offset
+            )
+        return self._send_json(200, {"articles": articles})
+
+    def _stream_events(self, job_id: str, after: int) -> None:
+        """Send the job's events as server-sent events until it stops running.
+
+        Clients reconnect after resuming the job, passing the last event ID in
+        the Last-Event-ID header (or `?after=`) to receive only new events.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            while True:
+                events, active = self.manager.wait_for_events(job_id, after, SSE_KEEPALIVE)
+                for event in events:
+                    data = json.dumps(event, default=str)
+                    self.wfile.write(f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+                    after = event["id"]
+                if not events:
+                    if not active:
+                        break
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"Event stream for job {job_id} closed by the client")
+
+def create_server(
+    manager: JobManager,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    article_store: Optional[ArticleStore] = None
+) -> ThreadingHTTPServer:
+    """Create the HTTP server for a job manager.
+
+    Args:
+        manager: The job manager whose jobs are served
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free port)
+        article_store: Article store served under /articles
+
+    Returns:
+        server: The server; call `serve_forever()` to handle requests
+    """
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.daemon_threads = True
+    server.manager = manager
+    server.article_store = article_store
+    return server
+
+def create_manager(db_path: str = "jobs.db", workers: int = DEFAULT_WORKERS) -> JobManager:
+    """Create a job manager for the agent graph with the app's settings.
+
+    The graph checkpoints are kept in a SQLite file next to the job queue
+    (see `checkpoint_path`), so jobs continue where they stopped after a restart.
+    """
+    checkpointer = open_checkpointer(checkpoint_path(db_path))
+    graph, _ = create_agent({
+        "profile": GRAPH_PROFILE,
+        "blob_store": BLOB_STORE_URI,
+        "speculative_reviews": SPECULATIVE_REVIEWS,
+        "fetch_pages": FETCH_PAGES,
+        "section_drafting": SECTION_DRAFTING,
+        "panel_reviews": PANEL_REVIEWS,
+        "dedupe_threshold": DEDUPE_THRESHOLD,
+        "article_store": ARTICLE_STORE
+    }, checkpointer)
+    blob_store: Optional[Any] = open_blob_store(BLOB_STORE_URI) if BLOB_STORE_URI else None
+    return JobManager(graph, JobQueue(db_path), workers=workers, blob_store=blob_store)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the content writer job server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--db", default="jobs.db", help="SQLite file for the job queue (graph checkpoints go next to it)")
+    args = parser.parse_args()
+
+    manager = create_manager(args.db, args.workers).start()
+    article_store = open_article_store(ARTICLE_STORE) if ARTICLE_STORE else None
+    server = create_server(manager, args.host, args.port, article_store)
+    logger.info(f"Job server listening on http://{args.host}:{server.server_port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,60 @@
 import os
 import streamlit as st
 import time
+import uuid
 import logging
 from typing import Dict, Any, List, Optional
 import json
 
-from agent.graph import create_agent, get_thread_config
+from agent.graph import create_agent
+from agent.runner import GraphRunner
+from agent.session_log import SessionLog
 from agent.state import FeedbackType
-from agent.utils import save_markdown
+from services.article_store import open_article_store, DEFAULT_DIRECTORY as DEFAULT_ARTICLE_STORE
+from services.blob_store import open_blob_store
+from services.dedupe import DEFAULT_THRESHOLD as DEFAULT_DEDUPE_THRESHOLD
+from services.vector_db import VectorDBClient
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Seconds between UI refreshes while the graph is running in the background
+POLL_INTERVAL = 0.5
+
+# Number of activity events shown per page
+ACTIVITY_PAGE_SIZE = 10
+
+# Optional blob store for large state fields (e.g. "sqlite:///blobs.db")
+BLOB_STORE_URI = os.getenv("BLOB_STORE_URI")
+
+# Start persona reviews in the background for every new draft version
+SPECULATIVE_REVIEWS = os.getenv("SPECULATIVE_REVIEWS", "").lower() in ("1", "true", "yes")
+
+# Number of top search results whose full pages are fetched for research
+FETCH_PAGES = int(os.getenv("FETCH_PAGES", "0"))
+
+# Graph profile ("standard", or "fast_path" to draft from the raw sources)
+GRAPH_PROFILE = os.getenv("GRAPH_PROFILE", "standard")
+
+# Similarity at which research results count as near-duplicates (0 keeps them all)
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", str(DEFAULT_DEDUPE_THRESHOLD)))
+
+# Write the first draft from an outline, with its sections in parallel
+SECTION_DRAFTING = os.getenv("SECTION_DRAFTING", "").lower() in ("1", "true", "yes")
+
+# Review each draft from all selected personas in one JSON completion
+PANEL_REVIEWS = os.getenv("PANEL_REVIEWS", "").lower() in ("1", "true", "yes")
+
+# Directory of the article store where finalised articles are saved ("" to not save them)
+ARTICLE_STORE = os.getenv("ARTICLE_STORE", DEFAULT_ARTICLE_STORE)
+
+# Number of saved articles listed on the start page
+SAVED_ARTICLES_SHOWN = 10
+
+# Default token budget per article (0 for no limit)
+TOKEN_BUDGET = int(os.getenv("TOKEN_BUDGET", "0"))
+
 # Set page config
 st.set_page_config(
     page_title="Content Writer Agent",
@@ -25,23 +67,65 @@ st.set_page_config(
 if "initialized" not in st.session_state:
     st.session_state.initialized = False
     st.session_state.topic = ""
+    st.session_state.fast_mode = False
+    st.session_state.token_budget = TOKEN_BUDGET
+    st.session_state.tokens_used = 0
     st.session_state.graph = None
     st.session_state.thread_id = None
+    st.session_state.runner = None
     st.session_state.current_step = "start"
     st.session_state.draft = ""
     st.session_state.draft_version = 0
     st.session_state.research = ""
-    st.session_state.messages = []
+    st.session_state.history = SessionLog()
     st.session_state.saved_path = None
+    st.session_state.run_error = None
+
+@st.cache_resource(show_spinner=False)
+def load_agent_graph():
+    """Compile the agent graph once per server process.
+    
+    Sessions share the compiled graph and its checkpointer; each session keeps
+    its own thread ID, so their states stay separate.
+    """
+    config = {
+        "profile": GRAPH_PROFILE,
+        "speculative_reviews": SPECULATIVE_REVIEWS,
+        "fetch_pages": FETCH_PAGES,
+        "dedupe_threshold": DEDUPE_THRESHOLD,
+        "section_drafting": SECTION_DRAFTING,
+        "panel_reviews": PANEL_REVIEWS
+    }
+    if BLOB_STORE_URI:
+        config["blob_store"] = BLOB_STORE_URI
+    if ARTICLE_STORE:
+        config["article_store"] = ARTICLE_STORE
+    graph, _ = create_agent(config)
+    return graph
+
+@st.cache_resource(show_spinner=False)
+def load_vector_db():
+    """Open the vector DB client once per server process."""
+    return VectorDBClient()
 
 def initialize_agent():
     """Initialize the agent graph and thread ID."""
     if not st.session_state.initialized:
         with st.spinner("Initializing content writer agent..."):
             try:
-                graph, thread_id = create_agent()
+                graph = load_agent_graph()
+                thread_id = str(uuid.uuid4())
+                
+                # Warm up the vector DB so the first research step doesn't pay for it
+                try:
+                    load_vector_db()
+                except Exception as e:
+                    logger.warning(f"Vector DB unavailable: {str(e)}")
+                
                 st.session_state.graph = graph
                 st.session_state.thread_id = thread_id
+                blob_store = open_blob_store(BLOB_STORE_URI) if BLOB_STORE_URI else None
+                st.session_state.runner = GraphRunner(graph, thread_id, blob_store)
                 st.session_state.initialized = True
                 logger.info(f"Agent initialized with thread ID: {thread_id}")
             except Exception as e:
@@ -52,93 +136,168 @@ def reset_agent():
     """Reset the agent state."""
     st.session_state.initialized = False
     st.session_state.topic = ""
+    st.session_state.fast_mode = False
+    st.session_state.token_budget = TOKEN_BUDGET
+    st.session_state.tokens_used = 0
     st.session_state.graph = None
     st.session_state.thread_id = None
+    st.session_state.runner = None
     st.session_state.current_step = "start"
     st.session_state.draft = ""
     st.session_state.draft_version = 0
     st.session_state.research = ""
-    st.session_state.messages = []
+    st.session_state.history = SessionLog()
     st.session_state.saved_path = None
+    st.session_state.run_error = None
+    st.session_state.writing_started = False
     
     # Reinitialize the agent
     initialize_agent()
 
-def run_agent_step(input_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Run a step in the agent workflow.
+def run_agent_step(input_data: Dict[str, Any]) -> None:
+    """Submit a step in the agent workflow to the background runner.
     
     Args:
         input_data: The input data for the step
-        
-    Returns:
-        output: The output from the step
     """
     try:
-        # Get the thread config
-        thread_config = get_thread_config(st.session_state.thread_id)
-        
-        # Process the step
-        with st.spinner("Processing..."):
-            result = st.session_state.graph.invoke(input_data, config=thread_config)
-        
-        return result
+        st.session_state.run_error = None
+        st.session_state.runner.start(input_data)
     except Exception as e:
         st.error(f"Error running agent step: {str(e)}")
         logger.error(f"Error running agent step: {str(e)}")
-        return {"error": str(e)}
 
-def handle_interrupt(chunk, wait_time: int = 1):
-    """Handle an interrupt from the graph.
+def resume_agent(result: Any) -> None:
+    """Answer the pending interrupt and let the runner continue.
     
     Args:
-        chunk: The chunk containing the interrupt
-        wait_time: Time to wait for a better UX, in seconds
-        
-    Returns:
-        result: The result to resume with
+        result: The value to resume the interrupted node with
     """
-    # Extract the interrupt data
-    interrupt_data = chunk.get("__interrupt__", {})
-    
-    # Add to messages
-    st.session_state.messages.append({
-        "role": "agent",
-        "content": interrupt_data,
-        "timestamp": time.time()
-    })
-    
-    # Display the messages
-    display_messages()
-    
-    # Handle different types of interrupts
-    if "task" in interrupt_data and "draft" in interrupt_data:
-        # This is a review task
-        task = interrupt_data["task"]
-        draft = interrupt_data["draft"]
-        
-        # Update the draft in session state
-        st.session_state.draft = draft
+    try:
+        st.session_state.run_error = None
+        st.session_state.runner.resume(result)
+    except Exception as e:
+        st.error(f"Error resuming agent: {str(e)}")
+        logger.error(f"Error resuming agent: {str(e)}")
+
+def retry_failed_step() -> None:
+    """Re-run the step the last run failed in, keeping the steps completed before it."""
+    try:
+        st.session_state.run_error = None
+        st.session_state.runner.retry()
+    except Exception as e:
+        st.error(f"Error retrying agent step: {str(e)}")
+        logger.error(f"Error retrying agent step: {str(e)}")
+
+def apply_runner_events():
+    """Apply the progress events produced by the background runner to the session."""
+    for event in st.session_state.runner.poll():
+        if event["type"] == "update":
+            chunk = event["data"]
+            
+            # Check for final state
+            if "final_article" in chunk:
+                st.session_state.final_article = chunk["final_article"]
+                st.session_state.current_step = "completed"
+            if "saved_article" in chunk:
+                st.session_state.saved_path = chunk["saved_article"]["path"]
+            
+            # Update the draft if available
+            if "draft" in chunk:
+                st.session_state.draft = chunk["draft"]
+                if "draft_version" in chunk:
+                    st.session_state.draft_version = chunk["draft_version"]
+                st.session_state.history.add_draft(st.session_state.draft_version, chunk["draft"])
+            
+            # Update research if available
+            if "combined_research" in chunk:
+                st.session_state.research = chunk["combined_research"]
+            
+            # A skipped update leaves the draft as it was
+            if chunk.get("error"):
+                st.session_state.history.record("agent", chunk["error"])
+            
+            # Add the tokens this step used
+            if "token_usage" in chunk:
+                st.session_state.tokens_used += chunk["token_usage"].get("total_tokens", 0)
         
-        # Wait a moment for better UX
-        time.sleep(wait_time)
+        elif event["type"] == "interrupt":
+            # Log a reference to the draft rather than the payload itself
+            st.session_state.history.record_interrupt(event["value"])
+            
+            # Update the draft in session state
+            if isinstance(event["value"], dict) and "draft" in event["value"]:
+                st.session_state.draft = event["value"]["draft"]
         
+        elif event["type"] == "error":
+            st.session_state.run_error = event["message"]
+
+def handle_interrupt(interrupt_data: Dict[str, Any]):
+    """Render the input form for a pending interrupt from the graph.
+    
+    Args:
+        interrupt_data: The value passed to `interrupt()` by the node
+    """
+    # Handle different types of interrupts
+    if "options" in interrupt_data:
+        # The graph is waiting for the editor to choose the next step
+        handle_editor_action(interrupt_data["options"], interrupt_data.get("lint", []))
+    elif "task" in interrupt_data and "draft" in interrupt_data:
         if "suggestions" in interrupt_data:
             # This is a persona feedback task
-            suggestions = interrupt_data["suggestions"]
-            return handle_persona_feedback(suggestions)
+            handle_persona_feedback(interrupt_data["suggestions"], interrupt_data.get("skipped_personas", []))
         else:
             # This is a human feedback task
-            return handle_human_feedback()
-    
-    # Default: return None to continue
-    return None
+            handle_human_feedback()
 
-def handle_human_feedback() -> str:
-    """Handle human feedback interrupt.
+def handle_editor_action(options: List[str], findings: List[Dict[str, str]]):
+    """Handle the editor action interrupt by resuming with the chosen next step.
     
-    Returns:
-        feedback: The human feedback
+    Args:
+        options: The actions still available (only finalizing once the token
+            budget is used up)
+        findings: Structure and style problems the local linter found in the draft
     """
+    # Show the current draft
+    if st.session_state.draft:
+        st.markdown("### Current Draft")
+        st.markdown(st.session_state.draft)
+    
+    # Show the mechanical problems that can be fixed without a review round
+    if findings:
+        with st.expander(f"Style check: {len(findings)} issues found"):
+            for finding in findings:
+                st.markdown(f"- {finding['message']}")
+    
+    # Show options for next steps
+    st.markdown("### What would you like to do next?")
+    if options == [FeedbackType.NONE.value]:
+        st.warning("The token budget for this article is used up, so the draft can only be finalized.")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        if st.button("Add Human Feedback", disabled=FeedbackType.HUMAN.value not in options):
+            resume_agent(FeedbackType.HUMAN)
+            st.rerun()
+    
+    with col2:
+        if st.button("Get Persona Feedback", disabled=FeedbackType.PERSONA.value not in options):
+            resume_agent(FeedbackType.PERSONA)
+            st.rerun()
+    
+    with col3:
+        if st.button("Fix Style Issues", disabled=FeedbackType.LINT.value not in options):
+            resume_agent(FeedbackType.LINT)
+            st.rerun()
+    
+    with col4:
+        if st.button("Finalize Draft"):
+            resume_agent(FeedbackType.NONE)
+            st.rerun()
+
+def handle_human_feedback():
+    """Handle human feedback interrupt by resuming with the editor's feedback."""
     st.markdown("### Provide Feedback")
     st.markdown("Please review the draft and provide your feedback for improvements:")
     
@@ -154,39 +313,31 @@ def handle_human_feedback() -> str:
     
     with col1:
         if st.button("Submit Feedback"):
-            # Add to messages
-            st.session_state.messages.append({
-                "role": "user",
-                "content": feedback,
-                "timestamp": time.time()
-            })
-            return feedback
+            # Log the editor's response
+            st.session_state.history.record("user", feedback, st.session_state.draft_version)
+            resume_agent(feedback)
+            st.rerun()
     
     with col2:
         if st.button("Skip Feedback"):
-            # Add to messages
-            st.session_state.messages.append({
-                "role": "user",
-                "content": "No feedback provided",
-                "timestamp": time.time()
-            })
-            return "none"
-    
-    # If no button clicked, just return None to continue waiting
-    st.stop()
+            # Log the editor's response
+            st.session_state.history.record("user", "No feedback provided", st.session_state.draft_version)
+            resume_agent("none")
+            st.rerun()
 
-def handle_persona_feedback(suggestions: List[Dict[str, str]]) -> List[str]:
-    """Handle persona feedback interrupt.
+def handle_persona_feedback(suggestions: List[Dict[str, str]], skipped: List[str]):
+    """Handle persona feedback interrupt by resuming with the selected personas.
     
     Args:
         suggestions: The persona suggestions
-        
-    Returns:
-        selected: List of selected persona names
+        skipped: Names of the personas skipped as less relevant to the draft
     """
     st.markdown("### Persona Feedback")
     st.markdown("The following personas have reviewed your article. Please select which suggestions you'd like to incorporate:")
     
+    if skipped:
+        st.caption(f"Skipped {len(skipped)} less relevant persona reviews: {', '.join(skipped)}")
+    
     # Show the current draft
     with st.expander("Current Draft", expanded=True):
         st.markdown(st.session_state.draft)
@@ -198,7 +349,12 @@ def handle_persona_feedback(suggestions: List[Dict[str, str]]) -> List[str]:
         persona = suggestion["persona"]
         suggestion_text = suggestion["suggestion"]
         
-        with st.expander(f"Feedback from: {persona}", expanded=True):
+        # Panel reviews rate how much each persona's suggestions matter
+        title = f"Feedback from: {persona}"
+        if suggestion.get("priority"):
+            title += f" ({suggestion['priority']} priority)"
+        
+        with st.expander(title, expanded=True):
             st.markdown(suggestion_text)
             
             if st.checkbox(f"Include suggestions from {persona}", key=f"persona_{persona}"):
@@ -209,54 +365,88 @@ def handle_persona_feedback(suggestions: List[Dict[str, str]]) -> List[str]:
     
     with col1:
         if st.button("Apply Selected Suggestions"):
-            # Add to messages
-            st.session_state.messages.append({
-                "role": "user",
-                "content": f"Selected persona suggestions: {', '.join(selected_personas)}",
-                "timestamp": time.time()
-            })
-            return selected_personas
+            # Log the editor's response
+            st.session_state.history.record("user", f"Selected persona suggestions: {', '.join(selected_personas)}", st.session_state.draft_version)
+            resume_agent(selected_personas)
+            st.rerun()
     
     with col2:
         if st.button("Skip Persona Feedback"):
-            # Add to messages
-            st.session_state.messages.append({
-                "role": "user",
-                "content": "No persona suggestions selected",
-                "timestamp": time.time()
-            })
-            return []
-    
-    # If no button clicked, just return None to continue waiting
-    st.stop()
+            # Log the editor's response
+            st.session_state.history.record("user", "No persona suggestions selected", st.session_state.draft_version)
+            resume_agent([])
+            st.rerun()
 
+@st.fragment
 def display_messages():
-    """Display the conversation messages."""
+    """Display the session activity, newest first, one page at a time."""
+    history = st.session_state.history
+    
     # Only show if we have messages
-    if not st.session_state.messages:
+    if not len(history):
         return
     
     # Container for messages
     with st.container():
         st.markdown("### Agent Activity")
         
-        for msg in st.session_state.messages:
-            role = msg["role"]
-            content = msg["content"]
+        pages = history.page_count(ACTIVITY_PAGE_SIZE)
+        page = 0
+        if pages > 1:
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, key="activity_page") - 1
+        
+        for event in history.page(page, ACTIVITY_PAGE_SIZE):
+            text = event["text"]
+            if event["details"]:
+                text = f"{text} ({', '.join(event['details'])})"
+            if event["draft_version"]:
+                text = f"{text} · draft v{event['draft_version']}"
             
             # Format based on role
-            if role == "agent":
-                # Agent messages may be more complex
-                if isinstance(content, dict):
-                    # This is an interrupt with structured data
-                    if "task" in content:
-                        st.info(f"**Agent:** {content['task']}")
-                else:
-                    # Regular message
-                    st.info(f"**Agent:** {content}")
+            if event["role"] == "agent":
+                st.info(f"**Agent:** {text}")
             else:
                 # User messages
-                st.success(f"**You:** {content}")
+                st.success(f"**You:** {text}")
+        
+        dropped = history.total_events - len(history)
+        if dropped:
+            st.caption(f"{dropped} older events are no longer retained.")
+
+def display_token_budget():
+    """Show the tokens used so far and what is left of the article's budget."""
+    used = st.session_state.tokens_used
+    budget = st.session_state.token_budget
+    with st.sidebar:
+        st.markdown("### Token Budget")
+        if not budget:
+            st.metric("Tokens used", f"{used:,}")
+            return
+        st.metric("Tokens remaining", f"{max(0, budget - used):,}", help=f"{used:,} of {budget:,} used")
+        st.progress(min(1.0, used / budget))
+
+def display_saved_articles():
+    """Display the latest saved articles in the sidebar, with a search box."""
+    if not ARTICLE_STORE:
+        return
+    
+    with st.sidebar:
+        st.markdown("### Saved Articles")
+        query = st.text_input("Search saved articles", key="article_search")
+        try:
+            store = open_article_store(ARTICLE_STORE)
+            articles = store.search(query, SAVED_ARTICLES_SHOWN) if query else store.list_articles(final_only=True, limit=SAVED_ARTICLES_SHOWN)
+        except Exception as e:
+            st.warning(f"Article store unavailable: {str(e)}")
+            return
+        
+        if not articles:
+            st.caption("No saved articles match." if query else "No saved articles yet.")
+        for article in articles:
+            saved = time.strftime("%Y-%m-%d", time.localtime(article["created_at"]))
+            st.markdown(f"**{article['title']}**  \n{article['topic']} · v{article['version']} · {saved} · {article['total_tokens']:,} tokens")
+            if article.get("snippet"):
+                st.caption(article["snippet"])
 
 def start_page():
     """Display the start page to get the topic."""
@@ -265,16 +455,28 @@ def start_page():
     
     # Get the topic
     topic = st.text_input("What topic would you like to write about?", key="topic_input")
+    fast_mode = st.checkbox(
+        "Fast mode",
+        help="Use faster, cheaper models for every step of this article (see config/models.yaml)."
+    )
+    token_budget = st.number_input(
+        "Token budget (0 for no limit)",
+        min_value=0,
+        value=TOKEN_BUDGET,
+        step=10000,
+        help="Past 75% of the budget the agent switches to cheaper models, fewer personas and "
+             "section-only updates, and it stops before the budget is exceeded."
+    )
+    
+    display_saved_articles()
     
     if st.button("Start Writing"):
         if topic:
             st.session_state.topic = topic
+            st.session_state.fast_mode = fast_mode
+            st.session_state.token_budget = int(token_budget)
             st.session_state.current_step = "writing"
-            st.session_state.messages.append({
-                "role": "user",
-                "content": f"Topic: {topic}",
-                "timestamp": time.time()
-            })
+            st.session_state.history.record("user", f"Topic: {topic}" + (" (fast mode)" if fast_mode else ""))
             st.rerun()
         else:
             st.warning("Please enter a topic first.")
@@ -282,89 +484,61 @@ def start_page():
 def writing_process():
     """Handle the main writing process."""
     st.title(f"Writing Article: {st.session_state.topic}")
+    runner = st.session_state.runner
     
-    # Initialize the process
+    # Start the process with the topic; the runner works in the background
     if not st.session_state.get("writing_started", False):
-        # Start the process with the topic
-        input_data = {"topic": st.session_state.topic}
+        run_agent_step({
+            "topic": st.session_state.topic,
+            "fast_mode": st.session_state.fast_mode,
+            "token_budget": st.session_state.token_budget or None
+        })
+        st.session_state.writing_started = True
+    
+    # Pick up whatever the runner produced since the last rerun
+    apply_runner_events()
+    
+    if st.session_state.current_step == "completed":
+        st.rerun()
+    
+    if st.session_state.run_error:
+        st.error(f"Error in writing process: {st.session_state.run_error}")
         
-        # Run the process
-        try:
-            for chunk in st.session_state.graph.stream(input_data, config=get_thread_config(st.session_state.thread_id)):
-                # Check for interrupts
-                if "__interrupt__" in chunk:
-                    # Handle the interrupt
-                    result = handle_interrupt(chunk)
-                    
-                    if result is not None:
-                        # Resume the process with the result
-                        from langgraph.types import Command
-                        st.session_state.graph.invoke(Command(resume=result), config=get_thread_config(st.session_state.thread_id))
-                
-                # Check for final state
-                if "final_article" in chunk:
-                    st.session_state.final_article = chunk["final_article"]
-                    st.session_state.current_step = "completed"
-                    st.rerun()
-                
-                # Update the draft if available
-                if "draft" in chunk:
-                    st.session_state.draft = chunk["draft"]
-                    if "draft_version" in chunk:
-                        st.session_state.draft_version = chunk["draft_version"]
-                
-                # Update research if available
-                if "combined_research" in chunk:
-                    st.session_state.research = chunk["combined_research"]
-                
-                # Show progress
-                if not st.session_state.get("progress_placeholder"):
-                    st.session_state.progress_placeholder = st.empty()
-                    
-                st.session_state.progress_placeholder.info("Processing...")
-            
-            # Mark as started
-            st.session_state.writing_started = True
-            
-        except Exception as e:
-            st.error(f"Error in writing process: {str(e)}")
-            logger.error(f"Error in writing process: {str(e)}")
+        # The run stopped at the failed step's checkpoint, so only that step runs again
+        if not runner.busy and runner.failure:
+            if st.button(f"Retry {runner.failure['node'].replace('_', ' ')}"):
+                retry_failed_step()
+                st.rerun()
     
     # Display the current state
-    if st.session_state.current_step == "writing":
-        # Show the current draft
+    if runner.busy:
+        # Show progress
+        step = runner.last_node or "starting"
+        st.info(f"Processing... (last completed step: {step})")
+        
         if st.session_state.draft:
             st.markdown("### Current Draft")
             st.markdown(st.session_state.draft)
-        
-        # Show options for next steps
-        st.markdown("### What would you like to do next?")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("Add Human Feedback"):
-                run_agent_step({"feedback_type": FeedbackType.HUMAN})
-                st.rerun()
-        
-        with col2:
-            if st.button("Get Persona Feedback"):
-                run_agent_step({"feedback_type": FeedbackType.PERSONA})
-                st.rerun()
-        
-        with col3:
-            if st.button("Finalize Draft"):
-                run_agent_step({"feedback_type": FeedbackType.NONE})
-                st.rerun()
-        
-        # Display the messages
-        display_messages()
-        
-        # Show research in sidebar
-        if st.session_state.research:
-            with st.sidebar:
-                st.markdown("### Research Summary")
-                st.markdown(st.session_state.research)
+    
+    elif runner.pending_interrupt is not None:
+        handle_interrupt(runner.pending_interrupt)
+    
+    # Display the messages
+    display_messages()
+    
+    # Show the token budget in the sidebar
+    display_token_budget()
+    
+    # Show research in sidebar
+    if st.session_state.research:
+        with st.sidebar:
+            st.markdown("### Research Summary")
+            st.markdown(st.session_state.research)
+    
+    # Keep polling the runner until the current run finishes
+    if runner.busy:
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
 
 def completed_page():
     """Display the completed article."""
@@ -374,16 +548,20 @@ def completed_page():
     st.markdown("### Final Article")
     st.markdown(st.session_state.final_article)
     
-    # Save the article
-    if st.button("Save Article as Markdown") and not st.session_state.saved_path:
+    # The graph saves the article to the article store when it is finalised
+    if st.session_state.saved_path:
+        st.success(f"Article saved to: {st.session_state.saved_path}")
+    elif st.button("Save Article"):
         try:
-            filepath = save_markdown(
+            article = open_article_store(ARTICLE_STORE or DEFAULT_ARTICLE_STORE).save(
                 st.session_state.final_article,
                 st.session_state.topic,
-                st.session_state.draft_version
+                st.session_state.draft_version,
+                thread_id=st.session_state.thread_id,
+                final=True
             )
-            st.session_state.saved_path = filepath
-            st.success(f"Article saved to: {filepath}")
+            st.session_state.saved_path = article["path"]
+            st.success(f"Article saved to: {article['path']}")
         except Exception as e:
             st.error(f"Error saving article: {str(e)}")
     
@@ -0,0 +1,74 @@
+"""Benchmark campaign mode against writing the same articles independently.
+
+Five articles on one theme are researched, drafted and put through a persona
+round against the fake services, whose client takes a fixed latency per call
+plus latencies per prompt and generated token. Independently, each article
+runs the whole graph on its own thread, four at a time. As a campaign, the
+theme is researched once, each article gets a few sources of its own on top,
+the drafts are written four at a time and their persona reviews share one
+background pool. Reports the LLM calls, the research syntheses, the prompt
+tokens and the wall time of each.
+
+Usage:
+    python -m benchmarks.campaign
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from langgraph.types import Command
+
+import agent.speculative as speculative
+from agent.campaign import run_campaign, DEFAULT_MAX_CONCURRENT
+from agent.graph import create_agent, get_thread_config
+from agent.state import FeedbackType
+from services.fakes import FakeOpenAIClient, estimate_tokens, use_fake_services
+from benchmarks.common import print_table, quiet_logging, timer
+
+# Seconds per call, per generated token and per prompt token of the fake client
+CALL_LATENCY = 0.3
+TOKEN_LATENCY = 0.0005
+PROMPT_TOKEN_LATENCY = 0.0001
+
+THEME = "email marketing"
+TOPICS = [
+    "email subject lines",
+    "email list segmentation",
+    "email send times",
+    "email deliverability",
+    "email newsletter design"
+]
+
+def write_independently(topic: str) -> None:
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+    list(graph.stream({"topic": topic}, config=config))
+    list(graph.stream(Command(resume=FeedbackType.PERSONA), config=config))
+
+def run(mode: str):
+    speculative._reviewer = None
+    client = FakeOpenAIClient(
+        latency=CALL_LATENCY, latency_per_token=TOKEN_LATENCY, latency_per_prompt_token=PROMPT_TOKEN_LATENCY
+    )
+    row = {"mode": mode, "articles": len(TOPICS)}
+    with use_fake_services(client), timer(row, "wall_s"):
+        if mode == "campaign":
+            run_campaign(THEME, TOPICS)
+        else:
+            with ThreadPoolExecutor(max_workers=DEFAULT_MAX_CONCURRENT) as executor:
+                list(executor.map(write_independently, TOPICS))
+
+    # Calls are counted from the client, since the articles run on worker threads
+    row.update({
+        "calls": len(client.calls),
+        "syntheses": sum("Research Synthesis Task" in call["prompt"] for call in client.calls),
+        "prompt_tokens": sum(estimate_tokens(call["prompt"]) for call in client.calls)
+    })
+    return row
+
+def main():
+    with quiet_logging():
+        rows = [run("independent"), run("campaign")]
+    print_table(f"{len(TOPICS)} articles on {THEME!r}: independent vs campaign", rows)
+
+if __name__ == "__main__":
+    main()
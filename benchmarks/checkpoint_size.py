@@ -0,0 +1,66 @@
+"""Benchmark checkpoint size and serialisation time with and without the blob store.
+
+Runs a long editing session (first draft plus many human feedback rounds)
+against the fake services and reports checkpoint bytes and serialisation time
+per superstep, with large state fields kept inline and in a blob store.
+
+Usage:
+    python -m benchmarks.checkpoint_size [rounds]
+"""
+
+import sys
+import tempfile
+
+from langgraph.types import Command
+
+from agent.graph import create_agent, get_thread_config
+from agent.state import FeedbackType
+from services.fakes import FakeOpenAIClient, use_fake_services
+from benchmarks.common import CountingSaver, print_table, quiet_logging
+
+# Editing rounds in the simulated session
+DEFAULT_ROUNDS = 20
+
+# Sentences per paragraph in the fake drafts; gives a draft and research
+# synthesis of roughly 4,000 tokens each, like a real long-form article
+ARTICLE_SENTENCES = 60
+
+def run_session(rounds: int, config=None):
+    """Run a session and return the checkpoint counters."""
+    saver = CountingSaver()
+    graph, thread_id = create_agent(config, checkpointer=saver)
+    thread_config = get_thread_config(thread_id)
+
+    def run(payload):
+        for _ in graph.stream(payload, config=thread_config):
+            pass
+
+    run({"topic": "content marketing"})
+    for i in range(rounds):
+        run(Command(resume=FeedbackType.HUMAN))
+        run(Command(resume=f"Round {i}: tighten the introduction."))
+    run(Command(resume=FeedbackType.NONE))
+
+    counters = saver.snapshot()
+    steps = max(1, counters["checkpoints"])
+    return {
+        "checkpoints": counters["checkpoints"],
+        "total_kb": round(counters["checkpoint_bytes"] / 1024, 1),
+        "kb_per_step": round(counters["checkpoint_bytes"] / 1024 / steps, 2),
+        "writes_kb": round(counters["write_bytes"] / 1024, 1),
+        "serialise_us_per_step": round(counters["serialise_ms"] * 1000 / steps, 1)
+    }
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROUNDS
+    rows = []
+    with quiet_logging(), use_fake_services(FakeOpenAIClient(sentences=ARTICLE_SENTENCES)), \
+            tempfile.TemporaryDirectory() as tmp:
+        rows.append({"state": "inline", **run_session(rounds)})
+        rows.append({"state": "blob store (disk)", **run_session(rounds, {"blob_store": f"{tmp}/blobs"})})
+        rows.append({"state": "blob store (sqlite)", **run_session(rounds, {"blob_store": f"sqlite:///{tmp}/blobs.db"})})
+
+    print_table(f"Checkpoint size over {rounds} editing rounds", rows)
+
+if __name__ == "__main__":
+    main()
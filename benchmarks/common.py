@@ -0,0 +1,81 @@
+"""Shared helpers for the benchmark scripts."""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+from langgraph.checkpoint.memory import MemorySaver
+
+class CountingSaver(MemorySaver):
+    """In-memory checkpointer that counts checkpoint writes and their serialised size."""
+
+    def __init__(self):
+        super().__init__()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the counters."""
+        self.checkpoints = 0
+        self.supersteps = 0
+        self.checkpoint_bytes = 0
+        self.write_bytes = 0
+        self.serialise_seconds = 0.0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        start = time.perf_counter()
+        _, data = self.serde.dumps_typed(checkpoint)
+        self.serialise_seconds += time.perf_counter() - start
+
+        self.checkpoints += 1
+        self.checkpoint_bytes += len(data)
+        if metadata.get("source") == "loop":
+            self.supersteps += 1
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        for _, value in writes:
+            self.write_bytes += len(self.serde.dumps_typed(value)[1])
+        return super().put_writes(config, writes, task_id, task_path)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The counters as a dictionary."""
+        return {
+            "supersteps": self.supersteps,
+            "checkpoints": self.checkpoints,
+            "checkpoint_bytes": self.checkpoint_bytes,
+            "write_bytes": self.write_bytes,
+            "serialise_ms": round(self.serialise_seconds * 1000, 2)
+        }
+
+def print_table(title: str, rows: List[Dict[str, Any]]) -> None:
+    """Print a list of result rows as an aligned text table."""
+    print(f"\n## {title}\n")
+    if not rows:
+        print("(no results)")
+        return
+
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    widths = {c: max(len(str(c)), *(len(str(row.get(c, ""))) for row in rows)) for c in columns}
+    print("  ".join(str(c).ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
+
+@contextmanager
+def quiet_logging():
+    """Silence log output while a benchmark runs."""
+    logging.disable(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+@contextmanager
+def timer(results: Dict[str, Any], key: str = "seconds"):
+    """Record the wall time of the block in `results[key]`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[key] = round(time.perf_counter() - start, 4)
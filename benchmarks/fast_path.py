@@ -0,0 +1,52 @@
+"""Benchmark the fast path graph profile.
+
+Runs the graph up to the first draft against the fake services, whose client
+takes a fixed latency per call plus latencies per prompt and generated token,
+with the standard profile (research synthesis, then draft) and the fast path
+profile (draft straight from compact raw sources). Reports the time to the
+first draft, the LLM calls and the tokens used by each.
+
+Usage:
+    python -m benchmarks.fast_path
+"""
+
+from agent.graph import create_agent, get_thread_config
+from services.fakes import FakeOpenAIClient, use_fake_services
+from benchmarks.common import print_table, quiet_logging, timer
+
+# Seconds per call, per generated token and per prompt token of the fake client
+CALL_LATENCY = 0.3
+TOKEN_LATENCY = 0.002
+PROMPT_TOKEN_LATENCY = 0.0001
+
+# Sentences per section of the fake articles, so drafts are a realistic length
+SENTENCES = 12
+
+def run(profile: str):
+    graph, thread_id = create_agent({"profile": profile})
+    config = get_thread_config(thread_id)
+    client = FakeOpenAIClient(
+        latency=CALL_LATENCY, latency_per_token=TOKEN_LATENCY,
+        latency_per_prompt_token=PROMPT_TOKEN_LATENCY, sentences=SENTENCES
+    )
+
+    row = {"profile": profile}
+    with use_fake_services(client), timer(row, "first_draft_s"):
+        list(graph.stream({"topic": "content marketing"}, config=config))
+
+    state = graph.get_state(config).values
+    row.update({
+        "llm_calls": len(client.calls),
+        "prompt_tokens": state["token_usage"]["prompt_tokens"],
+        "completion_tokens": state["token_usage"]["completion_tokens"],
+        "total_tokens": state["token_usage"]["total_tokens"]
+    })
+    return row
+
+def main():
+    with quiet_logging():
+        rows = [run("standard"), run("fast_path")]
+    print_table("Time to first draft: standard vs fast path profile", rows)
+
+if __name__ == "__main__":
+    main()
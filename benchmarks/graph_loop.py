@@ -0,0 +1,129 @@
+"""Benchmark supersteps and checkpoint bytes per editing cycle.
+
+Compares the previous control loop, where a no-op `router` node routed back to
+itself, with the interrupt-driven `await_editor_action` wait state. Both graphs
+run against the fake services, so only graph overhead is measured.
+
+Usage:
+    python -m benchmarks.graph_loop
+"""
+
+import time
+import uuid
+
+from langgraph.graph import StateGraph
+from langgraph.constants import START, END
+from langgraph.types import Command
+
+from agent.graph import create_agent, get_thread_config
+from agent.state import State, FeedbackType
+from agent.nodes import (
+    conduct_research,
+    write_draft,
+    process_human_feedback,
+    generate_persona_feedback,
+    update_draft,
+    finalize_draft
+)
+from services.fakes import use_fake_services
+from benchmarks.common import CountingSaver, print_table, quiet_logging
+
+# Seconds an idle session is observed for
+IDLE_SECONDS = 0.5
+
+def build_router_graph(checkpointer):
+    """Rebuild the previous router-based topology for comparison."""
+    def to_human(state):
+        return "get_human_feedback" if state["feedback_type"] == FeedbackType.HUMAN else "router"
+
+    def to_persona(state):
+        return "get_persona_feedback" if state["feedback_type"] == FeedbackType.PERSONA else "router"
+
+    def to_update(state):
+        if state["feedback_type"] == FeedbackType.NONE and "final_article" not in state:
+            return "finalize_draft"
+        if state["feedback_type"] == FeedbackType.HUMAN and "human_feedback" in state:
+            return "update_draft_human"
+        if state["feedback_type"] == FeedbackType.PERSONA and state.get("selected_persona_suggestions"):
+            return "update_draft_persona"
+        return "router"
+
+    builder = StateGraph(State)
+    builder.add_node("conduct_research", conduct_research)
+    builder.add_node("write_draft", write_draft)
+    builder.add_node("get_human_feedback", process_human_feedback)
+    builder.add_node("get_persona_feedback", generate_persona_feedback)
+    builder.add_node("update_draft_human", lambda state: update_draft(state, FeedbackType.HUMAN))
+    builder.add_node("update_draft_persona", lambda state: update_draft(state, FeedbackType.PERSONA))
+    builder.add_node("finalize_draft", finalize_draft)
+    builder.add_node("router", lambda state: state)
+
+    builder.add_edge(START, "conduct_research")
+    builder.add_edge("conduct_research", "write_draft")
+    builder.add_edge("write_draft", "router")
+    builder.add_conditional_edges("router", to_human, ["get_human_feedback", "router"])
+    builder.add_conditional_edges("router", to_persona, ["get_persona_feedback", "router"])
+    builder.add_conditional_edges(
+        "router", to_update, ["update_draft_human", "update_draft_persona", "finalize_draft", "router"]
+    )
+    for node in ["update_draft_human", "update_draft_persona", "get_human_feedback", "get_persona_feedback"]:
+        builder.add_edge(node, "router")
+    builder.add_edge("finalize_draft", END)
+
+    return builder.compile(checkpointer=checkpointer)
+
+def run_until_stopped(graph, payload, config) -> str:
+    """Stream the graph until it pauses, finishes or fails, and describe the outcome."""
+    try:
+        for chunk in graph.stream(payload, config=config):
+            if "__interrupt__" in chunk:
+                return "interrupted"
+        return "finished"
+    except Exception as e:
+        return type(e).__name__
+
+def measure(saver, label, phase, action):
+    """Run an action and return the counters it produced."""
+    saver.reset()
+    start = time.perf_counter()
+    outcome = action()
+    elapsed = time.perf_counter() - start
+    return {"graph": label, "phase": phase, "outcome": outcome, **saver.snapshot(), "seconds": round(elapsed, 3)}
+
+def benchmark_router_graph():
+    saver = CountingSaver()
+    graph = build_router_graph(saver)
+    config = get_thread_config(str(uuid.uuid4()))
+
+    # This graph never pauses after a draft, so there is no idle phase to measure
+    rows = [measure(saver, "router", "first draft", lambda: run_until_stopped(graph, {"topic": "seo"}, config))]
+
+    # The previous UI requested feedback by sending new input to the thread
+    rows.append(measure(
+        saver, "router", "editing cycle",
+        lambda: run_until_stopped(graph, {"topic": "seo", "feedback_type": FeedbackType.HUMAN}, config)
+    ))
+    return rows
+
+def benchmark_wait_state_graph():
+    saver = CountingSaver()
+    graph, thread_id = create_agent(checkpointer=saver)
+    config = get_thread_config(thread_id)
+
+    rows = [measure(saver, "await_editor_action", "first draft", lambda: run_until_stopped(graph, {"topic": "seo"}, config))]
+    rows.append(measure(saver, "await_editor_action", "idle", lambda: time.sleep(IDLE_SECONDS) or "idle"))
+
+    def editing_cycle():
+        run_until_stopped(graph, Command(resume=FeedbackType.HUMAN), config)
+        return run_until_stopped(graph, Command(resume="Add a customer example."), config)
+
+    rows.append(measure(saver, "await_editor_action", "editing cycle", editing_cycle))
+    return rows
+
+def main():
+    with quiet_logging(), use_fake_services():
+        rows = benchmark_router_graph() + benchmark_wait_state_graph()
+    print_table("Supersteps and checkpoint bytes per phase", rows)
+
+if __name__ == "__main__":
+    main()
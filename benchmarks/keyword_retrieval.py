@@ -0,0 +1,88 @@
+"""Benchmark hybrid (vector + BM25) retrieval against library size.
+
+Fills an in-memory library (embedded with the fake hashed bag-of-words
+function) with documents that each mention one product code among common
+marketing words, then looks the codes up with queries that mix the code
+with a few common words, the way editors search. Reports the median query
+latency of the BM25 index, the vector search and the fused hybrid query,
+and how often the document with the code is in the top 5 for each.
+
+Usage:
+    python -m benchmarks.keyword_retrieval
+"""
+
+import random
+import statistics
+import time
+
+from services.fakes import HashedEmbeddingFunction
+from services.vector_db import VectorDBClient, query_vector_db
+from benchmarks.common import print_table, quiet_logging
+from benchmarks.vector_retrieval import WORDS, BATCH_SIZE
+
+# Library sizes and lookups per measurement
+SIZES = [1000, 5000, 20000]
+QUERIES = 50
+TOP = 5
+
+def make_library(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    documents, metadatas = [], []
+    for i in range(size):
+        words = rng.choices(WORDS, k=40)
+        words.insert(rng.randrange(len(words)), f"PX-{i:05d}")
+        documents.append(" ".join(words))
+        metadatas.append({"title": f"Document {i}", "code": f"PX-{i:05d}"})
+    return documents, metadatas
+
+def measure(search, queries):
+    latencies, hits = [], 0
+    for code, query in queries:
+        start = time.perf_counter()
+        results = search(query)
+        latencies.append(time.perf_counter() - start)
+        hits += any(result["metadata"].get("code") == code for result in results[:TOP])
+    return round(statistics.median(latencies) * 1000, 2), f"{hits / len(queries):.0%}"
+
+def run(size: int):
+    documents, metadatas = make_library(size)
+    library = VectorDBClient.open(
+        None, {"collection": f"keywords-{size}", "max_distance": None, "hybrid": {"enabled": True, "candidates": 20}},
+        HashedEmbeddingFunction()
+    )
+    for start in range(0, size, BATCH_SIZE):
+        library.add_documents(documents[start:start + BATCH_SIZE], metadatas[start:start + BATCH_SIZE])
+
+    rng = random.Random(11)
+    queries = []
+    for i in rng.sample(range(size), QUERIES):
+        queries.append((f"PX-{i:05d}", f"PX-{i:05d} " + " ".join(rng.choices(WORDS, k=3))))
+
+    saved = VectorDBClient._instance
+    VectorDBClient._instance = library
+    try:
+        # Warm up the indexes before timing
+        query_vector_db("content marketing", n_results=TOP)
+        keyword_ms, keyword_hits = measure(lambda query: library.keyword_query(query, n_results=TOP), queries)
+        vector_ms, vector_hits = measure(lambda query: library.query(query, n_results=TOP), queries)
+        hybrid_ms, hybrid_hits = measure(lambda query: query_vector_db(query, n_results=TOP), queries)
+    finally:
+        VectorDBClient._instance = saved
+
+    return {
+        "documents": size,
+        "bm25_ms": keyword_ms,
+        "vector_ms": vector_ms,
+        "hybrid_ms": hybrid_ms,
+        f"bm25_hit@{TOP}": keyword_hits,
+        f"vector_hit@{TOP}": vector_hits,
+        f"hybrid_hit@{TOP}": hybrid_hits
+    }
+
+def main():
+    with quiet_logging():
+        rows = [run(size) for size in SIZES]
+    print_table(f"Product code lookups: latency and hit rate by library size ({QUERIES} queries)", rows)
+
+if __name__ == "__main__":
+    main()
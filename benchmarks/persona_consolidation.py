@@ -0,0 +1,103 @@
+"""Benchmark consolidating persona suggestions before the update call.
+
+Five personas review the same draft and, as reviewers do, repeat each
+other's advice in different words. The draft update is run against the fake
+services (with a latency per prompt token for the prefill) once with the
+suggestions joined as they were given and once consolidated, and the update
+prompt size and latency are reported for both.
+
+Usage:
+    python -m benchmarks.persona_consolidation
+"""
+
+import time
+
+from agent.consolidation import consolidate_suggestions, format_consolidated, format_raw
+from config import load_guide
+from prompts import load_prompt, load_system_prompt
+from services.fakes import FakeOpenAIClient, estimate_tokens, fake_article, use_fake_services
+from services.llm import get_completion
+from benchmarks.common import print_table, quiet_logging, timer
+
+# Seconds per call, per generated token and per prompt token of the fake client
+CALL_LATENCY = 0.2
+TOKEN_LATENCY = 0.001
+PROMPT_TOKEN_LATENCY = 0.0002
+
+SUGGESTIONS = [
+    {"persona": "SEO Specialist", "suggestion": "\n".join([
+        "1. Include the main keyword in the title and the first paragraph.",
+        "2. Add internal links to related articles.",
+        "3. Use the main keyword in at least two H2 headings.",
+        "4. End with a clear call-to-action."
+    ])},
+    {"persona": "Industry Expert", "suggestion": "\n".join([
+        "1. Cite the source of the statistic in the introduction.",
+        "2. Add a recent case study to the second section.",
+        "3. Open the introduction with a statistic to hook readers.",
+        "4. Explain the limitations of the approach in the third section."
+    ])},
+    {"persona": "Target Reader", "suggestion": "\n".join([
+        "1. Add a statistic to the introduction to hook the reader.",
+        "2. Shorten the second section and add a bulleted list.",
+        "3. End with a clear call-to-action that tells me what to do next."
+    ])},
+    {"persona": "Content Editor", "suggestion": "\n".join([
+        "1. Shorten the second section and add a bulleted list.",
+        "2. Add a bulleted list to the second section.",
+        "3. Vary sentence length in the conclusion.",
+        "4. Add transitions between the sections."
+    ])},
+    {"persona": "Conversion Specialist", "suggestion": "\n".join([
+        "1. End with a clear call-to-action.",
+        "2. Add a clear call-to-action at the end of the article.",
+        "3. Add internal links to related articles and product pages."
+    ])}
+]
+
+def run(consolidate: bool):
+    row = {"mode": "consolidated" if consolidate else "raw"}
+    with timer(row, "consolidate_s"):
+        if consolidate:
+            items = consolidate_suggestions(SUGGESTIONS)
+            feedback = format_consolidated(items)
+        else:
+            items = [item for suggestion in SUGGESTIONS for item in suggestion["suggestion"].splitlines()]
+            feedback = format_raw(SUGGESTIONS)
+
+    client = FakeOpenAIClient(
+        latency=CALL_LATENCY, latency_per_token=TOKEN_LATENCY,
+        latency_per_prompt_token=PROMPT_TOKEN_LATENCY, sentences=12
+    )
+    with use_fake_services(client):
+        start = time.perf_counter()
+        get_completion(
+            load_prompt("update.yaml"),
+            {
+                "topic": "content marketing",
+                "current_draft": fake_article("content marketing", sentences=12),
+                "feedback": feedback,
+                "feedback_type": "persona",
+                "tone_of_voice": load_guide("tone_of_voice.yaml"),
+                "content_structure": load_guide("content_structure.yaml")
+            },
+            system_template=load_system_prompt("update.yaml"),
+            node="update_draft"
+        )
+        update_latency = time.perf_counter() - start
+
+    row.update({
+        "items": len(items),
+        "feedback_tokens": estimate_tokens(feedback),
+        "prompt_tokens": estimate_tokens(client.calls[0]["prompt"]),
+        "update_latency_s": round(update_latency, 3)
+    })
+    return row
+
+def main():
+    with quiet_logging():
+        rows = [run(False), run(True)]
+    print_table("Update prompt with raw vs consolidated persona suggestions", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark panel persona reviews against one review per persona.
+
+Five personas review a full-length draft against the fake services, whose
+client takes a fixed latency per call plus latencies per prompt and generated
+token. Per persona, the draft is sent once per review, as the persona node
+does by default; as a panel, one completion reviews the draft from all five
+personas and answers with bounded JSON. Reports the calls, prompt and
+completion tokens, the latency and the output tokens per persona of each.
+
+Usage:
+    python -m benchmarks.persona_reviews
+"""
+
+from agent.personas import load_personas, review_draft, review_draft_panel
+from services.fakes import FakeOpenAIClient, estimate_tokens, fake_article, use_fake_services
+from services.llm import track_usage
+from benchmarks.common import print_table, quiet_logging, timer
+
+# Seconds per call, per generated token and per prompt token of the fake client
+CALL_LATENCY = 0.3
+TOKEN_LATENCY = 0.002
+PROMPT_TOKEN_LATENCY = 0.0001
+
+TOPIC = "content marketing"
+
+def run(mode: str, personas, draft: str):
+    client = FakeOpenAIClient(
+        latency=CALL_LATENCY, latency_per_token=TOKEN_LATENCY, latency_per_prompt_token=PROMPT_TOKEN_LATENCY
+    )
+    row = {"mode": mode, "personas": len(personas)}
+    with use_fake_services(client), track_usage() as usage, timer(row, "latency_s"):
+        if mode == "panel":
+            suggestions = review_draft_panel(personas, draft, TOPIC)
+        else:
+            suggestions = [review_draft(persona, draft, TOPIC) for persona in personas]
+
+    output = [estimate_tokens(suggestion["suggestion"]) for suggestion in suggestions]
+    row.update({
+        "calls": usage["calls"],
+        "prompt_tokens": usage["prompt_tokens"],
+        "completion_tokens": usage["completion_tokens"],
+        "output_tokens_min": min(output),
+        "output_tokens_max": max(output)
+    })
+    return row
+
+def main():
+    personas = load_personas()[0]
+    draft = fake_article(TOPIC, sections=5, sentences=12)
+    with quiet_logging():
+        rows = [run("per_persona", personas, draft), run("panel", personas, draft)]
+    print_table(f"Persona reviews of a {estimate_tokens(draft)} token draft: per persona vs panel", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark near-duplicate suppression of research results.
+
+Builds a research run of search results and library chunks in which some
+articles are syndicated copies of others (with a changed sentence or two)
+and some library chunks repeat search results, then reports how many
+results MinHash/LSH deduplication drops, the tokens removed from the
+synthesis input and the time per result.
+
+Usage:
+    python -m benchmarks.research_dedupe
+"""
+
+import random
+import time
+
+from services.dedupe import MinHasher, dedupe_results, estimate_tokens, DEFAULT_THRESHOLD
+from benchmarks.common import print_table
+
+# Distinct articles, syndicated copies among them, and library chunks repeating them
+ARTICLES = 40
+COPIES = 15
+LIBRARY_REPEATS = 5
+
+# Words per article
+ARTICLE_WORDS = 250
+
+VOCABULARY = [f"term{i}" for i in range(5000)]
+
+def article(generator: random.Random) -> str:
+    return " ".join(generator.choice(VOCABULARY) for _ in range(ARTICLE_WORDS)) + "."
+
+def syndicate(text: str, generator: random.Random) -> str:
+    """A syndicated copy: the same article with a couple of words changed."""
+    words = text.split()
+    for _ in range(2):
+        words[generator.randrange(len(words))] = generator.choice(VOCABULARY)
+    return "Originally published elsewhere. " + " ".join(words)
+
+def build_results():
+    generator = random.Random(7)
+    texts = [article(generator) for _ in range(ARTICLES)]
+    results = [
+        {"title": f"Article {i}", "body": text, "url": f"https://example.com/{i}", "source": "internet_search"}
+        for i, text in enumerate(texts)
+    ]
+    results += [
+        {"title": f"Copy of article {i}", "body": syndicate(texts[i], generator),
+         "url": f"https://partner.example.org/{i}", "source": "internet_search"}
+        for i in generator.sample(range(ARTICLES), COPIES)
+    ]
+    results += [
+        {"title": f"Library chunk {i}", "body": texts[i], "source": "vector_db"}
+        for i in generator.sample(range(ARTICLES), LIBRARY_REPEATS)
+    ]
+    return results
+
+def main():
+    results = build_results()
+    hasher = MinHasher()
+    dedupe_results(results[:5], DEFAULT_THRESHOLD, hasher)  # warm up
+
+    rows = []
+    for threshold in (0.5, DEFAULT_THRESHOLD, 0.95):
+        start = time.perf_counter()
+        kept, report = dedupe_results(results, threshold, hasher)
+        elapsed = time.perf_counter() - start
+        rows.append({
+            "threshold": threshold,
+            "results": report["results"],
+            "duplicates": report["duplicates"],
+            "tokens_before": estimate_tokens(str(results)),
+            "tokens_after": estimate_tokens(str(kept)),
+            "tokens_removed": report["tokens_removed"],
+            "us_per_result": round(elapsed / len(results) * 1e6, 1)
+        })
+
+    print_table(f"Near-duplicate suppression ({COPIES + LIBRARY_REPEATS} planted duplicates)", rows)
+
+if __name__ == "__main__":
+    main()
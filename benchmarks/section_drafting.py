@@ -0,0 +1,50 @@
+"""Benchmark outline-first, section-parallel drafting.
+
+Writes the first draft against the fake services, whose client takes a fixed
+latency per call plus a latency per generated token (like a real model
+decoding), once in a single completion and once from an outline with the
+sections written in parallel. Reports the wall time, LLM calls and tokens of
+each mode.
+
+Usage:
+    python -m benchmarks.section_drafting
+"""
+
+from agent.nodes import write_draft
+from agent.budget import with_token_accounting
+from services.fakes import FakeOpenAIClient, use_fake_services
+from benchmarks.common import print_table, quiet_logging, timer
+
+# Seconds per call and per generated token of the fake client
+CALL_LATENCY = 0.3
+TOKEN_LATENCY = 0.002
+
+# Sentences per section of the fake articles, so drafts are a realistic length
+SENTENCES = 20
+
+RESEARCH = "\n".join(f"- Key finding {i} about content marketing, with its source." for i in range(1, 13))
+
+def run(sections: bool):
+    client = FakeOpenAIClient(latency=CALL_LATENCY, latency_per_token=TOKEN_LATENCY, sentences=SENTENCES)
+    state = {"topic": "content marketing", "combined_research": RESEARCH}
+    row = {"mode": "sections" if sections else "single shot"}
+
+    with use_fake_services(client), timer(row, "seconds"):
+        update = with_token_accounting(write_draft)(state, sections)
+
+    row.update({
+        "llm_calls": len(client.calls),
+        "completion_tokens": update["token_usage"]["completion_tokens"],
+        "total_tokens": update["token_usage"]["total_tokens"],
+        "draft_chars": len(update["draft"])
+    })
+    return row
+
+def main():
+    with quiet_logging():
+        rows = [run(False), run(True)]
+    rows[1]["speedup"] = round(rows[0]["seconds"] / rows[1]["seconds"], 2)
+    print_table("First draft latency: single completion vs outline + parallel sections", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark speculative persona reviews.
+
+Simulates an editing session against the fake services with a fixed latency
+per LLM call and some editor "think time" between steps, and reports how long
+the editor waits for persona feedback with and without speculative reviews,
+along with the speculation hit rate and wasted calls.
+
+Session: first draft -> human feedback round -> persona feedback round -> finalize.
+
+Usage:
+    python -m benchmarks.speculative_reviews
+"""
+
+import time
+
+from langgraph.types import Command
+
+import agent.speculative as speculative
+from agent.graph import create_agent, get_thread_config
+from agent.state import FeedbackType
+from services.fakes import FakeOpenAIClient, use_fake_services
+from benchmarks.common import print_table, quiet_logging
+
+# Seconds per fake LLM call
+CALL_LATENCY = 0.2
+
+# Seconds the editor spends reading each draft before choosing an action
+THINK_TIME = 1.0
+
+def run_session(speculate: bool):
+    speculative._reviewer = None
+    graph, thread_id = create_agent({"speculative_reviews": speculate})
+    config = get_thread_config(thread_id)
+
+    def run(payload):
+        return list(graph.stream(payload, config=config))
+
+    with use_fake_services(FakeOpenAIClient(latency=CALL_LATENCY)) as client:
+        run({"topic": "content marketing"})
+        time.sleep(THINK_TIME)
+
+        # A human feedback round replaces the first version
+        run(Command(resume=FeedbackType.HUMAN))
+        run(Command(resume="Make the introduction shorter."))
+        time.sleep(THINK_TIME)
+
+        # The editor asks for persona feedback and waits for the suggestions
+        start = time.perf_counter()
+        chunks = run(Command(resume=FeedbackType.PERSONA))
+        wait = time.perf_counter() - start
+
+        suggestions = chunks[-1]["__interrupt__"][0].value["suggestions"]
+        run(Command(resume=[suggestions[0]["persona"]]))
+        time.sleep(THINK_TIME)
+
+        run(Command(resume=FeedbackType.NONE))
+        calls = len(client.calls)
+
+    row = {
+        "mode": "speculative" if speculate else "on demand",
+        "persona_wait_s": round(wait, 3),
+        "llm_calls": calls
+    }
+    if speculate:
+        report = speculative.get_speculative_reviewer().report()
+        row.update({
+            "hit_rate": report["hit_rate"],
+            "reviews_used": report["used"],
+            "wasted_calls": report["wasted"],
+            "cancelled": report["cancelled"]
+        })
+    return row
+
+def main():
+    with quiet_logging():
+        rows = [run_session(False), run_session(True)]
+    print_table("Persona feedback wait with and without speculative reviews", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark the per-node cost of tracing against the old debug state dumps.
+
+Times one node step (the node call plus one LLM prompt) on states with
+drafts of growing size:
+
+- before: what the removed `debug_helpers.log_state` and the prompt
+  `logger.debug` f-string cost with debug logging off (both serialised the
+  state and prompt on every call regardless of the log level)
+- bare: the node with no instrumentation at all
+- off: the node wrapped by `with_tracing`, with a traced prompt span, tracing off
+- sampled: the same with 10% of node runs traced
+- on: the same with every node run traced
+
+Usage:
+    python -m benchmarks.tracing_overhead
+"""
+
+import json
+import logging
+import timeit
+
+from services.tracing import with_tracing, tracer
+from benchmarks.common import print_table, quiet_logging
+
+# Draft sizes in characters and timed calls per measurement
+DRAFT_SIZES = [2_000, 20_000, 100_000]
+CALLS = 2000
+
+legacy_logger = logging.getLogger("debug")
+
+def legacy_log_state(state, location):
+    """The removed debug_helpers.log_state, as it was."""
+    serializable_state = {}
+    for key, value in state.items():
+        try:
+            json.dumps(value)
+            serializable_state[key] = value
+        except (TypeError, OverflowError):
+            serializable_state[key] = str(value)
+    legacy_logger.debug(f"STATE AT {location}: {json.dumps(serializable_state, indent=2)}")
+
+def make_state(size: int):
+    draft = ("Content marketing builds trust with readers. " * (size // 45 + 1))[:size]
+    return {
+        "topic": "content marketing",
+        "draft": draft,
+        "draft_version": 3,
+        "combined_research": draft[: size // 2],
+        "persona_suggestions": [{"persona": f"Persona {i}", "suggestions": draft[:500]} for i in range(4)]
+    }
+
+def node(state):
+    prompt = f"Update the draft.\n\n{state['draft']}"
+    with tracer.span("completion", node="update_draft", prompt=prompt):
+        pass
+    return {"draft": state["draft"], "draft_version": state["draft_version"] + 1}
+
+def legacy_node(state):
+    legacy_log_state(state, "update_draft")
+    prompt = f"Update the draft.\n\n{state['draft']}"
+    legacy_logger.debug(f"Formatted prompt: {prompt}")
+    return {"draft": state["draft"], "draft_version": state["draft_version"] + 1}
+
+def bare_node(state):
+    prompt = f"Update the draft.\n\n{state['draft']}"
+    return {"draft": state["draft"], "draft_version": state["draft_version"] + 1, "prompt": len(prompt)}
+
+def per_call_us(function, state) -> float:
+    return round(min(timeit.repeat(lambda: function(state), number=CALLS, repeat=3)) / CALLS * 1e6, 2)
+
+def run(size: int):
+    state = make_state(size)
+    traced = with_tracing(node, "update_draft")
+    row = {"draft_chars": size, "before_us": per_call_us(legacy_node, state), "bare_us": per_call_us(bare_node, state)}
+    for label, rate in [("off_us", 0), ("sampled_10pct_us", 0.1), ("on_us", 1.0)]:
+        tracer.configure(sample_rate=rate)
+        row[label] = per_call_us(traced, state)
+    tracer.configure(sample_rate=0)
+    return row
+
+def main():
+    with quiet_logging():
+        rows = [run(size) for size in DRAFT_SIZES]
+    print_table(f"Per node step cost in microseconds ({CALLS} calls)", rows)
+
+if __name__ == "__main__":
+    main()
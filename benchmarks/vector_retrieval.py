@@ -0,0 +1,87 @@
+"""Benchmark content library retrieval against library size.
+
+Fills an in-memory ChromaDB library (embedded with the fake hashed
+bag-of-words function, so no model is needed) with documents spread over
+several verticals, then times queries over the whole collection, with a
+metadata filter, across per-vertical shards merged in parallel, and on a
+single shard picked by the filter.
+
+Usage:
+    python -m benchmarks.vector_retrieval
+"""
+
+import random
+import statistics
+import time
+
+from services.fakes import HashedEmbeddingFunction
+from services.vector_db import VectorDBClient
+from benchmarks.common import print_table, quiet_logging
+
+# Library sizes, verticals and queries per measurement
+SIZES = [1000, 5000, 20000]
+VERTICALS = ["seo", "email", "social", "video", "ecommerce", "saas", "health", "finance"]
+QUERIES = 50
+
+# Documents added per call
+BATCH_SIZE = 1000
+
+WORDS = (
+    "content marketing audience search ranking keywords headline newsletter subscribers campaign "
+    "conversion funnel video channel brand story product customers retention pricing analytics "
+    "engagement social posts community editorial calendar guide tutorial checklist strategy growth"
+).split()
+
+def make_library(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    documents, metadatas = [], []
+    for i in range(size):
+        vertical = VERTICALS[i % len(VERTICALS)]
+        words = rng.choices(WORDS, k=40) + [vertical] * 3
+        documents.append(" ".join(words))
+        metadatas.append({"title": f"Document {i}", "vertical": vertical, "year": 2018 + i % 7})
+    return documents, metadatas
+
+def fill(client: VectorDBClient, documents, metadatas) -> None:
+    for start in range(0, len(documents), BATCH_SIZE):
+        client.add_documents(documents[start:start + BATCH_SIZE], metadatas[start:start + BATCH_SIZE])
+
+def time_queries(client: VectorDBClient, where=None) -> float:
+    rng = random.Random(11)
+    # Warm up the index before timing
+    client.query("content marketing", where=where)
+    latencies = []
+    for _ in range(QUERIES):
+        query = " ".join(rng.choices(WORDS, k=5))
+        start = time.perf_counter()
+        client.query(query, where=where, max_distance=float("inf"))
+        latencies.append(time.perf_counter() - start)
+    return round(statistics.median(latencies) * 1000, 2)
+
+def run(size: int):
+    documents, metadatas = make_library(size)
+    embedding_function = HashedEmbeddingFunction()
+    vertical = {"vertical": "seo"}
+
+    single = VectorDBClient.open(None, {"collection": f"library-{size}"}, embedding_function)
+    fill(single, documents, metadatas)
+    sharded = VectorDBClient.open(
+        None, {"collection": f"sharded-{size}", "sharding": {"enabled": True, "field": "vertical"}}, embedding_function
+    )
+    fill(sharded, documents, metadatas)
+
+    return {
+        "documents": size,
+        "whole_ms": time_queries(single),
+        "filtered_ms": time_queries(single, vertical),
+        "all_shards_ms": time_queries(sharded),
+        "one_shard_ms": time_queries(sharded, vertical)
+    }
+
+def main():
+    with quiet_logging():
+        rows = [run(size) for size in SIZES]
+    print_table(f"Median query latency by library size ({len(VERTICALS)} verticals, {QUERIES} queries)", rows)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import yaml
 import logging
+from functools import lru_cache
 from typing import Dict, Any, List
 
 # Configure logging
@@ -38,4 +39,31 @@ def load_config(filename: str) -> Any:
         return data
     except Exception as e:
         logger.error(f"Error loading config {filename}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+@lru_cache(maxsize=None)
+def load_guide(filename: str) -> str:
+    """Load a Markdown guide (such as the tone of voice guide) as raw text.
+    
+    The guides are written as Markdown rather than structured YAML, so they are
+    read verbatim for use in prompts. The text is cached, which also keeps the
+    prompt prefix identical from call to call.
+    
+    Args:
+        filename: The name of the guide file to load
+        
+    Returns:
+        guide: The text of the guide
+    """
+    try:
+        # Make sure the filename has a .yaml extension
+        if not filename.endswith(".yaml"):
+            filename = f"{filename}.yaml"
+        
+        filepath = os.path.join(CONFIG_DIR, filename)
+        
+        with open(filepath, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except Exception as e:
+        logger.error(f"Error loading guide {filename}: {str(e)}")
+        raise
@@ -1,7 +1,7 @@
 import os
 import yaml
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -10,6 +10,23 @@ logger = logging.getLogger(__name__)
 # Prompt templates directory
 PROMPTS_DIR = os.path.dirname(os.path.abspath(__file__))
 
+def _load_prompt_file(filename: str) -> Dict[str, Any]:
+    """Load the YAML data of a prompt file."""
+    # Make sure the filename has a .yaml extension
+    if not filename.endswith(".yaml"):
+        filename = f"{filename}.yaml"
+    
+    # Construct the full file path
+    filepath = os.path.join(PROMPTS_DIR, filename)
+    
+    # Check if the file exists
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Prompt file not found: {filepath}")
+    
+    # Load the YAML file
+    with open(filepath, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
 def load_prompt(filename: str) -> str:
     """Load a prompt template from a YAML file.
     
@@ -20,20 +37,7 @@ def load_prompt(filename: str) -> str:
         prompt: The prompt template
     """
     try:
-        # Make sure the filename has a .yaml extension
-        if not filename.endswith(".yaml"):
-            filename = f"{filename}.yaml"
-        
-        # Construct the full file path
-        filepath = os.path.join(PROMPTS_DIR, filename)
-        
-        # Check if the file exists
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"Prompt file not found: {filepath}")
-        
-        # Load the YAML file
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        data = _load_prompt_file(filename)
         
         # Extract the prompt template
         if "prompt" not in data:
@@ -44,4 +48,23 @@ def load_prompt(filename: str) -> str:
         return prompt
     except Exception as e:
         logger.error(f"Error loading prompt {filename}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def load_system_prompt(filename: str) -> Optional[str]:
+    """Load the static system prompt from a YAML prompt file.
+    
+    The system prompt holds the parts of a prompt that are the same for every
+    call (instructions and guides). It is sent first so the provider can reuse
+    its cached prefix across calls.
+    
+    Args:
+        filename: The name of the YAML file to load
+        
+    Returns:
+        system: The system prompt template, or None if the file has none
+    """
+    try:
+        return _load_prompt_file(filename).get("system")
+    except Exception as e:
+        logger.error(f"Error loading system prompt {filename}: {str(e)}")
+        raise
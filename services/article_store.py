@@ -0,0 +1,464 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Default directory of the article files and their index
+DEFAULT_DIRECTORY = "saved_articles"
+INDEX_FILE = "index.db"
+
+# Finalised articles written to the content library per call, and the longest
+# an article waits for a batch to fill
+LIBRARY_BATCH_SIZE = 16
+LIBRARY_FLUSH_INTERVAL = 2.0
+
+# Longest topic part of an article's file name
+MAX_SLUG_CHARS = 80
+
+def article_title(content: str, topic: str) -> str:
+    """The article's level-one heading, or its topic if it has none."""
+    match = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
+    return match.group(1).strip() if match else topic
+
+def slugify(topic: str) -> str:
+    """A file-name-safe version of a topic."""
+    slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")
+    return slug[:MAX_SLUG_CHARS].rstrip("-") or "article"
+
+def library_document_id(article: Dict[str, Any]) -> str:
+    """The content library ID of an article: one per thread, so a re-finalised article replaces its earlier version."""
+    return f"article-{article['thread_id'] or article['content_hash'][:16]}"
+
+class LibraryWriter:
+    """Writes finalised articles to the content library from a background thread.
+
+    Articles are queued by `submit` and added in batches of up to
+    `batch_size`, waiting at most `flush_interval` seconds for a batch to
+    fill, so saving an article never waits for the embedding model.
+    """
+
+    def __init__(
+        self,
+        library: Optional[Any] = None,
+        batch_size: int = LIBRARY_BATCH_SIZE,
+        flush_interval: float = LIBRARY_FLUSH_INTERVAL
+    ):
+        """
+        Args:
+            library: Object with an `add_documents(documents, metadatas, ids)`
+                method (defaults to the shared VectorDBClient, opened on the
+                writer thread when the first batch is written)
+            batch_size: Maximum articles per write
+            flush_interval: Seconds to wait for more articles before writing a batch
+        """
+        self.library = library
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {"batches": 0, "documents": 0, "errors": 0}
+        self._queue: List[Dict[str, Any]] = []
+        self._in_flight = 0
+        self._flushing = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="library-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, document_id: str, text: str, metadata: Dict[str, Any], on_written: Optional[Callable[[], None]] = None) -> None:
+        """Queue a document to be added (or replaced) in the library.
+
+        Args:
+            document_id: The library ID of the document
+            text: The document text
+            metadata: Metadata for the document
+            on_written: Called once the document has been written
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The library writer is closed")
+            self._queue.append({"id": document_id, "text": text, "metadata": metadata, "on_written": on_written})
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write the queued documents now and wait for them.
+
+        Returns:
+            done: False if the timeout passed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self._queue or self._in_flight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self._flushing -= 1
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write the queued documents and stop the writer thread."""
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+
+                # Give the batch a moment to fill unless someone is flushing
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._queue) < self.batch_size and not (self._closed or self._flushing):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        break
+
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+                self._in_flight = len(batch)
+
+            self._write(batch)
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        # The same ID can be queued twice; the last version wins
+        latest = {item["id"]: item for item in batch}
+        try:
+            library = self.library
+            if library is None:
+                from services.vector_db import VectorDBClient
+                library = VectorDBClient()
+            library.add_documents(
+                [item["text"] for item in latest.values()],
+                [item["metadata"] for item in latest.values()],
+                list(latest)
+            )
+            self.stats["batches"] += 1
+            self.stats["documents"] += len(latest)
+            logger.info(f"Wrote {len(latest)} articles to the content library")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error writing articles to the content library: {str(e)}")
+            return
+
+        for item in batch:
+            if item["on_written"] is not None:
+                try:
+                    item["on_written"]()
+                except Exception as e:
+                    logger.warning(f"Error recording library write: {str(e)}")
+
+class ArticleStore:
+    """Versioned article files with a SQLite index.
+
+    Each saved version is written atomically to its own file, named after the
+    topic, version and content hash, so versions of topics with similar names
+    never overwrite each other. Saving content that is already stored returns
+    the existing article instead of a copy. The index records the topic,
+    version, thread, timestamps and token cost of every article, and a
+    full-text index over the titles, topics and content makes them searchable.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, library_writer: Optional[LibraryWriter] = None):
+        """
+        Args:
+            directory: Directory of the article files and the index
+            library_writer: Writer adding finalised articles to the content
+                library (None to keep them out of it)
+        """
+        self.directory = directory
+        self.library_writer = library_writer
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, INDEX_FILE), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    topic TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    thread_id TEXT,
+                    content_hash TEXT NOT NULL UNIQUE,
+                    path TEXT NOT NULL,
+                    words INTEGER NOT NULL,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    total_tokens INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    finalized_at REAL,
+                    indexed_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_topic ON articles (topic, version)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_thread ON articles (thread_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_created ON articles (created_at)")
+            try:
+                self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(title, topic, content)")
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: search falls back to the titles and topics
+                logger.warning("SQLite has no FTS5; article search only matches titles and topics")
+                self.full_text = False
+
+    def save(
+        self,
+        content: str,
+        topic: str,
+        version: Optional[int] = None,
+        thread_id: Optional[str] = None,
+        token_usage: Optional[Dict[str, int]] = None,
+        final: bool = False
+    ) -> Dict[str, Any]:
+        """Save a version of an article.
+
+        Args:
+            content: The Markdown article
+            topic: The article's topic
+            version: The draft version (defaults to the topic's next version)
+            thread_id: The graph thread that wrote the article
+            token_usage: The tokens used to write it ("prompt_tokens",
+                "completion_tokens" and "total_tokens")
+            final: Whether this is the finalised article, which is also added
+                to the content library
+
+        Returns:
+            article: The article's index record, with "duplicate" set if the
+                same content was already stored
+        """
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        usage = token_usage or {}
+        now = time.time()
+
+        with self._lock:
+            existing = self._conn.execute(
+                "SELECT * FROM articles WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if existing is not None:
+                article = {**dict(existing), "duplicate": True}
+                if final and article["finalized_at"] is None:
+                    with self._conn:
+                        self._conn.execute("UPDATE articles SET finalized_at = ? WHERE id = ?", (now, article["id"]))
+                    article["finalized_at"] = now
+                    self._add_to_library(article, content)
+                logger.info(f"Article already saved as {article['path']}")
+                return article
+
+            if version is None:
+                row = self._conn.execute("SELECT MAX(version) FROM articles WHERE topic = ?", (topic,)).fetchone()
+                version = (row[0] or 0) + 1
+
+            path = os.path.join(self.directory, f"{slugify(topic)}_v{version}_{content_hash[:8]}.md")
+            self._write_file(path, content)
+
+            title = article_title(content, topic)
+            try:
+                with self._conn:
+                    cursor = self._conn.execute(
+                        "INSERT INTO articles (topic, title, version, thread_id, content_hash, path, words, "
+                        "prompt_tokens, completion_tokens, total_tokens, created_at, finalized_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            topic, title, version, thread_id, content_hash, path, len(content.split()),
+                            usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                            usage.get("total_tokens", 0), now, now if final else None
+                        )
+                    )
+                    if self.full_text:
+                        self._conn.execute(
+                            "INSERT INTO articles_fts (rowid, title, topic, content) VALUES (?, ?, ?, ?)",
+                            (cursor.lastrowid, title, topic, content)
+                        )
+            except Exception:
+                os.unlink(path)
+                raise
+
+            article = dict(self._conn.execute(
+                "SELECT * FROM articles WHERE id = ?", (cursor.lastrowid,)
+            ).fetchone())
+            article["duplicate"] = False
+
+        if final:
+            self._add_to_library(article, content)
+        logger.info(f"Saved article version {version} to {path}")
+        return article
+
+    def get(self, article_id: int) -> Dict[str, Any]:
+        """Load an article with its content.
+
+        Raises:
+            KeyError: If there is no such article
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM articles WHERE id = ?", (article_id,)).fetchone()
+        if row is None:
+            raise KeyError(article_id)
+        article = dict(row)
+        with open(article["path"], encoding="utf-8") as f:
+            article["content"] = f.read()
+        return article
+
+    def list_articles(
+        self,
+        topic: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        final_only: bool = False,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """List saved articles, newest first, from the index alone.
+
+        Args:
+            topic: Only list versions of this topic
+            thread_id: Only list articles written by this thread
+            final_only: Only list finalised articles
+            limit: Maximum number of articles
+            offset: Number of articles to skip
+
+        Returns:
+            articles: The articles' index records
+        """
+        conditions, params = [], []
+        if topic is not None:
+            conditions.append("topic = ?")
+            params.append(topic)
+        if thread_id is not None:
+            conditions.append("thread_id = ?")
+            params.append(thread_id)
+        if final_only:
+            conditions.append("finalized_at IS NOT NULL")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM articles {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Find articles by their words, best matches first.
+
+        Args:
+            query: Words to look for in the titles, topics and content
+            limit: Maximum number of articles
+
+        Returns:
+            articles: The matching articles' index records, each with a
+                "snippet" of the matching text when full-text search is available
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+
+        with self._lock:
+            if self.full_text:
+                # Quote each word so FTS5 syntax in the query is taken literally
+                match = " ".join(f'"{word}"' for word in words)
+                rows = self._conn.execute(
+                    "SELECT a.*, snippet(articles_fts, 2, '', '', '...', 12) AS snippet "
+                    "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+                    "WHERE articles_fts MATCH ? ORDER BY bm25(articles_fts) LIMIT ?",
+                    (match, limit)
+                ).fetchall()
+            else:
+                conditions = " AND ".join("(title LIKE ? OR topic LIKE ?)" for _ in words)
+                params = [pattern for word in words for pattern in (f"%{word}%", f"%{word}%")]
+                rows = self._conn.execute(
+                    f"SELECT * FROM articles WHERE {conditions} ORDER BY created_at DESC LIMIT ?",
+                    (*params, limit)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def index_pending(self) -> int:
+        """Queue the finalised articles not yet in the content library (e.g. after a failed write).
+
+        Returns:
+            count: The number of articles queued
+        """
+        if self.library_writer is None:
+            return 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM articles WHERE finalized_at IS NOT NULL AND indexed_at IS NULL"
+            ).fetchall()
+        for row in rows:
+            article = dict(row)
+            with open(article["path"], encoding="utf-8") as f:
+                self._add_to_library(article, f.read())
+        return len(rows)
+
+    def _add_to_library(self, article: Dict[str, Any], content: str) -> None:
+        if self.library_writer is None:
+            return
+        metadata = {
+            "title": article["title"],
+            "topic": article["topic"],
+            "version": article["version"],
+            "source": "article_store",
+            "article_id": article["id"],
+            "created_at": int(article["created_at"])
+        }
+        if article["thread_id"]:
+            metadata["thread_id"] = article["thread_id"]
+        self.library_writer.submit(
+            library_document_id(article), content, metadata,
+            on_written=lambda: self._mark_indexed(article["id"])
+        )
+
+    def _mark_indexed(self, article_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE articles SET indexed_at = ? WHERE id = ?", (time.time(), article_id))
+
+    def _write_file(self, path: str, content: str) -> None:
+        # Write to a temporary file first so readers never see a partial article
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+# Stores opened by open_article_store, one per directory
+_stores: Dict[str, ArticleStore] = {}
+_stores_lock = threading.Lock()
+
+def open_article_store(directory: str = DEFAULT_DIRECTORY, index_library: bool = True) -> ArticleStore:
+    """Open (or reuse) the article store in a directory.
+
+    Args:
+        directory: Directory of the article files and the index
+        index_library: Add finalised articles to the content library in the background
+
+    Returns:
+        store: The article store
+    """
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = ArticleStore(directory, LibraryWriter() if index_library else None)
+            logger.info(f"Opened article store: {directory}")
+        return _stores[directory]
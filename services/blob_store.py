@@ -0,0 +1,180 @@
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Number of decoded values kept in memory per store
+DEFAULT_CACHE_SIZE = 64
+
+class BlobStore(ABC):
+    """Content-addressed store for JSON-serialisable values.
+
+    Values are saved once under the SHA-256 digest of their serialised form, so
+    storing an unchanged value again costs a hash and nothing else.
+    """
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def put(self, value: Any) -> str:
+        """Save a value and return its digest.
+
+        Args:
+            value: A JSON-serialisable value
+
+        Returns:
+            digest: The content digest ("sha256:<hex>")
+        """
+        data = json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        digest = "sha256:" + hashlib.sha256(data).hexdigest()
+        if not self._exists(digest):
+            self._write(digest, data)
+        self._remember(digest, value)
+        return digest
+
+    def get(self, digest: str) -> Any:
+        """Load the value saved under a digest.
+
+        Args:
+            digest: The digest returned by `put`
+
+        Returns:
+            value: The saved value
+
+        Raises:
+            KeyError: If no value is stored under the digest
+        """
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+
+        data = self._read(digest)
+        if data is None:
+            raise KeyError(f"Blob not found: {digest}")
+
+        value = json.loads(data.decode("utf-8"))
+        self._remember(digest, value)
+        return value
+
+    def __contains__(self, digest: str) -> bool:
+        return self._exists(digest)
+
+    def _remember(self, digest: str, value: Any) -> None:
+        with self._lock:
+            self._cache[digest] = value
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    @abstractmethod
+    def _exists(self, digest: str) -> bool:
+        """Check whether a blob is stored."""
+
+    @abstractmethod
+    def _write(self, digest: str, data: bytes) -> None:
+        """Store the serialised bytes of a blob."""
+
+    @abstractmethod
+    def _read(self, digest: str) -> Optional[bytes]:
+        """Read the serialised bytes of a blob, or None if it is not stored."""
+
+class LocalBlobStore(BlobStore):
+    """Blob store keeping one file per digest in a local directory."""
+
+    def __init__(self, directory: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        super().__init__(cache_size)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        hexdigest = digest.split(":", 1)[-1]
+        return os.path.join(self.directory, hexdigest[:2], hexdigest)
+
+    def _exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def _write(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _read(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+class SQLiteBlobStore(BlobStore):
+    """Blob store keeping all blobs in a single SQLite database."""
+
+    def __init__(self, path: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        super().__init__(cache_size)
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        with self._db_lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, data BLOB NOT NULL)")
+
+    def _exists(self, digest: str) -> bool:
+        with self._db_lock:
+            row = self._conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return row is not None
+
+    def _write(self, digest: str, data: bytes) -> None:
+        with self._db_lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)", (digest, data))
+
+    def _read(self, digest: str) -> Optional[bytes]:
+        with self._db_lock:
+            row = self._conn.execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+# Stores opened by URI, shared by everyone using the same location
+_stores: Dict[str, BlobStore] = {}
+_stores_lock = threading.Lock()
+
+def open_blob_store(uri: str) -> BlobStore:
+    """Open (or reuse) the blob store at a location.
+
+    Args:
+        uri: "sqlite:///path/to/blobs.db" for SQLite, or a directory path
+            (optionally prefixed with "file://") for a local directory store
+
+    Returns:
+        store: The blob store
+    """
+    with _stores_lock:
+        if uri not in _stores:
+            if uri.startswith("sqlite:///"):
+                _stores[uri] = SQLiteBlobStore(uri[len("sqlite:///"):])
+            else:
+                directory = uri[len("file://"):] if uri.startswith("file://") else uri
+                _stores[uri] = LocalBlobStore(directory)
+            logger.info(f"Opened blob store: {uri}")
+        return _stores[uri]
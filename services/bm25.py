@@ -0,0 +1,330 @@
+import os
+import re
+import json
+import math
+import shutil
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# BM25 parameters: term frequency saturation and document length normalisation
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+# Documents added since the last merge that trigger a new base segment
+DEFAULT_MERGE_THRESHOLD = 1000
+
+# Constant of reciprocal rank fusion: higher values flatten the rank weights
+DEFAULT_RRF_K = 60
+
+# Words, numbers with decimals or thousands separators, percentages and
+# hyphen-free product codes ("gpt-4o" becomes "gpt" and "4o")
+TOKEN = re.compile(r"[a-z0-9]+(?:[.,'][a-z0-9]+)*%?")
+
+# Files of a base segment
+SEGMENT_ARRAYS = ("offsets", "postings", "frequencies", "lengths")
+CURRENT_FILE = "CURRENT"
+PENDING_FILE = "pending.jsonl"
+
+def tokenize(text: str) -> List[str]:
+    """Split a text into lowercase index terms."""
+    return TOKEN.findall(text.lower())
+
+def reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], k: int = DEFAULT_RRF_K) -> List[Dict[str, Any]]:
+    """Merge ranked result lists by reciprocal rank fusion.
+
+    Each result scores the sum of 1 / (k + rank) over the lists it appears
+    in, so results ranked well by several retrievers come first, without
+    having to compare their scores.
+
+    Args:
+        rankings: Result lists, best first; results are matched by "id"
+            (or by their "body" if they have none)
+        k: Fusion constant
+
+    Returns:
+        results: The merged results, best first, each with its "rrf" score
+            and the fields of every list it appeared in
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, 1):
+            key = result.get("id") or result.get("body")
+            entry = fused.setdefault(key, {**result, "rrf": 0.0})
+            entry.update({field: value for field, value in result.items() if field not in entry})
+            entry["rrf"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda result: result["rrf"], reverse=True)
+
+class BM25Index:
+    """Okapi BM25 inverted index over (collection, document ID) pairs.
+
+    Documents live in a base segment, whose postings are flat numpy arrays
+    (document numbers and term frequencies, sliced per term by an offsets
+    array) memory-mapped from disk, plus a small in-memory segment of
+    recent additions. Additions are also appended to a pending log so they
+    survive a restart, and are merged into a new base segment every
+    `merge_threshold` documents. Replaced documents are masked out until
+    the next merge drops them.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        k1: float = DEFAULT_K1,
+        b: float = DEFAULT_B,
+        merge_threshold: int = DEFAULT_MERGE_THRESHOLD
+    ):
+        """
+        Args:
+            directory: Directory of the index files (None keeps it in memory)
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalisation
+            merge_threshold: Recent documents that trigger a merge
+        """
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        self.merge_threshold = merge_threshold
+        self._lock = threading.RLock()
+        self._load()
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def add(self, documents: List[Tuple[str, str, str]]) -> None:
+        """Index documents, replacing earlier versions with the same ID.
+
+        Args:
+            documents: (document ID, collection name, text) triples
+        """
+        entries = [
+            {"id": document_id, "collection": collection, "terms": Counter(tokenize(text))}
+            for document_id, collection, text in documents
+        ]
+        with self._lock:
+            for entry in entries:
+                self._add_recent(entry)
+            if self.directory:
+                with open(os.path.join(self.directory, PENDING_FILE), "a", encoding="utf-8") as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry) + "\n")
+            if len(self._recent_lengths) >= self.merge_threshold:
+                self.merge()
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, str, float]]:
+        """Find the documents that best match a query.
+
+        Args:
+            query: The query text
+            n_results: Maximum number of documents
+
+        Returns:
+            results: (document ID, collection name, score) triples, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self._keys)
+            if not terms or not self._live_count:
+                return []
+
+            if self._norms is None:
+                # Per-document length normalisation, kept until the index changes
+                average_length = self._total_length / self._live_count
+                lengths = np.concatenate((self._lengths, np.asarray(self._recent_lengths, dtype=np.float32)))
+                self._norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+            norms = self._norms
+            scores = np.zeros(total, dtype=np.float32)
+
+            for term in terms:
+                postings, frequencies = self._postings(term)
+                if not len(postings):
+                    continue
+                idf = math.log(1 + (self._live_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                # A term occurs once per document in a postings list, so plain
+                # fancy-index addition is safe
+                scores[postings] += idf * frequencies * (self.k1 + 1) / (frequencies + norms[postings])
+
+            scores[~self._live[:total]] = 0
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > n_results:
+                candidates = candidates[np.argpartition(-scores[candidates], n_results - 1)[:n_results]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(*self._keys[i], float(scores[i])) for i in candidates]
+
+    def clear(self) -> None:
+        """Remove every document from the index."""
+        with self._lock:
+            if self.directory:
+                shutil.rmtree(self.directory, ignore_errors=True)
+            self._load()
+
+    def merge(self) -> None:
+        """Write the live documents to a new base segment and clear the recent ones."""
+        with self._lock:
+            count = len(self._keys)
+            live = self._live[:count]
+            # New numbers of the documents that are still live
+            renumber = np.cumsum(live) - 1
+
+            # Every posting of both segments as (term, document, frequency) arrays
+            vocabulary = sorted(set(self._terms) | set(self._recent))
+            term_ids = {term: i for i, term in enumerate(vocabulary)}
+            base_terms = np.repeat(
+                np.fromiter((term_ids[term] for term in self._terms), dtype=np.int64, count=len(self._terms)),
+                np.diff(self._offsets)
+            )
+            recent = [(term_ids[term], doc, tf) for term, postings in self._recent.items() for doc, tf in postings]
+            recent = np.asarray(recent, dtype=np.int64).reshape(-1, 3)
+            terms = np.concatenate((base_terms, recent[:, 0]))
+            docs = np.concatenate((np.asarray(self._postings_array, dtype=np.int64), recent[:, 1]))
+            frequencies = np.concatenate((np.asarray(self._frequencies, dtype=np.float32), recent[:, 2].astype(np.float32)))
+
+            # Drop replaced documents, then group the postings by term (a
+            # stable sort keeps each term's documents in ascending order)
+            keep = live[docs]
+            terms, docs, frequencies = terms[keep], renumber[docs[keep]], frequencies[keep]
+            order = np.argsort(terms, kind="stable")
+            counts = np.bincount(terms, minlength=len(vocabulary))
+
+            # Terms whose documents were all replaced are dropped
+            used = counts > 0
+            vocabulary = [term for term, keep_term in zip(vocabulary, used) if keep_term]
+            arrays = {
+                "offsets": np.concatenate(([0], np.cumsum(counts[used]))).astype(np.int64),
+                "postings": docs[order].astype(np.int32),
+                "frequencies": frequencies[order],
+                "lengths": np.concatenate((
+                    np.asarray(self._lengths, dtype=np.float32),
+                    np.asarray(self._recent_lengths, dtype=np.float32)
+                ))[live]
+            }
+            keys = [key for key, is_live in zip(self._keys, live) if is_live]
+
+            if self.directory:
+                self._write_segment(vocabulary, keys, arrays)
+                self._load()
+            else:
+                self._set_base(vocabulary, keys, arrays)
+                self._clear_recent()
+            logger.info(f"Merged keyword index: {len(keys)} documents, {len(vocabulary)} terms")
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        docs, frequencies = self._base_postings(term)
+        recent = self._recent.get(term)
+        if recent:
+            docs = np.concatenate((docs, np.fromiter((doc for doc, _ in recent), dtype=np.int64, count=len(recent))))
+            frequencies = np.concatenate((frequencies, np.fromiter((tf for _, tf in recent), dtype=np.float32, count=len(recent))))
+        return docs, frequencies
+
+    def _base_postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        i = self._terms.get(term)
+        if i is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._postings_array[start:end].astype(np.int64), np.asarray(self._frequencies[start:end])
+
+    def _add_recent(self, entry: Dict[str, Any]) -> None:
+        self._norms = None
+        key = (entry["id"], entry["collection"])
+        previous = self._numbers.get(key)
+        if previous is not None and self._live[previous]:
+            self._live[previous] = False
+            self._live_count -= 1
+            self._total_length -= float(self._length(previous))
+
+        number = len(self._keys)
+        if number >= len(self._live):
+            self._live = np.concatenate((self._live, np.zeros(max(len(self._live), 64), dtype=bool)))
+        self._live[number] = True
+        self._keys.append(key)
+        self._numbers[key] = number
+        length = sum(entry["terms"].values())
+        self._recent_lengths.append(length)
+        self._live_count += 1
+        self._total_length += length
+        for term, frequency in entry["terms"].items():
+            self._recent.setdefault(term, []).append((number, frequency))
+
+    def _length(self, number: int) -> float:
+        base_count = len(self._lengths)
+        return self._lengths[number] if number < base_count else self._recent_lengths[number - base_count]
+
+    def _set_base(self, vocabulary: List[str], keys: List[Tuple[str, str]], arrays: Dict[str, np.ndarray]) -> None:
+        self._terms = {term: i for i, term in enumerate(vocabulary)}
+        self._keys = [tuple(key) for key in keys]
+        self._numbers = {key: i for i, key in enumerate(self._keys)}
+        self._offsets = arrays["offsets"]
+        self._postings_array = arrays["postings"]
+        self._frequencies = arrays["frequencies"]
+        self._lengths = arrays["lengths"]
+        self._live = np.ones(max(len(self._keys), 64), dtype=bool)
+        self._live[len(self._keys):] = False
+        self._live_count = len(self._keys)
+        self._total_length = float(np.sum(self._lengths, dtype=np.float64))
+        self._norms: Optional[np.ndarray] = None
+
+    def _clear_recent(self) -> None:
+        self._recent: Dict[str, List[Tuple[int, int]]] = {}
+        self._recent_lengths: List[int] = []
+
+    def _load(self) -> None:
+        empty = {
+            "offsets": np.zeros(1, dtype=np.int64),
+            "postings": np.zeros(0, dtype=np.int32),
+            "frequencies": np.zeros(0, dtype=np.float32),
+            "lengths": np.zeros(0, dtype=np.float32)
+        }
+        self._set_base([], [], empty)
+        self._clear_recent()
+        if not self.directory:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        current = os.path.join(self.directory, CURRENT_FILE)
+        if os.path.exists(current):
+            with open(current, encoding="utf-8") as f:
+                segment = os.path.join(self.directory, f.read().strip())
+            with open(os.path.join(segment, "terms.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            # Postings are memory-mapped, so opening a large index reads nothing up front
+            arrays = {name: np.load(os.path.join(segment, f"{name}.npy"), mmap_mode="r") for name in SEGMENT_ARRAYS}
+            self._set_base(meta["terms"], meta["keys"], arrays)
+
+        pending = os.path.join(self.directory, PENDING_FILE)
+        if os.path.exists(pending):
+            with open(pending, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add_recent(json.loads(line))
+
+    def _write_segment(self, vocabulary: List[str], keys: List[Tuple[str, str]], arrays: Dict[str, np.ndarray]) -> None:
+        current = os.path.join(self.directory, CURRENT_FILE)
+        previous = None
+        if os.path.exists(current):
+            with open(current, encoding="utf-8") as f:
+                previous = f.read().strip()
+        generation = int(previous.split("-")[-1]) + 1 if previous else 1
+        name = f"segment-{generation}"
+        segment = os.path.join(self.directory, name)
+        os.makedirs(segment, exist_ok=True)
+
+        for array_name, array in arrays.items():
+            np.save(os.path.join(segment, f"{array_name}.npy"), array)
+        with open(os.path.join(segment, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump({"terms": vocabulary, "keys": keys}, f)
+
+        # Switch to the new segment atomically, then drop what it replaced
+        tmp_path = current + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(tmp_path, current)
+        open(os.path.join(self.directory, PENDING_FILE), "w").close()
+        if previous:
+            shutil.rmtree(os.path.join(self.directory, previous), ignore_errors=True)
@@ -0,0 +1,184 @@
+import zlib
+import string
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from services.tokens import estimate_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Results at least this similar (estimated Jaccard of their shingles) are duplicates
+DEFAULT_THRESHOLD = 0.8
+
+# Hash functions per signature
+NUM_PERM = 64
+
+# Words per shingle
+SHINGLE_WORDS = 3
+
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT = np.uint64(32)
+
+# Punctuation is replaced by spaces before splitting a text into words
+_PUNCTUATION = str.maketrans({character: " " for character in string.punctuation})
+
+def result_text(result: Dict[str, Any]) -> str:
+    """The text of a research result: its fetched page content, or its snippet."""
+    return result.get("content") or result.get("body") or ""
+
+def word_shingles(text: str, size: int = SHINGLE_WORDS) -> np.ndarray:
+    """Hashes of the word shingles of a text, ignoring case and punctuation.
+
+    Every distinct word is hashed once and the hashes of the `size` words of
+    each shingle are combined with vectorised arithmetic.
+    """
+    words = text.lower().translate(_PUNCTUATION).split()
+    if not words:
+        return np.zeros(1, dtype=np.uint64)
+
+    word_hashes = {word: zlib.crc32(word.encode("utf-8")) for word in set(words)}
+    hashes = np.array([word_hashes[word] for word in words], dtype=np.uint64)
+    if len(hashes) <= size:
+        size = len(hashes)
+
+    shingles = np.zeros(len(hashes) - size + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for offset in range(size):
+            shingles = shingles * _SHINGLE_MULTIPLIER + hashes[offset:len(hashes) - size + 1 + offset]
+    return np.unique(shingles)
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick the number of bands and rows per band for a similarity threshold.
+
+    Two signatures become candidates with probability 1 - (1 - s^r)^b, whose
+    steep rise sits near (1 / b)^(1 / r). The split of `num_perm` whose rise is
+    closest to (just below) the threshold is chosen, so that few true
+    duplicates are missed.
+
+    Returns:
+        bands: Number of bands
+        rows: Signature values per band
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - 0.9 * threshold))
+
+class MinHasher:
+    """Computes MinHash signatures with `num_perm` multiply-shift hash functions."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        generator = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        # Odd multipliers keep the multiply-shift hashes universal
+        self.a = generator.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = generator.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """The MinHash signature of a text's word shingles."""
+        hashes = word_shingles(text)
+        # uint64 arithmetic wraps around; the high 32 bits are the hash
+        with np.errstate(over="ignore"):
+            permuted = np.multiply.outer(hashes, self.a)
+            permuted += self.b
+        permuted >>= _SHIFT
+        return permuted.min(axis=0)
+
+class LSHIndex:
+    """Banded locality-sensitive hashing index over MinHash signatures.
+
+    Args:
+        threshold: Estimated Jaccard similarity at or above which two
+            signatures are near-duplicates
+        num_perm: Length of the signatures
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find(self, signature: np.ndarray) -> Optional[Tuple[int, float]]:
+        """Find the most similar indexed signature at or above the threshold.
+
+        Returns:
+            match: The index of the matching signature and its estimated
+                Jaccard similarity, or None if there is no near-duplicate
+        """
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+
+        best = None
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def add(self, signature: np.ndarray) -> int:
+        """Add a signature to the index, returning its index."""
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(index)
+        return index
+
+def dedupe_results(results: List[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD,
+                   hasher: Optional[MinHasher] = None) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Drop research results that nearly duplicate an earlier result.
+
+    Each text is reduced to a MinHash signature of its word shingles, and the
+    signatures are banded into an LSH index, so a result is only compared
+    with the earlier results it shares a band with.
+
+    The first copy of a text is kept, in the order given (so web results win
+    over library chunks when they are listed first). Every dropped copy is
+    recorded in the kept result's "duplicates" with its title, URL and source,
+    so its provenance is not lost.
+
+    Args:
+        results: Search and vector DB results
+        threshold: Estimated Jaccard similarity at which two results are
+            near-duplicates
+        hasher: MinHash hasher to use (a default one is created if omitted)
+
+    Returns:
+        kept: The results without near-duplicates
+        report: Counts of "results", "duplicates" and "tokens_removed"
+    """
+    hasher = hasher or MinHasher()
+    index = LSHIndex(threshold, hasher.num_perm)
+    kept: List[Dict[str, Any]] = []
+    indexed: List[Dict[str, Any]] = []
+    report = {"results": len(results), "duplicates": 0, "tokens_removed": 0}
+
+    for result in results:
+        text = result_text(result)
+        if not text.strip():
+            kept.append(result)
+            continue
+
+        signature = hasher.signature(text)
+        match = index.find(signature)
+        if match is None:
+            index.add(signature)
+            kept.append(dict(result))
+            indexed.append(kept[-1])
+            continue
+
+        indexed[match[0]].setdefault("duplicates", []).append({
+            "title": result.get("title", ""),
+            "url": result.get("url", ""),
+            "source": result.get("source", "")
+        })
+        report["duplicates"] += 1
+        report["tokens_removed"] += estimate_tokens(text)
+
+    return kept, report
@@ -0,0 +1,63 @@
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+from services.llm import get_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Default embedding model to use
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Longest text sent for embedding, in characters
+MAX_EMBEDDING_CHARS = 8000
+
+# Embeddings already computed in this process, keyed by (model, text)
+_cache: Dict[Tuple[str, str], List[float]] = {}
+_cache_lock = threading.Lock()
+
+def embed_texts(texts: List[str], model: str = DEFAULT_EMBEDDING_MODEL, cache: bool = True) -> List[List[float]]:
+    """Embed a list of texts with OpenAI.
+
+    Texts embedded before in this process are served from memory, so stable
+    inputs such as persona descriptions are only embedded once.
+
+    Args:
+        texts: The texts to embed
+        model: The embedding model to use
+        cache: Whether to reuse and remember embeddings for these texts
+
+    Returns:
+        embeddings: One vector per input text
+    """
+    try:
+        texts = [text[:MAX_EMBEDDING_CHARS] for text in texts]
+
+        with _cache_lock:
+            missing = [text for text in dict.fromkeys(texts) if not cache or (model, text) not in _cache]
+
+        if missing:
+            response = get_client().embeddings.create(model=model, input=missing)
+            vectors = {text: item.embedding for text, item in zip(missing, response.data)}
+            if cache:
+                with _cache_lock:
+                    _cache.update({(model, text): vector for text, vector in vectors.items()})
+        else:
+            vectors = {}
+
+        with _cache_lock:
+            return [vectors[text] if text in vectors else _cache[(model, text)] for text in texts]
+    except Exception as e:
+        logger.error(f"Error in embed_texts: {str(e)}")
+        raise
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    """Cosine similarity between two vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
@@ -0,0 +1,331 @@
+"""Offline stand-ins for the external services.
+
+These fakes replace OpenAI, DuckDuckGo and ChromaDB with deterministic,
+in-process implementations so the agent graph can be run end to end in tests
+and benchmarks without network access or API keys. Use `use_fake_services()`
+to install them for the duration of a block.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Iterable
+
+import httpx
+from openai import RateLimitError
+
+import services.llm as llm
+import services.search as search
+import services.embeddings as embeddings
+from services.vector_db import VectorDBClient
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used by the fakes (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+# Provider prompt caching applies to prompts of at least this many tokens,
+# and cached prefixes grow in steps of PROMPT_CACHE_INCREMENT tokens
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_INCREMENT = 128
+
+def cached_prefix_tokens(prompt: str, previous_prompts: List[str]) -> int:
+    """Estimate the tokens a provider prefix cache would serve for a prompt.
+
+    Args:
+        prompt: The full prompt (all messages in order)
+        previous_prompts: Prompts sent earlier that may have been cached
+
+    Returns:
+        cached_tokens: The cached prompt tokens, as reported by the API
+    """
+    longest = max((len(os.path.commonprefix([prompt, previous])) for previous in previous_prompts), default=0)
+    tokens = len(prompt[:longest]) // 4
+    if tokens < PROMPT_CACHE_MIN_TOKENS:
+        return 0
+    return tokens // PROMPT_CACHE_INCREMENT * PROMPT_CACHE_INCREMENT
+
+def fake_article(topic: str, sections: int = 3, sentences: int = 4) -> str:
+    """Build a deterministic Markdown article about a topic."""
+    paragraph = " ".join(f"Point {i} explains one practical idea about {topic}." for i in range(1, sentences + 1))
+    parts = [f"# A Practical Guide to {topic}", "", f"Why does {topic} matter? {paragraph}", ""]
+    for i in range(1, sections + 1):
+        parts += [f"## Section {i}: {topic} in practice", "", paragraph, ""]
+    parts += ["## Conclusion", "", f"{paragraph} Start applying {topic} today."]
+    return "\n".join(parts)
+
+class FakeChatCompletions:
+    """Stand-in for `client.chat.completions` that answers based on the prompt type."""
+
+    def __init__(self, owner: "FakeOpenAIClient"):
+        self.owner = owner
+
+    def create(self, model: str, messages: List[Dict[str, str]], temperature: float = 0.7,
+               max_tokens: int = 4000, **kwargs: Any) -> SimpleNamespace:
+        if model in self.owner.rate_limited_models:
+            with self.owner.lock:
+                self.owner.rate_limited_calls.append(model)
+            request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+            raise RateLimitError(f"Rate limit reached for {model}", response=httpx.Response(429, request=request), body=None)
+
+        prompt = "\n".join(message["content"] for message in messages)
+        self.owner.raise_failure(prompt)
+        content = self.owner.respond(prompt)
+        cached_tokens = self.owner.cache_lookup(prompt)
+        completion_tokens = min(estimate_tokens(content), max_tokens)
+
+        latency = (self.owner.latency + completion_tokens * self.owner.latency_per_token
+                   + estimate_tokens(prompt) * self.owner.latency_per_prompt_token)
+        if latency:
+            time.sleep(latency)
+
+        with self.owner.lock:
+            self.owner.calls.append({
+                "model": model, "messages": messages, "prompt": prompt,
+                "temperature": temperature, "max_tokens": max_tokens, **kwargs
+            })
+
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=completion_tokens,
+                total_tokens=estimate_tokens(prompt) + completion_tokens,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens)
+            )
+        )
+
+class FakeEmbeddings:
+    """Stand-in for `client.embeddings` using hashed bag-of-words vectors.
+
+    Texts that share words get similar vectors, which is enough to exercise
+    relevance ranking without a model.
+    """
+
+    dimensions = 256
+
+    def __init__(self, owner: "FakeOpenAIClient"):
+        self.owner = owner
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            if len(word) > 2:
+                vector[zlib.crc32(word.encode("utf-8")) % self.dimensions] += 1.0
+        return vector
+
+    def create(self, model: str, input: List[str], **kwargs: Any) -> SimpleNamespace:
+        with self.owner.lock:
+            self.owner.embedding_calls.append({"model": model, "input": list(input)})
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=self.embed(text), index=i) for i, text in enumerate(input)],
+            usage=SimpleNamespace(prompt_tokens=sum(estimate_tokens(text) for text in input))
+        )
+
+class HashedEmbeddingFunction:
+    """ChromaDB embedding function using the fake hashed bag-of-words vectors.
+
+    Lets a real (in-memory) ChromaDB collection be used without downloading
+    an embedding model.
+    """
+
+    def __init__(self, dimensions: int = FakeEmbeddings.dimensions):
+        self.dimensions = dimensions
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in input:
+            vector = [0.0] * self.dimensions
+            for word in re.findall(r"[a-z0-9]+", text.lower()):
+                if len(word) > 2:
+                    vector[zlib.crc32(word.encode("utf-8")) % self.dimensions] += 1.0
+            norm = sum(value * value for value in vector) ** 0.5 or 1.0
+            vectors.append([value / norm for value in vector])
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "hashed-bag-of-words"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dimensions": self.dimensions}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "HashedEmbeddingFunction":
+        return HashedEmbeddingFunction(**config)
+
+    def is_legacy(self) -> bool:
+        return False
+
+    def default_space(self) -> str:
+        return "cosine"
+
+    def supported_spaces(self) -> List[str]:
+        return ["cosine", "l2", "ip"]
+
+class FakeOpenAIClient:
+    """Deterministic stand-in for the OpenAI client.
+
+    Args:
+        latency: Fixed seconds of latency added to every call
+        latency_per_token: Seconds of latency per generated token
+        latency_per_prompt_token: Seconds of latency per prompt token (prefill)
+        topic: Topic used for generated articles
+        sentences: Sentences per paragraph in generated articles
+        rate_limited_models: Models whose calls fail with a RateLimitError
+    """
+
+    def __init__(self, latency: float = 0.0, latency_per_token: float = 0.0, topic: str = "content marketing",
+                 sentences: int = 4, rate_limited_models: Iterable[str] = (), latency_per_prompt_token: float = 0.0):
+        self.latency = latency
+        self.latency_per_token = latency_per_token
+        self.latency_per_prompt_token = latency_per_prompt_token
+        self.topic = topic
+        self.sentences = sentences
+        self.rate_limited_models = set(rate_limited_models)
+        self.rate_limited_calls: List[str] = []
+        self.calls: List[Dict[str, Any]] = []
+        self.embedding_calls: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(self))
+        self.embeddings = FakeEmbeddings(self)
+        self._prompt_cache: List[str] = []
+        self._failures: List[List[Any]] = []
+
+    def fail_next(self, marker: str, error: Exception, times: int = 1) -> None:
+        """Make the next `times` calls whose prompt contains `marker` raise `error`."""
+        with self.lock:
+            self._failures.append([marker, error, times])
+
+    def raise_failure(self, prompt: str) -> None:
+        """Raise the error queued with `fail_next` for this prompt, if any."""
+        with self.lock:
+            for failure in self._failures:
+                marker, error, times = failure
+                if marker in prompt and times > 0:
+                    failure[2] -= 1
+                    raise error
+
+    def cache_lookup(self, prompt: str) -> int:
+        """Simulate the provider prefix cache: report cached tokens and remember the prompt."""
+        with self.lock:
+            cached = cached_prefix_tokens(prompt, self._prompt_cache)
+            self._prompt_cache = (self._prompt_cache + [prompt])[-50:]
+        return cached
+
+    def respond(self, prompt: str) -> str:
+        """Produce a plausible response for the kind of prompt given."""
+        if "Multi-Persona Content Review" in prompt:
+            personas = re.findall(r"^- ([^:\n]+):", prompt.split("## Reviewer Personas:")[-1], re.MULTILINE)
+            return json.dumps({"reviews": [
+                {
+                    "persona": persona,
+                    "priority": "high" if i == 0 else "medium",
+                    "suggestions": [
+                        "Add a statistic to the introduction to hook the reader.",
+                        "Shorten the second section and add a bulleted list.",
+                        "End with a clear call-to-action."
+                    ]
+                }
+                for i, persona in enumerate(personas)
+            ]})
+        if "Persona-Based Content Review" in prompt:
+            return "\n".join([
+                "1. Add a statistic to the introduction to hook the reader.",
+                "2. Shorten the second section and add a bulleted list.",
+                "3. End with a clear call-to-action."
+            ])
+        if "Section Update Task" in prompt:
+            return f"A revised section about {self.topic} that applies the feedback in a few sentences."
+        if "Article Outline Task" in prompt:
+            parts = [f"# A Practical Guide to {self.topic}", "", "## Introduction", f"- Why {self.topic} matters"]
+            for i in range(1, 4):
+                parts += [f"## Section {i}: {self.topic} in practice", f"- Key finding {i} about {self.topic}"]
+            parts += ["## Conclusion", "- Summary and call-to-action"]
+            return "\n".join(parts)
+        if "Section Writing Task" in prompt:
+            return " ".join(f"Point {i} explains one practical idea about {self.topic}." for i in range(1, self.sentences + 1))
+        if "Coherence Pass" in prompt:
+            return "\n".join([
+                f"REPLACE: Point 1 explains one practical idea about {self.topic}.",
+                f"WITH: Building on that, point 1 explains one practical idea about {self.topic}."
+            ])
+        if "Research Synthesis" in prompt:
+            return "\n".join(
+                f"- Key finding {i} about {self.topic}, with the supporting statistic and its source."
+                for i in range(1, 2 * self.sentences + 1)
+            )
+        return fake_article(self.topic, sentences=self.sentences)
+
+class FakeDDGS:
+    """Stand-in for `duckduckgo_search.DDGS`."""
+
+    def __init__(self, **kwargs: Any):
+        self.options = kwargs
+
+    def text(self, query: str, max_results: int = 10):
+        slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")
+        for i in range(max_results):
+            yield {
+                "title": f"{query} result {i}",
+                "body": f"Result {i} explains an aspect of {query} in a couple of sentences.",
+                "href": f"https://example.com/{slug}/{i}"
+            }
+
+class FakeVectorDBClient:
+    """Stand-in for `VectorDBClient` with a small fixed library (vector search only)."""
+
+    def __init__(self, documents: Optional[List[str]] = None):
+        self.documents = documents or [f"Library note {i} from previous articles." for i in range(5)]
+        self.settings = {"n_results": 5}
+
+    def query(self, query_text: str, n_results: Optional[int] = None, **kwargs: Any) -> List[Dict[str, Any]]:
+        return [
+            {"title": f"Library document {i}", "body": doc, "source": "vector_db", "metadata": {}, "distance": 0.5}
+            for i, doc in enumerate(self.documents[:n_results or 5])
+        ]
+
+    def keyword_query(self, query_text: str, n_results: Optional[int] = None, **kwargs: Any) -> List[Dict[str, Any]]:
+        return []
+
+    def add_document(self, document: str, metadata: Dict[str, Any], document_id: Optional[str] = None) -> str:
+        self.documents.append(document)
+        return document_id or str(len(self.documents))
+
+    def add_documents(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        document_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        return [self.add_document(document, metadata) for document, metadata in zip(documents, metadatas)]
+
+@contextmanager
+def use_fake_services(client: Optional[FakeOpenAIClient] = None, vector_db: Optional[FakeVectorDBClient] = None):
+    """Install the fake services for the duration of the block.
+
+    Args:
+        client: The fake OpenAI client to use (a default one is created if omitted)
+        vector_db: The fake vector DB client to use
+
+    Yields:
+        client: The installed fake OpenAI client
+    """
+    client = client or FakeOpenAIClient()
+    saved = (llm.client, search.DDGS, search._search, VectorDBClient._instance)
+
+    llm.client = client
+    search.DDGS = FakeDDGS
+    search._search = search.HedgedSearch([search.DuckDuckGoProvider()])
+    VectorDBClient._instance = vector_db or FakeVectorDBClient()
+    embeddings._cache.clear()
+    try:
+        yield client
+    finally:
+        llm.client, search.DDGS, search._search, VectorDBClient._instance = saved
+        embeddings._cache.clear()
@@ -0,0 +1,296 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from html.parser import HTMLParser
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Directory where extracted pages are cached
+DEFAULT_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", ".page_cache")
+
+# Cached pages younger than this are used without contacting the server
+DEFAULT_CACHE_MAX_AGE = 24 * 3600
+
+# Fetch limits
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_PER_HOST = 2
+DEFAULT_TIMEOUT = 10.0
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# Characters of extracted text kept per page
+MAX_PAGE_CHARS = 6000
+
+USER_AGENT = "Mozilla/5.0 (compatible; content-writer-agent/1.0)"
+
+class ArticleExtractor(HTMLParser):
+    """Extract the readable text of an HTML page.
+
+    Text inside <article> or <main> is preferred when the page has one;
+    navigation, scripts, forms and other page furniture are skipped.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe", "template"}
+    BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "pre", "td", "div", "section", "br"}
+    MAIN_TAGS = {"article", "main"}
+    VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self._in_title = False
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._blocks: List[List[str]] = [[]]
+        self._main_blocks: List[List[str]] = [[]]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            if tag == "br":
+                self._break()
+            return
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.MAIN_TAGS:
+            self._main_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        if tag in self.BLOCK_TAGS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.MAIN_TAGS:
+            self._main_depth = max(0, self._main_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        if tag in self.BLOCK_TAGS:
+            self._break()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        self._blocks[-1].append(data)
+        if self._main_depth:
+            self._main_blocks[-1].append(data)
+
+    def _break(self):
+        self._blocks.append([])
+        self._main_blocks.append([])
+
+    def text(self) -> str:
+        """The extracted text, one paragraph per line."""
+        blocks = self._main_blocks if any(self._main_blocks) else self._blocks
+        paragraphs = (re.sub(r"\s+", " ", "".join(block)).strip() for block in blocks)
+        return "\n".join(paragraph for paragraph in paragraphs if paragraph)
+
+def extract_text(html: str) -> Dict[str, str]:
+    """Extract the title and main text of an HTML page.
+
+    Args:
+        html: The page source
+
+    Returns:
+        page: The page "title" and "text"
+    """
+    extractor = ArticleExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return {"title": re.sub(r"\s+", " ", extractor.title).strip(), "text": extractor.text()}
+
+class PageCache:
+    """Disk cache of extracted pages keyed by URL.
+
+    Each entry keeps the ETag and Last-Modified validators of the response it
+    came from, so stale entries are revalidated with a conditional request
+    instead of being downloaded and extracted again.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_age: float = DEFAULT_CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the cached entry for a URL, if any."""
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Whether an entry can be used without revalidating it."""
+        return time.time() - entry.get("fetched", 0) < self.max_age
+
+    def put(self, url: str, entry: Dict[str, Any]) -> None:
+        """Save an entry atomically."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(url))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+class PageFetcher:
+    """Fetch and extract pages concurrently over one pooled HTTP client.
+
+    At most `max_concurrency` requests are in flight, and at most `per_host`
+    to any single host, so a batch costs roughly its slowest fetch rather than
+    the sum of them without hammering any one site.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[PageCache] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_host: int = DEFAULT_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_chars: int = MAX_PAGE_CHARS
+    ):
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_chars = max_chars
+
+    async def fetch_all(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch a batch of URLs.
+
+        Args:
+            urls: The page URLs
+
+        Returns:
+            pages: For each URL, its "title", "text" and "status" ("fetched",
+                "cached", "revalidated", "stale" or "error"; the last two with
+                an "error" message). A stale cache entry that cannot be
+                revalidated is used as it is.
+        """
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        overall = asyncio.Semaphore(self.max_concurrency)
+        hosts: Dict[str, asyncio.Semaphore] = {}
+
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT}
+        ) as client:
+            async def fetch(url: str) -> Dict[str, Any]:
+                cached = self.cache.get(url) if self.cache else None
+                if cached and self.cache.is_fresh(cached):
+                    return self._page(cached, "cached")
+
+                # Wait for the host's slot first so a busy host does not hold global slots
+                host = hosts.setdefault(urlsplit(url).netloc, asyncio.Semaphore(self.per_host))
+                async with host, overall:
+                    try:
+                        return await asyncio.wait_for(self._fetch(client, url, cached), self.timeout)
+                    except Exception as e:
+                        error = str(e) or type(e).__name__
+                        if cached:
+                            logger.warning(f"Could not revalidate {url}, using the cached page: {error}")
+                            return {**self._page(cached, "stale"), "error": error}
+                        logger.warning(f"Could not fetch {url}: {error}")
+                        return {"title": "", "text": "", "status": "error", "error": error}
+
+            unique = list(dict.fromkeys(urls))
+            pages = await asyncio.gather(*(fetch(url) for url in unique))
+        return dict(zip(unique, pages))
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str, cached: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                cached["fetched"] = time.time()
+                self.cache.put(url, cached)
+                return self._page(cached, "revalidated")
+
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "")
+            if "html" not in content_type and "text/plain" not in content_type:
+                raise ValueError(f"Unsupported content type {content_type or 'unknown'}")
+
+            body = b""
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > MAX_PAGE_BYTES:
+                    break
+            html = body[:MAX_PAGE_BYTES].decode(response.encoding or "utf-8", errors="replace")
+
+        page = extract_text(html) if "html" in content_type else {"title": "", "text": html.strip()}
+        entry = {
+            "url": url,
+            "title": page["title"],
+            "text": page["text"],
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fetched": time.time()
+        }
+        if self.cache:
+            self.cache.put(url, entry)
+        return self._page(entry, "fetched")
+
+    def _page(self, entry: Dict[str, Any], status: str) -> Dict[str, Any]:
+        return {"title": entry.get("title", ""), "text": entry.get("text", "")[:self.max_chars], "status": status}
+
+def fetch_pages(
+    urls: List[str],
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    **options: Any
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch and extract a batch of pages concurrently.
+
+    This is a blocking wrapper around `PageFetcher.fetch_all` for the graph
+    nodes; it runs its own event loop (on a helper thread if the caller is
+    already inside one).
+
+    Args:
+        urls: The page URLs
+        cache_dir: Directory of the page cache (None disables caching)
+        **options: max_concurrency, per_host, timeout or max_chars for `PageFetcher`
+
+    Returns:
+        pages: The extracted page for each URL (see `PageFetcher.fetch_all`)
+    """
+    if not urls:
+        return {}
+
+    fetcher = PageFetcher(cache=PageCache(cache_dir) if cache_dir else None, **options)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(fetcher.fetch_all(urls))
+
+    result: Dict[str, Dict[str, Any]] = {}
+    thread = threading.Thread(target=lambda: result.update(asyncio.run(fetcher.fetch_all(urls))))
+    thread.start()
+    thread.join()
+    return result
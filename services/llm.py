@@ -1,9 +1,17 @@
 import os
 import logging
-from typing import Dict, Any, Optional
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
+
+from config import load_config
+from services.tokens import ContextOverflowError, context_window, count_message_tokens, count_tokens, trim_value
+from services.tracing import tracer
 
 # Load environment variables
 load_dotenv()
@@ -12,44 +20,302 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI client, created on first use
+client: Optional[OpenAI] = None
 
 # Default model to use
 DEFAULT_MODEL = "gpt-4o"
 
+# Routing table mapping nodes to models (in the config directory)
+MODEL_ROUTES_FILE = "models.yaml"
+
+# Token usage accumulated per node in this process
+_usage_by_node: Dict[str, Dict[str, int]] = {}
+_usage_lock = threading.Lock()
+
+# Usage of the calls made inside the current `track_usage` block
+_tracked_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("tracked_usage", default=None)
+
+def get_client() -> OpenAI:
+    """Get the shared OpenAI client, creating it on first use."""
+    global client
+    if client is None:
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
+
+@lru_cache(maxsize=None)
+def load_model_routes() -> Dict[str, Any]:
+    """Load the per-node model routing table, or an empty table if it is missing."""
+    try:
+        return load_config(MODEL_ROUTES_FILE) or {}
+    except Exception as e:
+        logger.warning(f"No model routing table, using {DEFAULT_MODEL} everywhere: {str(e)}")
+        return {}
+
+def resolve_route(node: Optional[str], fast: bool = False) -> Dict[str, Any]:
+    """Get the model settings for a node.
+    
+    Args:
+        node: Name of the calling node
+        fast: Whether the thread runs in fast mode
+        
+    Returns:
+        route: The model, temperature, max_tokens and fallback models to use
+    """
+    routes = load_model_routes()
+    route = {"model": DEFAULT_MODEL, "temperature": 0.7, "max_tokens": 4000, "fallbacks": []}
+    route.update(routes.get("default") or {})
+    route.update((routes.get("nodes") or {}).get(node) or {})
+    if fast:
+        route.update((routes.get("fast") or {}).get(node) or {})
+    return route
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """Read the token usage from a chat completion response.
+    
+    Args:
+        response: The API response
+        
+    Returns:
+        usage: Prompt, cached prompt and completion token counts
+    """
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0
+    }
+
+@contextmanager
+def track_usage():
+    """Collect the usage of the completions made inside the block.
+    
+    Yields:
+        usage: Totals of calls, prompt, cached, completion and total tokens,
+            updated as calls complete (calls on other threads are not included)
+    """
+    usage = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    token = _tracked_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _tracked_usage.reset(token)
+
+def add_tracked_usage(usage: Dict[str, int]) -> None:
+    """Add usage measured elsewhere (e.g. on a worker thread) to the current `track_usage` block."""
+    tracked = _tracked_usage.get()
+    if tracked is not None:
+        for key, value in usage.items():
+            tracked[key] = tracked.get(key, 0) + value
+
+def record_usage(node: str, usage: Dict[str, int]) -> None:
+    """Add the usage of one call to the per-node totals and the current `track_usage` block."""
+    add_tracked_usage({
+        "calls": 1,
+        **usage,
+        "total_tokens": usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+    })
+    with _usage_lock:
+        totals = _node_totals(node)
+        totals["calls"] += 1
+        for key, value in usage.items():
+            totals[key] = totals.get(key, 0) + value
+
+def record_preflight(node: str, prompt_tokens: int, strategy: Optional[str] = None) -> None:
+    """Add a pre-flight token count, and the overflow strategy it needed if any, to the per-node totals."""
+    with _usage_lock:
+        totals = _node_totals(node)
+        totals["counted_prompt_tokens"] += prompt_tokens
+        totals["max_prompt_tokens"] = max(totals["max_prompt_tokens"], prompt_tokens)
+        if strategy:
+            totals["overflows"] += 1
+            totals[f"overflow_{strategy}"] = totals.get(f"overflow_{strategy}", 0) + 1
+
+def _node_totals(node: str) -> Dict[str, int]:
+    return _usage_by_node.setdefault(node, {
+        "calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+        "counted_prompt_tokens": 0, "max_prompt_tokens": 0, "overflows": 0
+    })
+
+def get_usage_report() -> Dict[str, Dict[str, Any]]:
+    """Get the token usage per node, including the share of cached prompt tokens.
+    
+    Besides the usage the API reported, each node has the prompt tokens
+    counted before its calls (`counted_prompt_tokens`, `max_prompt_tokens`)
+    and the number of calls that did not fit a context window as sent
+    (`overflows`, and `overflow_<strategy>` per strategy that fixed them).
+    """
+    with _usage_lock:
+        report = {node: dict(totals) for node, totals in _usage_by_node.items()}
+    for totals in report.values():
+        prompt_tokens = totals["prompt_tokens"]
+        totals["cached_ratio"] = round(totals["cached_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0
+    return report
+
+def reset_usage_report() -> None:
+    """Clear the per-node usage totals."""
+    with _usage_lock:
+        _usage_by_node.clear()
+
+def build_messages(prompt_template: str, variables: Dict[str, Any], system_template: Optional[str] = None) -> List[Dict[str, str]]:
+    """Format the chat messages of a call: the system prefix, if any, then the prompt."""
+    messages = [{"role": "user", "content": prompt_template.format(**variables)}]
+    if system_template:
+        messages.insert(0, {"role": "system", "content": system_template.format(**variables)})
+    return messages
+
+def fit_context(
+    prompt_template: str,
+    variables: Dict[str, Any],
+    system_template: Optional[str],
+    models: List[str],
+    completion_tokens: int,
+    route: Dict[str, Any]
+) -> Tuple[List[Dict[str, str]], List[str], int, Optional[str]]:
+    """Count a call's tokens before it is sent and make it fit a context window.
+    
+    Models whose context window cannot hold the prompt plus `completion_tokens`
+    are dropped. If none is left, the route's `overflow` strategies are tried
+    in order: "larger_model" switches to the route's `overflow_model`, and
+    "trim" shortens the prompt variable named by the route's `trim` (e.g. the
+    research) until the prompt fits the first model.
+    
+    Args:
+        prompt_template: The prompt template
+        variables: The variables of the templates
+        system_template: Optional template for the system prefix
+        models: The candidate models, in order
+        completion_tokens: The max_tokens of the call
+        route: The node's route
+        
+    Returns:
+        messages: The messages to send
+        models: The models that can take them, in order
+        prompt_tokens: The prompt tokens counted for the first of those models
+        strategy: The overflow strategy used, or None
+        
+    Raises:
+        ContextOverflowError: If no strategy makes the call fit
+    """
+    windows = load_model_routes().get("context_windows") or {}
+    messages = build_messages(prompt_template, variables, system_template)
+    
+    def fitting(candidates: List[str]) -> List[str]:
+        return [
+            candidate for candidate in candidates
+            if count_message_tokens(messages, candidate) + completion_tokens <= context_window(candidate, windows)
+        ]
+    
+    usable = fitting(models)
+    strategy = None
+    if len(usable) < len(models):
+        dropped = [candidate for candidate in models if candidate not in usable]
+        logger.info(f"Skipping models whose context window is too small for this prompt: {', '.join(dropped)}")
+    
+    if not usable:
+        for strategy in route.get("overflow") or []:
+            if strategy == "larger_model" and route.get("overflow_model"):
+                usable = fitting([route["overflow_model"]])
+            elif strategy == "trim" and route.get("trim") in variables:
+                name, model = route["trim"], models[0]
+                excess = count_message_tokens(messages, model) + completion_tokens - context_window(model, windows)
+                keep = count_tokens(str(variables[name]), model) - excess
+                trimmed = trim_value(variables[name], keep, lambda text: count_tokens(text, model))
+                messages = build_messages(prompt_template, {**variables, name: trimmed}, system_template)
+                usable = fitting(models)
+            if usable:
+                logger.warning(f"Prompt too long for {models[0]}, used the {strategy} overflow strategy")
+                break
+    
+    if not usable:
+        tokens = count_message_tokens(messages, models[0]) + completion_tokens
+        limit = context_window(models[0], windows)
+        raise ContextOverflowError(
+            f"Prompt and completion need about {tokens} tokens, more than the {limit} token context of {models[0]}",
+            tokens,
+            limit
+        )
+    
+    return messages, usable, count_message_tokens(messages, usable[0]), strategy
+
 def get_completion(
     prompt_template: str,
     variables: Dict[str, Any],
     model: Optional[str] = None,
-    temperature: float = 0.7,
-    max_tokens: int = 4000
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    system_template: Optional[str] = None,
+    node: Optional[str] = None,
+    fast: bool = False,
+    response_format: Optional[Dict[str, Any]] = None
 ) -> str:
     """Get a completion from OpenAI.
     
+    Static content (instructions and guides) belongs in `system_template`. It is
+    sent as the first message so that it forms a prefix that stays identical
+    across calls, which lets the provider serve it from its prompt cache.
+    
+    The model, temperature and max_tokens come from the node's route in
+    `config/models.yaml` unless given explicitly. If the model is rate limited,
+    the route's fallback models are tried in order.
+    
+    The prompt's tokens are counted before the call and checked against the
+    models' context windows (see `fit_context`), so a prompt that is too long
+    is trimmed, sent to a larger model or rejected without a round trip.
+    
     Args:
-        prompt_template: The prompt template to use
-        variables: The variables to substitute into the prompt template
-        model: The model to use (defaults to DEFAULT_MODEL)
-        temperature: The temperature to use
-        max_tokens: The maximum number of tokens to generate
+        prompt_template: The prompt template to use for the per-call content
+        variables: The variables to substitute into the prompt templates
+        model: The model to use (defaults to the node's route)
+        temperature: The temperature to use (defaults to the node's route)
+        max_tokens: The maximum number of tokens to generate (defaults to the node's route)
+        system_template: Optional template for the static system prefix
+        node: Name of the calling node, used for routing and to report usage per node
+        fast: Whether the thread runs in fast mode
+        response_format: Output format passed to the API (e.g. {"type": "json_object"})
         
     Returns:
         completion: The generated completion
     """
     try:
-        # Format the prompt with the provided variables
-        prompt = prompt_template.format(**variables)
-        
-        # Log the formatted prompt for debugging (in a production system, you might want to sanitize this)
-        logger.debug(f"Formatted prompt: {prompt}")
-        
-        # Call the OpenAI API
-        response = client.chat.completions.create(
-            model=model or DEFAULT_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens
+        route = resolve_route(node, fast)
+        models = list(dict.fromkeys([model or route["model"], *route.get("fallbacks", [])]))
+        max_tokens = route["max_tokens"] if max_tokens is None else max_tokens
+        options = {"response_format": response_format} if response_format else {}
+        
+        # Format the prompt and check it fits before sending it
+        messages, models, counted, strategy = fit_context(
+            prompt_template, variables, system_template, models, max_tokens, route
+        )
+        record_preflight(node or "unknown", counted, strategy)
+        prompt = messages[-1]["content"]
+        
+        # Call the OpenAI API, falling back to the next model when rate limited.
+        # The prompt is traced as it is; it is only formatted if the trace is dumped.
+        with tracer.span("completion", node=node, prompt=prompt, counted_tokens=counted) as span:
+            for attempt, candidate in enumerate(models):
+                try:
+                    response = get_client().chat.completions.create(
+                        model=candidate,
+                        messages=messages,
+                        temperature=route["temperature"] if temperature is None else temperature,
+                        max_tokens=max_tokens,
+                        **options
+                    )
+                    break
+                except RateLimitError:
+                    if attempt == len(models) - 1:
+                        raise
+                    logger.warning(f"{candidate} is rate limited, falling back to {models[attempt + 1]}")
+            usage = extract_usage(response)
+            span.set(model=candidate, **usage)
+        
+        # Record how much of the prompt was served from the provider's cache
+        record_usage(node or "unknown", usage)
+        logger.info(
+            f"Completion for {node or 'unknown'} with {candidate}: {usage['prompt_tokens']} prompt tokens "
+            f"({usage['cached_tokens']} cached), {usage['completion_tokens']} completion tokens"
         )
         
         # Extract and return the completion
@@ -58,4 +324,4 @@ def get_completion(
         return completion
     except Exception as e:
         logger.error(f"Error in get_completion: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -1,46 +1,365 @@
+import os
+import time
 import logging
-from typing import List, Dict, Any
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional
 
 from duckduckgo_search import DDGS
 
+from services.fetch import fetch_pages
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def search_internet(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+# Providers to use, in order of preference (comma separated); Tavily is added
+# after DuckDuckGo when TAVILY_API_KEY is set
+SEARCH_PROVIDERS = os.getenv("SEARCH_PROVIDERS", "")
+
+# Seconds a provider gets per request, and a whole search gets at most
+PROVIDER_TIMEOUT = 10.0
+SEARCH_TIMEOUT = 15.0
+
+# Hedge delay used until a provider has enough latency samples
+DEFAULT_HEDGE_DELAY = 2.0
+MIN_LATENCY_SAMPLES = 5
+
+# Circuit breaker settings
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 60.0
+
+class SearchProvider(ABC):
+    """A search backend. Subclasses implement `search` and raise on failure."""
+
+    name = "provider"
+
+    @abstractmethod
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Search for a query.
+
+        Args:
+            query: The search query
+            max_results: Maximum number of results to return
+
+        Returns:
+            results: Results with "title", "body", "url" and "source"
+        """
+
+class DuckDuckGoProvider(SearchProvider):
+    """DuckDuckGo text search (no API key needed)."""
+
+    name = "duckduckgo"
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        raw_results = list(DDGS(timeout=PROVIDER_TIMEOUT).text(query, max_results=max_results))
+        return [
+            {
+                "title": result.get("title", ""),
+                "body": result.get("body", ""),
+                "url": result.get("href", ""),
+                "source": "internet_search"
+            }
+            for result in raw_results
+        ]
+
+class TavilyProvider(SearchProvider):
+    """Tavily search API (needs TAVILY_API_KEY)."""
+
+    name = "tavily"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key or os.getenv("TAVILY_API_KEY")
+        self._client = None
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        if self._client is None:
+            from tavily import TavilyClient
+            self._client = TavilyClient(api_key=self.api_key)
+
+        response = self._client.search(query, max_results=max_results, timeout=PROVIDER_TIMEOUT)
+        return [
+            {
+                "title": result.get("title", ""),
+                "body": result.get("content", ""),
+                "url": result.get("url", ""),
+                "source": "internet_search"
+            }
+            for result in response.get("results", [])
+        ]
+
+class StubSearchProvider(SearchProvider):
+    """Local provider returning placeholder results, for offline development."""
+
+    name = "stub"
+
+    def search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "title": f"{query} (offline result {i + 1})",
+                "body": f"Placeholder search result {i + 1} about {query}.",
+                "url": "",
+                "source": "internet_search"
+            }
+            for i in range(min(max_results, 3))
+        ]
+
+PROVIDERS = {
+    "duckduckgo": DuckDuckGoProvider,
+    "tavily": TavilyProvider,
+    "stub": StubSearchProvider
+}
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures.
+
+    After `failure_threshold` consecutive failures the breaker opens and the
+    provider is skipped. Once `reset_timeout` seconds have passed, one trial
+    request is let through: success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """The breaker state: closed, open or half-open."""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+class LatencyTracker:
+    """Recent successful request latencies of a provider."""
+
+    def __init__(self, window: int = 50):
+        self._samples: "deque[float]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        """The 95th percentile latency, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+class HedgedSearch:
+    """Search across providers with hedged requests and circuit breakers.
+
+    The first available provider is asked first. If it has not answered
+    within its p95 latency (the hedge delay), or fails, the next provider is
+    started as well, and the first non-empty answer wins. Providers whose
+    circuit breaker is open are skipped without a request.
+    """
+
+    def __init__(
+        self,
+        providers: List[SearchProvider],
+        timeout: float = SEARCH_TIMEOUT,
+        default_hedge_delay: float = DEFAULT_HEDGE_DELAY,
+        breaker_options: Optional[Dict[str, Any]] = None
+    ):
+        self.providers = providers
+        self.timeout = timeout
+        self.default_hedge_delay = default_hedge_delay
+        self.breakers = {provider.name: CircuitBreaker(**(breaker_options or {})) for provider in providers}
+        self.latencies = {provider.name: LatencyTracker() for provider in providers}
+        self._executor = ThreadPoolExecutor(max_workers=max(2, 2 * len(providers)), thread_name_prefix="search")
+
+    def hedge_delay(self, provider: SearchProvider) -> float:
+        """Seconds to wait for a provider before asking the next one."""
+        p95 = self.latencies[provider.name].p95()
+        return self.default_hedge_delay if p95 is None else p95
+
+    def search(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+        """Search with the available providers.
+
+        Args:
+            query: The search query
+            max_results: Maximum number of results to return
+
+        Returns:
+            results: The first non-empty results, tagged with their "provider"
+                ([] if every provider failed or the search timed out)
+        """
+        candidates = iter(provider for provider in self.providers if self.breakers[provider.name].allow())
+        deadline = time.monotonic() + self.timeout
+        running: Dict[Future, SearchProvider] = {}
+
+        def start_next() -> Optional[SearchProvider]:
+            provider = next(candidates, None)
+            if provider is not None:
+                running[self._executor.submit(self._call, provider, query, max_results)] = provider
+            return provider
+
+        if start_next() is None:
+            logger.warning("No search provider is available (all circuit breakers are open)")
+            return []
+
+        while running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            # Hedge: wait for the newest request's p95 before starting another
+            newest = list(running.values())[-1]
+            done, _ = wait(list(running), timeout=min(remaining, self.hedge_delay(newest)), return_when=FIRST_COMPLETED)
+
+            if not done:
+                hedge = start_next()
+                if hedge is not None:
+                    logger.info(f"{newest.name} is slow, also asking {hedge.name}")
+                continue
+
+            for future in done:
+                provider = running.pop(future)
+                results = future.result()
+                if results:
+                    logger.info(f"Search answered by {provider.name} with {len(results)} results")
+                    return [{**result, "provider": provider.name} for result in results]
+
+                # The request failed or found nothing; try the next provider now
+                start_next()
+
+        logger.warning(f"No search provider returned results for: {query}")
+        return []
+
+    def _call(self, provider: SearchProvider, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Run one provider request, recording its latency and outcome."""
+        start = time.monotonic()
+        try:
+            results = provider.search(query, max_results)
+        except Exception as e:
+            self.breakers[provider.name].record_failure()
+            logger.warning(f"Search provider {provider.name} failed: {str(e)}")
+            return []
+
+        self.breakers[provider.name].record_success()
+        self.latencies[provider.name].record(time.monotonic() - start)
+        return results
+
+def create_search(names: Optional[List[str]] = None) -> HedgedSearch:
+    """Create a hedged search over the named providers.
+
+    Args:
+        names: Provider names in order of preference; defaults to
+            SEARCH_PROVIDERS, or DuckDuckGo followed by Tavily if
+            TAVILY_API_KEY is set
+
+    Returns:
+        search: The hedged search
+    """
+    if names is None:
+        names = [name.strip() for name in SEARCH_PROVIDERS.split(",") if name.strip()]
+    if not names:
+        names = ["duckduckgo"] + (["tavily"] if os.getenv("TAVILY_API_KEY") else [])
+
+    unknown = [name for name in names if name not in PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown search providers: {', '.join(unknown)}")
+
+    return HedgedSearch([PROVIDERS[name]() for name in names])
+
+# Shared search, created on first use
+_search: Optional[HedgedSearch] = None
+_search_lock = threading.Lock()
+
+def get_search() -> HedgedSearch:
+    """Get the shared hedged search."""
+    global _search
+    with _search_lock:
+        if _search is None:
+            _search = create_search()
+        return _search
+
+def search_internet(query: str, max_results: int = 10, fetch_top: int = 0) -> List[Dict[str, Any]]:
     """Search the internet for relevant information.
-    
+
     Args:
         query: The search query
         max_results: Maximum number of results to return
-        
+        fetch_top: Number of top results whose full pages are fetched and
+            added as "content" (0 keeps only the snippets)
+
     Returns:
         results: A list of search results
     """
     try:
         logger.info(f"Searching internet for: {query}")
-        
-        # Initialize DuckDuckGo search
-        ddgs = DDGS()
-        
-        # Perform the search
-        raw_results = list(ddgs.text(query, max_results=max_results))
-        
-        # Format the results
-        results = [
-            {
-                "title": result.get("title", ""),
-                "body": result.get("body", ""),
-                "url": result.get("href", ""),
-                "source": "internet_search"
-            }
-            for result in raw_results
-        ]
-        
+
+        results = get_search().search(query, max_results)
+
         logger.info(f"Found {len(results)} search results")
-        
+
+        if fetch_top:
+            add_page_content(results[:fetch_top])
+
         return results
     except Exception as e:
         logger.error(f"Error in search_internet: {str(e)}")
         # Return an empty list if there's an error
-        return []
\ No newline at end of file
+        return []
+
+def add_page_content(results: List[Dict[str, Any]]) -> None:
+    """Fetch the pages of search results and add their text as "content".
+
+    Results whose page cannot be fetched keep only their snippet.
+
+    Args:
+        results: The search results to enrich (modified in place)
+    """
+    try:
+        pages = fetch_pages([result["url"] for result in results if result.get("url")])
+    except Exception as e:
+        logger.error(f"Error fetching result pages: {str(e)}")
+        return
+
+    fetched = 0
+    for result in results:
+        page = pages.get(result.get("url"))
+        if page and page["text"]:
+            result["content"] = page["text"]
+            fetched += 1
+
+    logger.info(f"Added page content to {fetched} of {len(results)} search results")
@@ -0,0 +1,119 @@
+import logging
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Callable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Context window used for models missing from the table in config/models.yaml
+DEFAULT_CONTEXT_WINDOW = 16385
+
+# Tokens the chat format adds per message, and once to prime the reply
+TOKENS_PER_MESSAGE = 3
+REPLY_PRIMING_TOKENS = 3
+
+# Encoding used for models tiktoken does not know
+FALLBACK_ENCODING = "o200k_base"
+
+class ContextOverflowError(Exception):
+    """Raised before a call whose prompt and completion cannot fit the context window of any allowed model."""
+
+    def __init__(self, message: str, tokens: int, limit: int):
+        super().__init__(message)
+        self.tokens = tokens
+        self.limit = limit
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text without a tokenizer (about four characters per token)."""
+    return len(text) // 4 + 1
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> Optional[Any]:
+    """Get the tiktoken encoding of a model, or None if tiktoken or its encoding files are unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed, estimating token counts from the text length")
+        return None
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        name = FALLBACK_ENCODING
+    except Exception as e:
+        # The encoding files are downloaded on first use
+        logger.warning(f"Could not load the tiktoken encoding for {model}, estimating token counts: {str(e)}")
+        return None
+
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"Could not load the {name} encoding, estimating token counts: {str(e)}")
+        return None
+
+def count_tokens(text: str, model: str) -> int:
+    """Count the tokens of a text for a model.
+
+    Uses the model's tiktoken encoding when it is available, and about four
+    characters per token otherwise.
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str) -> int:
+    """Count the prompt tokens of chat messages for a model, including the chat format's overhead."""
+    return sum(count_tokens(message["content"], model) + TOKENS_PER_MESSAGE for message in messages) + REPLY_PRIMING_TOKENS
+
+def context_window(model: str, windows: Optional[Dict[str, int]] = None) -> int:
+    """Context window of a model in tokens.
+
+    Args:
+        model: The model name
+        windows: Context windows by model name (a model missing from the
+            table uses the entry of the longest name it starts with, e.g.
+            "gpt-4o-2024-08-06" uses "gpt-4o")
+
+    Returns:
+        tokens: The model's context window
+    """
+    windows = windows or {}
+    if model in windows:
+        return windows[model]
+    prefixes = [name for name in windows if model.startswith(name)]
+    if prefixes:
+        return windows[max(prefixes, key=len)]
+    return windows.get("default", DEFAULT_CONTEXT_WINDOW)
+
+def trim_value(value: Any, tokens: int, count: Callable[[str], int]) -> Any:
+    """Shorten a prompt variable to about `tokens` tokens.
+
+    Lists lose items from the end; text is cut at the last space or line
+    break before the limit. Other values are returned unchanged.
+
+    Args:
+        value: The variable's value
+        tokens: The number of tokens to keep
+        count: Token counter for formatted text
+
+    Returns:
+        trimmed: The shortened value
+    """
+    if isinstance(value, list):
+        items = list(value)
+        while items and count(str(items)) > tokens:
+            items.pop()
+        return items
+
+    if not isinstance(value, str):
+        return value
+
+    text = value
+    while text and count(text) > tokens:
+        # Cut in proportion to the excess, then back to a line break or space
+        cut = int(len(text) * tokens / count(text) * 0.95)
+        cut = max(text.rfind("\n", 0, cut), text.rfind(" ", 0, cut), 0)
+        text = text[:cut].rstrip()
+    return text
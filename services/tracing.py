@@ -0,0 +1,251 @@
+import os
+import time
+import random
+import logging
+import functools
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Callable, Deque
+
+from langgraph.errors import GraphBubbleUp
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Share of root spans (e.g. node runs) that are traced: 0 turns tracing off
+DEFAULT_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+
+# Number of recent records kept in the ring buffer
+DEFAULT_CAPACITY = int(os.getenv("TRACE_BUFFER_SIZE", "512"))
+
+# Longest string value shown in a dump
+MAX_DUMP_CHARS = 300
+
+# Longest string kept as it is in a state digest (longer ones are hashed)
+MAX_DIGEST_CHARS = 80
+
+class Span:
+    """A traced operation: records its duration and the events inside it."""
+
+    __slots__ = ("tracer", "name", "fields", "parent", "start", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, fields: Dict[str, Any], parent: Optional["Span"]):
+        self.tracer = tracer
+        self.name = name
+        self.fields = fields
+        self.parent = parent
+        self.start = 0.0
+        self._token = None
+
+    def set(self, **fields: Any) -> None:
+        """Add fields to the span's record."""
+        self.fields.update(fields)
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        if exc is not None and not isinstance(exc, GraphBubbleUp):
+            self.fields["error"] = exc
+        self.tracer._record("span", self.name, self.fields, self, time.perf_counter() - self.start)
+
+class _NoSpan:
+    """Span used when tracing is off or the trace is not sampled; does nothing."""
+
+    __slots__ = ("_token",)
+
+    def set(self, **fields: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+class _UnsampledSpan(_NoSpan):
+    """Root span of a trace that was not sampled; keeps its children untraced too."""
+
+    def __enter__(self) -> "_UnsampledSpan":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+
+NO_SPAN = _NoSpan()
+
+# Span of the current context (None outside any span)
+_current_span: ContextVar[Optional[Any]] = ContextVar("current_span", default=None)
+
+def state_digest(state: Dict[str, Any]) -> Dict[str, Any]:
+    """A small summary of a state: scalars and short strings as they are, sizes and hashes of the rest.
+
+    Hashing a string is cached by Python, so digesting the same draft again is cheap.
+    """
+    digest = {}
+    for key, value in state.items():
+        if value is None or isinstance(value, (bool, int, float)):
+            digest[key] = value
+        elif isinstance(value, str) and len(value) <= MAX_DIGEST_CHARS:
+            digest[key] = value
+        elif isinstance(value, str):
+            digest[key] = f"str[{len(value)}]#{hash(value) & 0xffffffff:08x}"
+        elif isinstance(value, (list, tuple, dict)):
+            digest[key] = f"{type(value).__name__}[{len(value)}]"
+        else:
+            digest[key] = type(value).__name__
+    return digest
+
+def format_value(value: Any) -> str:
+    """Format a recorded value for a dump, shortening long strings."""
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) > MAX_DUMP_CHARS:
+        return f"{text[:MAX_DUMP_CHARS]!r}... ({len(text)} chars)"
+    return repr(text) if isinstance(value, str) else text
+
+class Tracer:
+    """Sampled tracing into a fixed-size ring buffer of recent records.
+
+    Spans (with their durations), events and state digests are kept as raw
+    values and only formatted when the buffer is dumped, which happens when
+    a node fails. With tracing off, `span` returns a shared no-op span and
+    `event` returns at once, so instrumented code pays one attribute check.
+    """
+
+    def __init__(self, sample_rate: float = DEFAULT_SAMPLE_RATE, capacity: int = DEFAULT_CAPACITY):
+        self.records: Deque[tuple] = deque(maxlen=capacity)
+        self.dumps = 0
+        self._lock = threading.Lock()
+        self.configure(sample_rate)
+
+    def configure(self, sample_rate: Optional[float] = None, capacity: Optional[int] = None) -> None:
+        """Change the sample rate (0 turns tracing off) or the buffer size."""
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+            self.enabled = self.sample_rate > 0
+        if capacity is not None:
+            with self._lock:
+                self.records = deque(self.records, maxlen=capacity)
+
+    def span(self, name: str, **fields: Any) -> Any:
+        """Start a span; use it as a context manager.
+
+        Whether a trace is recorded is decided at its root span; spans and
+        events inside an unsampled root are skipped too.
+        """
+        if not self.enabled:
+            return NO_SPAN
+        parent = _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _UnsampledSpan()
+        elif not isinstance(parent, Span):
+            return NO_SPAN
+        return Span(self, name, fields, parent)
+
+    def event(self, name: str, **fields: Any) -> None:
+        """Record an event in the current span.
+
+        Field values are stored as they are and formatted only if the buffer
+        is dumped, so pass the objects rather than formatted strings.
+        """
+        if not self.enabled:
+            return
+        parent = _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return
+        elif not isinstance(parent, Span):
+            return
+        self._record("event", name, fields, parent)
+
+    def state(self, name: str, state: Dict[str, Any]) -> None:
+        """Record a digest of a state (see `state_digest`) in the current span."""
+        if not self.enabled:
+            return
+        parent = _current_span.get()
+        if isinstance(parent, Span) or (parent is None and random.random() < self.sample_rate):
+            self._record("state", name, state_digest(state), parent)
+
+    def _record(self, kind: str, name: str, fields: Dict[str, Any], span: Optional[Span], duration: Optional[float] = None) -> None:
+        # deque.append is atomic, so recording needs no lock
+        self.records.append((time.time(), threading.current_thread().name, kind, name, fields, _span_path(span), duration))
+
+    def format_records(self, records: Optional[List[tuple]] = None) -> List[str]:
+        """Format records (by default the whole buffer) as lines of text, oldest first."""
+        lines = []
+        for timestamp, thread, kind, name, fields, path, duration in (self.records if records is None else records):
+            clock = time.strftime("%H:%M:%S", time.localtime(timestamp)) + f".{int(timestamp * 1000) % 1000:03d}"
+            took = f" {duration * 1000:.1f}ms" if duration is not None else ""
+            label = path if kind == "span" else "/".join(part for part in (path, name) if part)
+            details = " ".join(f"{key}={format_value(value)}" for key, value in fields.items())
+            lines.append(f"{clock} [{thread}] {kind} {label}{took} {details}".rstrip())
+        return lines
+
+    def dump(self, reason: str) -> str:
+        """Log the buffer's records and clear it.
+
+        Returns:
+            text: The dumped records
+        """
+        with self._lock:
+            records = list(self.records)
+            self.records.clear()
+            self.dumps += 1
+        text = "\n".join(self.format_records(records))
+        logger.error(f"Trace dump ({reason}), {len(records)} recent records:\n{text}")
+        return text
+
+def _span_path(span: Optional[Span]) -> str:
+    names = []
+    while isinstance(span, Span):
+        names.append(span.name)
+        span = span.parent
+    return "/".join(reversed(names))
+
+# Tracer shared by the agent and the services
+tracer = Tracer()
+
+def with_tracing(node: Callable, name: str) -> Callable:
+    """Wrap a node in a span recording the digests of its state and update.
+
+    The trace buffer is dumped when the node raises or returns an "error".
+
+    Args:
+        node: The node function
+        name: The node's name in the graph
+
+    Returns:
+        wrapped: The wrapped node function
+    """
+    @functools.wraps(node)
+    def wrapped(state, *args, **kwargs):
+        if not tracer.enabled:
+            return node(state, *args, **kwargs)
+
+        # The buffer is dumped after the node's span is closed, so it is included
+        try:
+            with tracer.span(name) as span:
+                tracer.state("input", state)
+                update = node(state, *args, **kwargs)
+                if isinstance(update, dict):
+                    tracer.state("update", update)
+                    if update.get("error"):
+                        span.set(error=update["error"])
+        except GraphBubbleUp:
+            raise
+        except Exception as e:
+            tracer.dump(f"{name} raised {type(e).__name__}: {str(e)}")
+            raise
+
+        if isinstance(update, dict) and update.get("error"):
+            tracer.dump(f"{name} failed: {update['error']}")
+        return update
+
+    return wrapped
@@ -1,9 +1,17 @@
 import os
+import re
+import uuid
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+from config import load_config
+from services.bm25 import BM25Index, reciprocal_rank_fusion, DEFAULT_RRF_K
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -13,6 +21,80 @@ logger = logging.getLogger(__name__)
 DEFAULT_COLLECTION = "content_library"
 DB_DIRECTORY = "chroma_db"
 
+# Settings file (collection, n_results, max_distance, hnsw, sharding)
+SETTINGS_FILE = "vector_db.yaml"
+
+# Maximum number of shards queried at once
+MAX_SHARD_WORKERS = 8
+
+# Keyword hits fetched per requested result when a filter may drop some
+KEYWORD_FILTER_FACTOR = 5
+
+# Keyword hits scoring below this share of the best one are left out of the fusion
+DEFAULT_KEYWORD_MIN_SCORE = 0.5
+
+# Documents read per request when building the keyword index from the library
+INDEX_PAGE_SIZE = 1000
+
+def to_cosine_distance(distance: float, space: str) -> float:
+    """Convert a distance in a collection's space to cosine distance.
+    
+    Assumes normalised embeddings, for which squared l2 distance is twice the
+    cosine distance and inner product distance equals it.
+    """
+    return distance / 2 if space == "l2" else distance
+
+def collection_space(collection: Any) -> str:
+    """The distance space of a collection ("cosine", "l2" or "ip")."""
+    configuration = getattr(collection, "configuration", None) or {}
+    hnsw = configuration.get("hnsw") or {}
+    return hnsw.get("space") or (collection.metadata or {}).get("hnsw:space", "l2")
+
+def shard_values(where: Optional[Dict[str, Any]], field: str) -> Optional[List[str]]:
+    """The shard field values a `where` filter restricts a query to.
+    
+    Returns:
+        values: The values of `field` allowed by an equality or "$in" filter
+            (at the top level or in an "$and"), or None if all shards match
+    """
+    if not where:
+        return None
+    if "$and" in where:
+        for clause in where["$and"]:
+            values = shard_values(clause, field)
+            if values is not None:
+                return values
+        return None
+    
+    condition = where.get(field)
+    if condition is None:
+        return None
+    if not isinstance(condition, dict):
+        return [str(condition)]
+    if "$eq" in condition:
+        return [str(condition["$eq"])]
+    if "$in" in condition:
+        return [str(value) for value in condition["$in"]]
+    return None
+
+def without_field(where: Optional[Dict[str, Any]], field: str) -> Optional[Dict[str, Any]]:
+    """A `where` filter with the conditions on `field` removed.
+    
+    Used once a query has been routed to the shards of the allowed values,
+    where the condition holds for every document and would only slow
+    ChromaDB's metadata filtering down.
+    """
+    if not where:
+        return None
+    if "$and" in where:
+        clauses = [clause for clause in (without_field(clause, field) for clause in where["$and"]) if clause]
+        if len(clauses) > 1:
+            return {"$and": clauses}
+        return clauses[0] if clauses else None
+    
+    remaining = {key: value for key, value in where.items() if key != field}
+    return remaining or None
+
 class VectorDBClient:
     _instance = None
     
@@ -22,71 +104,190 @@ class VectorDBClient:
             cls._instance._initialize()
         return cls._instance
     
-    def _initialize(self):
+    @classmethod
+    def open(
+        cls,
+        path: Optional[str] = DB_DIRECTORY,
+        settings: Optional[Dict[str, Any]] = None,
+        embedding_function: Optional[Any] = None
+    ) -> "VectorDBClient":
+        """Open a client of its own instead of the shared one.
+        
+        Args:
+            path: Directory of the database (None for an in-memory database)
+            settings: Settings overriding config/vector_db.yaml
+            embedding_function: ChromaDB embedding function (defaults to Chroma's own)
+        
+        Returns:
+            client: The vector DB client
+        """
+        instance = super(VectorDBClient, cls).__new__(cls)
+        instance._initialize(path, settings, embedding_function)
+        return instance
+    
+    def _initialize(
+        self,
+        path: Optional[str] = DB_DIRECTORY,
+        settings: Optional[Dict[str, Any]] = None,
+        embedding_function: Optional[Any] = None
+    ):
         """Initialize the ChromaDB client."""
         try:
-            # Make sure the DB directory exists
-            os.makedirs(DB_DIRECTORY, exist_ok=True)
-            
-            # Create the client
-            self.client = chromadb.PersistentClient(
-                path=DB_DIRECTORY,
-                settings=Settings(
-                    anonymized_telemetry=False
-                )
-            )
+            self.settings = {**(load_config(SETTINGS_FILE) or {}), **(settings or {})}
+            self.collection_name = self.settings.get("collection", DEFAULT_COLLECTION)
+            self.sharding = self.settings.get("sharding") or {}
+            
+            # Every collection uses the same embedding function, so a query is
+            # embedded once however many shards it searches
+            self.embedding_function = embedding_function or DefaultEmbeddingFunction()
+            
+            client_settings = Settings(anonymized_telemetry=False)
+            if path:
+                # Make sure the DB directory exists
+                os.makedirs(path, exist_ok=True)
+                self.client = chromadb.PersistentClient(path=path, settings=client_settings)
+            else:
+                self.client = chromadb.EphemeralClient(settings=client_settings)
+            
+            self._lock = threading.Lock()
+            self._executor = ThreadPoolExecutor(max_workers=MAX_SHARD_WORKERS, thread_name_prefix="vector-shard")
             
             # Get or create the default collection
-            try:
-                self.collection = self.client.get_collection(DEFAULT_COLLECTION)
-                logger.info(f"Using existing collection: {DEFAULT_COLLECTION}")
-            except ValueError:
-                self.collection = self.client.create_collection(
-                    name=DEFAULT_COLLECTION,
-                    metadata={"description": "Content library for the content writer agent"}
+            self.collection = self._get_collection(self.collection_name)
+            
+            # Find the existing shards
+            self._shards: Dict[str, Any] = {}
+            if self.sharding.get("enabled"):
+                prefix = f"{self.collection_name}-"
+                for collection in self.client.list_collections():
+                    name = getattr(collection, "name", collection)
+                    if name.startswith(prefix):
+                        self._shards[name[len(prefix):]] = self._get_collection(name)
+                logger.info(f"Found {len(self._shards)} library shards")
+            
+            # Keyword index over the same documents, for hybrid retrieval
+            self.keyword_index: Optional[BM25Index] = None
+            if (self.settings.get("hybrid") or {}).get("enabled"):
+                self.keyword_index = BM25Index(
+                    os.path.join(path, "bm25", self.collection_name) if path else None,
+                    **(self.settings.get("bm25") or {})
                 )
-                logger.info(f"Created new collection: {DEFAULT_COLLECTION}")
-                
+                self._sync_keyword_index()
         except Exception as e:
             logger.error(f"Error initializing ChromaDB: {str(e)}")
             raise
     
-    def query(self, query_text: str, n_results: int = 5) -> List[Dict[str, Any]]:
+    def _get_collection(self, name: str) -> Any:
+        """Get or create a collection with the configured HNSW parameters."""
+        hnsw = dict(self.settings.get("hnsw") or {})
+        collection = self.client.get_or_create_collection(
+            name=name,
+            configuration={"hnsw": hnsw} if hnsw else None,
+            metadata={"description": "Content library for the content writer agent"},
+            embedding_function=self.embedding_function
+        )
+        
+        # The search breadth can change after the collection was created
+        current = (getattr(collection, "configuration", None) or {}).get("hnsw") or {}
+        if "ef_search" in hnsw and current.get("ef_search") != hnsw["ef_search"]:
+            try:
+                collection.modify(configuration={"hnsw": {"ef_search": hnsw["ef_search"]}})
+            except Exception as e:
+                logger.warning(f"Could not update ef_search of {name}: {str(e)}")
+        
+        logger.info(f"Using collection: {name}")
+        return collection
+    
+    def _all_collections(self) -> List[Any]:
+        with self._lock:
+            return [self.collection] + list(self._shards.values())
+    
+    def _sync_keyword_index(self) -> None:
+        """Rebuild the keyword index if it does not cover the library (e.g. on first use)."""
+        collections = self._all_collections()
+        total = sum(collection.count() for collection in collections)
+        if len(self.keyword_index) == total:
+            return
+        
+        logger.info(f"Building the keyword index for {total} library documents")
+        self.keyword_index.clear()
+        for collection in collections:
+            for offset in range(0, collection.count(), INDEX_PAGE_SIZE):
+                page = collection.get(limit=INDEX_PAGE_SIZE, offset=offset, include=["documents"])
+                self.keyword_index.add([
+                    (document_id, collection.name, document or "")
+                    for document_id, document in zip(page["ids"], page["documents"])
+                ])
+        self.keyword_index.merge()
+    
+    def _shard(self, value: str) -> Any:
+        """Get the shard collection for a value of the shard field, creating it if needed."""
+        key = re.sub(r"[^a-zA-Z0-9._-]", "_", value)
+        with self._lock:
+            if key not in self._shards:
+                self._shards[key] = self._get_collection(f"{self.collection_name}-{key}")
+            return self._shards[key]
+    
+    def _collections_for(self, where: Optional[Dict[str, Any]]) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+        """The collections a query with this filter has to search, and the filter to search them with."""
+        if not self.sharding.get("enabled"):
+            return [self.collection], where
+        
+        field = self.sharding.get("field", "vertical")
+        values = shard_values(where, field)
+        with self._lock:
+            if values is None:
+                return [self.collection] + list(self._shards.values()), where
+            keys = [re.sub(r"[^a-zA-Z0-9._-]", "_", value) for value in values]
+            return [self._shards[key] for key in keys if key in self._shards], without_field(where, field)
+    
+    def query(
+        self,
+        query_text: str,
+        n_results: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None,
+        max_distance: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
         """Query the vector database.
         
         Args:
             query_text: The query text
-            n_results: Maximum number of results to return
-            
+            n_results: Maximum number of results to return (defaults to the config)
+            where: ChromaDB metadata filter, e.g. {"vertical": "seo"} or
+                {"$and": [{"language": "en"}, {"published": {"$gte": 1704067200}}]}
+                (dates need to be stored as numbers to be compared)
+            max_distance: Drop results further than this cosine distance from
+                the query (defaults to the config; float("inf") keeps all)
+        
         Returns:
-            results: A list of query results
+            results: A list of query results, closest first, each with its "distance"
         """
         try:
-            # Query the collection
-            raw_results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results
-            )
+            n_results = n_results or self.settings.get("n_results", 5)
+            if max_distance is None:
+                max_distance = self.settings.get("max_distance")
             
-            # Format the results
-            results = []
+            collections, where = self._collections_for(where)
+            if not collections:
+                return []
             
-            # Check if we have any results
-            if raw_results["documents"] and len(raw_results["documents"]) > 0:
-                documents = raw_results["documents"][0]  # Get the documents for the first (and only) query
-                metadatas = raw_results["metadatas"][0]  # Get the metadata for the first (and only) query
-                
-                for i, doc in enumerate(documents):
-                    metadata = metadatas[i] if i < len(metadatas) else {}
-                    
-                    results.append({
-                        "title": metadata.get("title", "Untitled Document"),
-                        "body": doc,
-                        "source": "vector_db",
-                        "metadata": metadata
-                    })
-            
-            logger.info(f"Found {len(results)} results in vector DB")
+            embedding = self.embedding_function([query_text])[0]
+            if len(collections) == 1:
+                found = self._query_collection(collections[0], embedding, n_results, where)
+            else:
+                # Search the shards in parallel and merge by distance
+                batches = self._executor.map(
+                    lambda collection: self._query_collection(collection, embedding, n_results, where),
+                    collections
+                )
+                found = sorted((result for batch in batches for result in batch), key=lambda result: result["distance"])
+            
+            results = [
+                result for result in found
+                if max_distance is None or result["distance"] <= max_distance
+            ][:n_results]
+            
+            logger.info(f"Found {len(results)} results in vector DB ({len(found) - len(results)} too distant or beyond n_results)")
             
             return results
         except Exception as e:
@@ -94,34 +295,138 @@ class VectorDBClient:
             # Return an empty list if there's an error
             return []
     
+    def keyword_query(
+        self,
+        query_text: str,
+        n_results: Optional[int] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Query the library's BM25 keyword index.
+        
+        Args:
+            query_text: The query text
+            n_results: Maximum number of results to return (defaults to the config)
+            where: ChromaDB metadata filter, applied to the keyword hits
+        
+        Returns:
+            results: A list of query results, best first, each with its "bm25" score
+        """
+        if self.keyword_index is None:
+            return []
+        
+        try:
+            n_results = n_results or self.settings.get("n_results", 5)
+            hits = self.keyword_index.search(query_text, n_results * KEYWORD_FILTER_FACTOR if where else n_results)
+            if not hits:
+                return []
+            
+            # Fetch the documents (and apply the filter) per collection
+            ids_by_collection: Dict[str, List[str]] = {}
+            for document_id, collection_name, _ in hits:
+                ids_by_collection.setdefault(collection_name, []).append(document_id)
+            collections = {collection.name: collection for collection in self._all_collections()}
+            found = {}
+            for collection_name, ids in ids_by_collection.items():
+                if collection_name not in collections:
+                    continue
+                page = collections[collection_name].get(ids=ids, where=where or None, include=["documents", "metadatas"])
+                for document_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                    found[(document_id, collection_name)] = (document, metadata or {})
+            
+            results = []
+            for document_id, collection_name, score in hits:
+                if (document_id, collection_name) not in found:
+                    continue
+                document, metadata = found[(document_id, collection_name)]
+                results.append({
+                    "id": document_id,
+                    "title": metadata.get("title", "Untitled Document"),
+                    "body": document,
+                    "source": "vector_db",
+                    "metadata": metadata,
+                    "bm25": score
+                })
+            return results[:n_results]
+        except Exception as e:
+            logger.error(f"Error querying keyword index: {str(e)}")
+            return []
+    
+    def _query_collection(
+        self,
+        collection: Any,
+        embedding: Any,
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Query one collection with a query embedding."""
+        count = collection.count()
+        if not count:
+            return []
+        
+        raw_results = collection.query(
+            query_embeddings=[embedding],
+            n_results=min(n_results, count),
+            where=where or None,
+            include=["documents", "metadatas", "distances"]
+        )
+        
+        # Format the results of the first (and only) query
+        space = collection_space(collection)
+        ids = (raw_results.get("ids") or [[]])[0]
+        documents = (raw_results.get("documents") or [[]])[0]
+        metadatas = (raw_results.get("metadatas") or [[]])[0]
+        distances = (raw_results.get("distances") or [[]])[0]
+        
+        results = []
+        for i, doc in enumerate(documents):
+            metadata = (metadatas[i] if i < len(metadatas) else None) or {}
+            results.append({
+                "id": ids[i] if i < len(ids) else None,
+                "title": metadata.get("title", "Untitled Document"),
+                "body": doc,
+                "source": "vector_db",
+                "metadata": metadata,
+                "distance": to_cosine_distance(distances[i], space) if i < len(distances) else 0.0
+            })
+        return results
+    
     def add_document(
-        self, 
-        document: str, 
+        self,
+        document: str,
         metadata: Dict[str, Any],
         document_id: Optional[str] = None
     ) -> str:
         """Add a document to the vector database.
         
+        With sharding enabled, the document goes to the shard of its value of
+        the shard field, or to the main collection if it has none.
+        
         Args:
             document: The document text
             metadata: Metadata for the document
             document_id: Optional ID for the document
-            
+        
         Returns:
             id: The ID of the added document
         """
         try:
             # Generate a document ID if not provided
             if document_id is None:
-                import uuid
                 document_id = str(uuid.uuid4())
             
+            collection = self.collection
+            shard_value = metadata.get(self.sharding.get("field", "vertical"))
+            if self.sharding.get("enabled") and shard_value is not None:
+                collection = self._shard(str(shard_value))
+            
             # Add the document
-            self.collection.add(
+            collection.add(
                 documents=[document],
                 metadatas=[metadata],
                 ids=[document_id]
             )
+            if self.keyword_index is not None:
+                self.keyword_index.add([(document_id, collection.name, document)])
             
             logger.info(f"Added document with ID: {document_id}")
             
@@ -130,25 +435,96 @@ class VectorDBClient:
             logger.error(f"Error adding document to vector DB: {str(e)}")
             raise
 
-def query_vector_db(query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+    def add_documents(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        document_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add several documents to the vector database in one call per collection.
+        
+        Documents whose ID is already in the library replace the stored ones.
+        
+        Args:
+            documents: The document texts
+            metadatas: Metadata for each document
+            document_ids: Optional IDs for the documents
+        
+        Returns:
+            ids: The IDs of the added documents
+        """
+        try:
+            if document_ids is None:
+                document_ids = [str(uuid.uuid4()) for _ in documents]
+            
+            # Group the documents by the collection they belong in
+            field = self.sharding.get("field", "vertical")
+            batches: Dict[int, Any] = {}
+            for document, metadata, document_id in zip(documents, metadatas, document_ids):
+                collection = self.collection
+                if self.sharding.get("enabled") and metadata.get(field) is not None:
+                    collection = self._shard(str(metadata[field]))
+                batch = batches.setdefault(id(collection), (collection, [], [], []))
+                batch[1].append(document)
+                batch[2].append(metadata)
+                batch[3].append(document_id)
+            
+            for collection, batch_documents, batch_metadatas, batch_ids in batches.values():
+                collection.upsert(documents=batch_documents, metadatas=batch_metadatas, ids=batch_ids)
+                if self.keyword_index is not None:
+                    self.keyword_index.add([
+                        (document_id, collection.name, document)
+                        for document_id, document in zip(batch_ids, batch_documents)
+                    ])
+            
+            logger.info(f"Added {len(document_ids)} documents to {len(batches)} collections")
+            
+            return document_ids
+        except Exception as e:
+            logger.error(f"Error adding documents to vector DB: {str(e)}")
+            raise
+
+def query_vector_db(query: str, n_results: Optional[int] = None, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
     """Query the vector database for relevant documents.
     
+    With hybrid retrieval enabled, the top candidates of the vector search
+    and of the BM25 keyword index are merged by reciprocal rank fusion, so
+    documents with the query's exact names, acronyms or figures are found
+    even when their embeddings are not the closest.
+    
     Args:
         query: The query text
-        n_results: Maximum number of results to return
-        
+        n_results: Maximum number of results to return (defaults to the config)
+        where: Optional ChromaDB metadata filter (e.g. {"vertical": "seo"})
+    
     Returns:
         results: A list of query results
     """
     try:
         # Get the vector DB client
         client = VectorDBClient()
+        n_results = n_results or client.settings.get("n_results", 5)
+        hybrid = client.settings.get("hybrid") or {}
+        
+        if not hybrid.get("enabled"):
+            return client.query(query, n_results=n_results, where=where)
+        
+        # Rank fusion needs more than the final number of candidates from each side
+        candidates = max(n_results, hybrid.get("candidates", n_results))
+        vector_results = client.query(query, n_results=candidates, where=where)
+        keyword_results = client.keyword_query(query, n_results=candidates, where=where)
+        
+        # Rank fusion ignores scores, so weak keyword hits (documents sharing
+        # only the query's common words) would outvote a dominant exact match
+        if keyword_results:
+            cutoff = hybrid.get("keyword_min_score", DEFAULT_KEYWORD_MIN_SCORE) * keyword_results[0]["bm25"]
+            keyword_results = [result for result in keyword_results if result["bm25"] >= cutoff]
+        results = reciprocal_rank_fusion([vector_results, keyword_results], hybrid.get("rrf_k", DEFAULT_RRF_K))[:n_results]
         
-        # Query the vector DB
-        results = client.query(query, n_results=n_results)
+        logger.info(f"Hybrid retrieval: {len(vector_results)} vector and {len(keyword_results)} keyword candidates fused into {len(results)} results")
         
         return results
     except Exception as e:
         logger.error(f"Error in query_vector_db: {str(e)}")
         # Return an empty list if there's an error
-        return []
\ No newline at end of file
+        return []
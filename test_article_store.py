@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Tests for the indexed article store and its content library writer.
+"""
+
+import os
+import uuid
+
+from langgraph.types import Command
+
+from agent.graph import create_agent, get_thread_config
+from services.article_store import ArticleStore, LibraryWriter, open_article_store
+from services.fakes import FakeVectorDBClient, HashedEmbeddingFunction, use_fake_services
+from services.vector_db import VectorDBClient
+
+ARTICLE = "# Composting at Home\n\nTurn kitchen scraps into rich garden soil.\n"
+
+def test_versions_are_indexed_without_overwriting(tmp_path):
+    """Topics with the same file name keep separate files, and repeated content is stored once."""
+    store = ArticleStore(str(tmp_path))
+
+    first = store.save(ARTICLE, "SEO: tips", 1, thread_id="a", token_usage={"total_tokens": 1200})
+    second = store.save(ARTICLE.replace("rich", "dark"), "SEO tips", 1, thread_id="b")
+    repeat = store.save(ARTICLE, "SEO: tips", 2)
+
+    assert first["path"] != second["path"]
+    assert open(first["path"]).read() == ARTICLE
+    assert repeat["duplicate"] and repeat["id"] == first["id"]
+    assert store.save("# Next\n\nMore.", "SEO: tips")["version"] == 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    assert [article["topic"] for article in store.list_articles()] == ["SEO: tips", "SEO tips", "SEO: tips"]
+    assert [article["version"] for article in store.list_articles(topic="SEO: tips")] == [2, 1]
+    assert store.get(first["id"])["total_tokens"] == 1200
+
+    results = store.search("dark garden")
+    assert [article["thread_id"] for article in results] == ["b"]
+    assert "dark" in results[0]["snippet"]
+
+def test_final_articles_are_batched_into_the_library(tmp_path):
+    """Finalised articles are upserted in one batch, replacing the earlier version of the same thread."""
+    library = VectorDBClient.open(None, {"collection": f"test-{uuid.uuid4().hex[:8]}"}, HashedEmbeddingFunction())
+    writer = LibraryWriter(library, flush_interval=5)
+    store = ArticleStore(str(tmp_path), writer)
+
+    store.save(ARTICLE, "composting", 1, thread_id="t1")
+    store.save(ARTICLE, "composting", 1, thread_id="t1", final=True)
+    store.save("# Worm Bins\n\nWorms compost scraps in small flats.", "worm bins", 1, thread_id="t2", final=True)
+    store.save("# Worm Bins\n\nWorms compost kitchen scraps in flats.", "worm bins", 2, thread_id="t2", final=True)
+    assert writer.flush(timeout=10)
+
+    assert writer.stats["batches"] == 1
+    assert library.collection.count() == 2
+    assert "kitchen" in library.query("worm bins", n_results=1)[0]["body"]
+    assert all(article["indexed_at"] for article in store.list_articles(final_only=True))
+    assert store.index_pending() == 0
+    writer.close()
+
+def test_finalised_article_is_saved_and_found_by_research(tmp_path):
+    """The final node saves the article with its token cost, and later research can find it."""
+    graph, thread_id = create_agent({"article_store": str(tmp_path)})
+    config = get_thread_config(thread_id)
+    library = FakeVectorDBClient()
+
+    with use_fake_services(vector_db=library):
+        list(graph.stream({"topic": "content marketing"}, config=config))
+        list(graph.stream(Command(resume="none"), config=config))
+        assert open_article_store(str(tmp_path)).library_writer.flush(timeout=10)
+
+    state = graph.get_state(config).values
+    saved = state["saved_article"]
+    assert open(saved["path"]).read() == state["final_article"]
+
+    article = open_article_store(str(tmp_path)).list_articles(thread_id=thread_id)[0]
+    assert article["total_tokens"] == state["token_usage"]["total_tokens"] > 0
+    assert article["finalized_at"] and article["indexed_at"]
+    assert library.documents[-1] == state["final_article"]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Tests for the content-addressed blob store and its use from the graph state.
+"""
+
+import pytest
+from langgraph.types import Command
+
+from agent.blobs import is_blob_ref, resolve
+from agent.graph import create_agent, get_thread_config
+from agent.state import FeedbackType
+from services.blob_store import LocalBlobStore, SQLiteBlobStore, open_blob_store
+from services.fakes import FakeOpenAIClient, use_fake_services
+
+@pytest.mark.parametrize("store_type", ["disk", "sqlite"])
+def test_blob_store_round_trip_and_dedupe(tmp_path, store_type):
+    """Values are stored once by digest and read back unchanged."""
+    if store_type == "disk":
+        store = LocalBlobStore(str(tmp_path / "blobs"))
+    else:
+        store = SQLiteBlobStore(str(tmp_path / "blobs.db"))
+
+    value = [{"title": "Result", "body": "x" * 2000}]
+    digest = store.put(value)
+
+    assert digest.startswith("sha256:")
+    assert store.put(value) == digest
+    assert digest in store
+    assert store.get(digest) == value
+
+    # A fresh store at the same location reads the value from storage
+    reopened = LocalBlobStore(store.directory) if store_type == "disk" else SQLiteBlobStore(store.path)
+    assert reopened.get(digest) == value
+
+    with pytest.raises(KeyError):
+        store.get("sha256:missing")
+
+def test_graph_state_keeps_only_digests(tmp_path):
+    """Large fields are replaced by references in the checkpointed state."""
+    uri = f"sqlite:///{tmp_path}/blobs.db"
+    graph, thread_id = create_agent({"blob_store": uri})
+    config = get_thread_config(thread_id)
+
+    with use_fake_services(FakeOpenAIClient(sentences=40)):
+        for payload in [{"topic": "testing"}, Command(resume=FeedbackType.HUMAN)]:
+            chunks = list(graph.stream(payload, config=config))
+
+        # The interrupt payload references the draft rather than embedding it
+        review = chunks[-1]["__interrupt__"][0].value
+        assert is_blob_ref(review["draft"])
+
+        for _ in graph.stream(Command(resume="Add an example"), config=config):
+            pass
+
+    values = graph.get_state(config).values
+    assert is_blob_ref(values["draft"])
+    assert is_blob_ref(values["combined_research"])
+    assert values["draft_version"] == 2
+
+    draft = resolve(values["draft"], open_blob_store(uri))
+    assert draft.startswith("# A Practical Guide")
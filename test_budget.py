@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Tests for per-thread token accounting and the token budget.
+"""
+
+from concurrent.futures import wait
+
+import pytest
+from langgraph.types import Command
+
+import agent.speculative as speculative
+from agent.budget import ECONOMY_TOP_K, budget_mode, ECONOMY
+from agent.graph import create_agent, get_thread_config
+from agent.personas import load_personas
+from agent.recovery import FatalNodeError, failed_node
+from agent.state import FeedbackType
+from agent.utils import split_sections
+from services.fakes import use_fake_services
+from services.llm import resolve_route
+
+def start(budget=None):
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+    list(graph.stream({"topic": "seo", "token_budget": budget}, config=config))
+    return graph, config
+
+def spend(graph, config, tokens):
+    """Record usage from outside the graph, as if earlier rounds had used it."""
+    graph.update_state(config, {"token_usage": {"total_tokens": tokens}})
+
+def test_usage_is_accumulated_in_state():
+    with use_fake_services() as client:
+        graph, config = start()
+        list(graph.stream(Command(resume=FeedbackType.HUMAN), config=config))
+        list(graph.stream(Command(resume="Shorter intro."), config=config))
+
+    usage = graph.get_state(config).values["token_usage"]
+    assert usage["calls"] == len(client.calls) == 3
+    assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"] > 0
+
+def test_economy_mode_uses_fewer_personas_cheaper_models_and_section_updates():
+    with use_fake_services() as client:
+        graph, config = start(budget=100000)
+        draft = graph.get_state(config).values["draft"]
+        spend(graph, config, 76000)
+        assert budget_mode(graph.get_state(config).values) == ECONOMY
+
+        calls = len(client.calls)
+        chunks = list(graph.stream(Command(resume=FeedbackType.PERSONA), config=config))
+        suggestions = chunks[-1]["__interrupt__"][0].value["suggestions"]
+        pinned = load_personas()[1].get("always_include", [])
+        assert len(suggestions) <= ECONOMY_TOP_K + len(pinned)
+        assert {call["model"] for call in client.calls[calls:]} == {resolve_route("persona_review", fast=True)["model"]}
+
+        list(graph.stream(Command(resume=[suggestions[0]["persona"]]), config=config))
+
+    update = client.calls[-1]
+    assert "Section Update Task" in update["messages"][0]["content"]
+    assert update["model"] == resolve_route("update_draft", fast=True)["model"]
+
+    # Only one section of the draft changed
+    before, after = split_sections(draft), split_sections(graph.get_state(config).values["draft"])
+    assert len(before) == len(after)
+    assert sum(a != b for a, b in zip(before, after)) == 1
+
+def test_exhausted_budget_only_allows_finalizing():
+    with use_fake_services() as client:
+        graph, config = start(budget=100000)
+        spend(graph, config, 100000)
+        calls = len(client.calls)
+
+        # The pending action is re-evaluated on resume, and asked again
+        chunks = list(graph.stream(Command(resume=FeedbackType.PERSONA), config=config))
+        waiting = chunks[-1]["__interrupt__"][0].value
+        assert waiting["options"] == [FeedbackType.NONE.value]
+        assert "persona is not available" in waiting["error"]
+        assert [task.name for task in graph.get_state(config).tasks] == ["await_editor_action"]
+        assert "final_article" not in graph.get_state(config).values
+
+        list(graph.stream(Command(resume=FeedbackType.NONE), config=config))
+
+    assert len(client.calls) == calls
+    assert graph.get_state(config).values["final_article"]
+
+def test_draft_is_not_started_without_enough_budget():
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+    with use_fake_services() as client, pytest.raises(FatalNodeError, match="Token budget too small"):
+        list(graph.stream({"topic": "seo", "token_budget": 1000}, config=config))
+
+    # The graph halts at the draft instead of carrying on without one
+    assert failed_node(graph, config)["node"] == "write_draft"
+    assert "draft" not in graph.get_state(config).values
+    assert all("Content Creation Task" not in call["messages"][0]["content"] for call in client.calls)
+
+def test_unaffordable_update_keeps_the_draft_and_reports_why():
+    """An update the budget cannot cover leaves the draft for the editor instead of failing the node."""
+    with use_fake_services() as client:
+        graph, config = start(budget=100000)
+        used = graph.get_state(config).values["token_usage"]["total_tokens"]
+        spend(graph, config, 100000 - used - 10)
+        list(graph.stream(Command(resume=FeedbackType.HUMAN), config=config))
+        calls = len(client.calls)
+        list(graph.stream(Command(resume="Make it shorter."), config=config))
+
+    state = graph.get_state(config)
+    assert len(client.calls) == calls
+    assert state.values["draft_version"] == 1
+    assert "Token budget exhausted" in state.values["error"]
+    assert state.next == ("await_editor_action",)
+
+def test_wasted_speculative_reviews_count_against_the_budget():
+    """Reviews of superseded or finalized drafts are charged even though nobody used them."""
+    speculative._reviewer = None
+    graph, thread_id = create_agent({"speculative_reviews": True})
+    config = get_thread_config(thread_id)
+    reviewer = speculative.get_speculative_reviewer()
+
+    def finish_reviews():
+        entry = reviewer.take(thread_id, graph.get_state(config).values["draft"])
+        wait(entry["futures"].values())
+        return len(entry["futures"])
+
+    with use_fake_services() as client:
+        list(graph.stream({"topic": "seo", "token_budget": 100000}, config=config))
+        wasted = finish_reviews()
+        list(graph.stream(Command(resume=FeedbackType.HUMAN), config=config))
+        list(graph.stream(Command(resume="Shorter intro."), config=config))
+        wasted += finish_reviews()
+        list(graph.stream(Command(resume=FeedbackType.NONE), config=config))
+
+    usage = graph.get_state(config).values["token_usage"]
+    assert wasted > 0
+    assert usage["calls"] == len(client.calls) == 3 + wasted
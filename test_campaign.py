@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Tests for campaign mode.
+"""
+
+import pytest
+from langgraph.types import Command
+
+from agent.campaign import run_campaign, share_usage
+from agent.graph import get_thread_config
+from services.fakes import use_fake_services
+
+THEME = "email marketing"
+TOPICS = ["email subject lines", "email list segmentation", "email send times"]
+
+def calls_with(client, marker: str) -> list:
+    return [call for call in client.calls if marker in call["prompt"]]
+
+def test_campaign_researches_once_and_waits_for_persona_selection():
+    """The theme is synthesised once; every article is drafted, reviewed and waits for the editor."""
+    with use_fake_services() as client:
+        campaign = run_campaign(THEME, TOPICS)
+
+    assert len(calls_with(client, "Research Synthesis Task")) == 1
+    assert [article["topic"] for article in campaign["articles"]] == TOPICS
+    assert len({article["thread_id"] for article in campaign["articles"]}) == len(TOPICS)
+    for article in campaign["articles"]:
+        assert article["draft"]
+        assert article["interrupt"]["suggestions"]
+
+    # Each draft saw the shared research plus its own sources
+    drafts = calls_with(client, "Content Creation Task")
+    assert len(drafts) == len(TOPICS)
+    for topic in TOPICS:
+        assert sum(f"Sources specific to {topic}\n" in call["prompt"] for call in drafts) == 1
+
+def test_campaign_threads_continue_like_any_article():
+    """An article of a campaign is finished on its own thread with the same graph."""
+    with use_fake_services():
+        campaign = run_campaign(THEME, TOPICS[:2])
+        article = campaign["articles"][0]
+        graph = campaign["graph"]
+        config = get_thread_config(article["thread_id"])
+        persona = article["interrupt"]["suggestions"][0]["persona"]
+        list(graph.stream(Command(resume=[persona]), config=config))
+        state = graph.get_state(config)
+
+    assert state.values["topic"] == TOPICS[0]
+    assert state.values["draft_version"] == 2
+    assert state.next == ("await_editor_action",)
+
+def test_empty_campaign_is_rejected_before_research():
+    """A campaign with no topics fails before paying for the shared research."""
+    with use_fake_services() as client, pytest.raises(ValueError):
+        run_campaign(THEME, [])
+    assert client.calls == []
+
+def test_failed_article_does_not_hide_the_others():
+    """Each article is reported on its own, with the node a failed one stopped in."""
+    with use_fake_services() as client:
+        client.fail_next(f"Sources specific to {TOPICS[1]}\n", ValueError("bad draft"))
+        campaign = run_campaign(THEME, TOPICS)
+
+    articles = campaign["articles"]
+    assert [article["topic"] for article in articles] == TOPICS
+    assert all(article["thread_id"] for article in articles)
+    assert articles[1]["error"] == "bad draft"
+    assert articles[1]["failed_node"] == "write_draft"
+    assert articles[0]["error"] is None and articles[0]["draft"]
+    assert articles[2]["error"] is None and articles[2]["interrupt"]["suggestions"]
+
+def test_fast_path_profile_applies_to_the_shared_research():
+    """A campaign on the fast path drafts from the raw sources without a synthesis call."""
+    with use_fake_services() as client:
+        campaign = run_campaign(THEME, TOPICS[:2], config={"profile": "fast_path"})
+
+    assert calls_with(client, "Research Synthesis Task") == []
+    assert all(article["draft"] for article in campaign["articles"])
+
+def test_shared_usage_is_split_without_losing_tokens():
+    """The articles' shares of the shared research add up to what it cost."""
+    usage = {"calls": 2, "prompt_tokens": 1001, "completion_tokens": 202, "total_tokens": 1203}
+    shares = share_usage(usage, 3)
+
+    assert shares[0] == {"calls": 2, "prompt_tokens": 335, "completion_tokens": 68, "total_tokens": 403}
+    assert shares[1] == shares[2] == {"calls": 0, "prompt_tokens": 333, "completion_tokens": 67, "total_tokens": 400}
+    for key, value in usage.items():
+        assert sum(share[key] for share in shares) == value
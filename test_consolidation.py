@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Tests for consolidating persona suggestions.
+"""
+
+from agent.consolidation import split_items, consolidate_suggestions, format_consolidated
+
+SUGGESTIONS = [
+    {"persona": "SEO Specialist", "suggestion": "1. Add internal links to related articles.\n2. End with a clear call-to-action."},
+    {"persona": "Target Reader", "suggestion": "1. Add a statistic to the introduction to hook the reader.\n"
+                                               "2. End with a clear call-to-action that tells me what to do next."},
+    {"persona": "Content Editor", "suggestion": "- Open the introduction with a statistic to hook readers.\n"
+                                                "- End with a clear call-to-action."}
+]
+
+def test_split_items():
+    """List items are split apart and continuation lines stay with their item."""
+    assert split_items("1. First point\n   continued here\n2) Second point") == ["First point continued here", "Second point"]
+    assert split_items("One paragraph.\n\nAnother paragraph.") == ["One paragraph.", "Another paragraph."]
+
+def test_near_duplicates_are_merged_and_prioritised():
+    """Repeated advice becomes one item, tagged with every persona that raised it."""
+    items = consolidate_suggestions(SUGGESTIONS)
+
+    assert len(items) == 3
+    assert items[0] == {
+        "suggestion": "End with a clear call-to-action that tells me what to do next.",
+        "wordings": [],
+        "personas": ["SEO Specialist", "Target Reader", "Content Editor"]
+    }
+    assert items[1]["personas"] == ["Target Reader", "Content Editor"]
+    assert items[1]["wordings"] == ["Open the introduction with a statistic to hook readers."]
+    assert items[2]["personas"] == ["SEO Specialist"]
+
+    feedback = format_consolidated(items)
+    assert feedback.splitlines()[0].startswith("1. End with a clear call-to-action that tells me")
+    assert feedback.count("call-to-action") == 1
+    assert "   Also: Open the introduction with a statistic" in feedback
+
+def test_short_suggestions_are_not_absorbed_by_longer_ones():
+    """Opposite advice about the same thing stays separate, whatever its length."""
+    items = consolidate_suggestions([
+        {"persona": "Content Editor", "suggestion": "1. Cut the intro."},
+        {"persona": "Target Reader", "suggestion": "1. Expand the intro with a story."}
+    ])
+
+    assert [item["suggestion"] for item in items] == ["Cut the intro.", "Expand the intro with a story."]
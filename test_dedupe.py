@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Tests for near-duplicate suppression of research results.
+"""
+
+from agent.graph import create_agent, get_thread_config
+from services.dedupe import MinHasher, dedupe_results
+from services.fakes import FakeVectorDBClient, use_fake_services
+
+ARTICLE = (
+    "Content marketing is a strategic approach focused on creating and distributing valuable, relevant "
+    "and consistent content to attract and retain a clearly defined audience, and ultimately to drive "
+    "profitable customer action. Brands that publish helpful guides every week build trust with readers "
+    "who are searching for answers, and that trust turns into subscribers and customers over time."
+)
+
+def test_near_duplicates_are_dropped_with_provenance():
+    """A syndicated copy is dropped and recorded on the result that was kept."""
+    results = [
+        {"title": "Original", "body": ARTICLE, "url": "https://example.com/a", "source": "internet_search"},
+        {"title": "Unrelated", "body": "Composting turns kitchen scraps into soil for the garden.", "url": "https://example.com/b"},
+        {"title": "Syndicated", "body": ARTICLE.replace("every week", "each week"),
+         "url": "https://partner.example.org/a", "source": "internet_search"},
+        {"title": "Library chunk", "body": ARTICLE, "source": "vector_db"}
+    ]
+
+    kept, report = dedupe_results(results)
+
+    assert [result["title"] for result in kept] == ["Original", "Unrelated"]
+    assert [duplicate["title"] for duplicate in kept[0]["duplicates"]] == ["Syndicated", "Library chunk"]
+    assert kept[0]["duplicates"][0]["url"] == "https://partner.example.org/a"
+    assert report["duplicates"] == 2
+    assert report["tokens_removed"] > 100
+    assert "duplicates" not in results[0]
+
+def test_threshold_controls_what_counts_as_duplicate():
+    """Only copies at or above the threshold are dropped."""
+    hasher = MinHasher()
+    edited = ARTICLE.replace("build trust with readers", "earn the confidence of people")
+    results = [{"title": "a", "body": ARTICLE}, {"title": "b", "body": edited}]
+
+    assert dedupe_results(results, 0.5, hasher)[1]["duplicates"] == 1
+    assert dedupe_results(results, 0.99, hasher)[1]["duplicates"] == 0
+
+def test_research_reports_removed_tokens():
+    """The research node drops repeated library chunks and reports the tokens removed."""
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+
+    with use_fake_services(vector_db=FakeVectorDBClient([ARTICLE, ARTICLE, "A different library note."])) as client:
+        list(graph.stream({"topic": "content marketing"}, config=config))
+
+    state = graph.get_state(config).values
+    assert state["research_dedupe"]["duplicates"] == 1
+    assert state["research_dedupe"]["tokens_removed"] > 0
+    research_prompt = next(call["prompt"] for call in client.calls if "Research Synthesis" in call["prompt"])
+    assert research_prompt.count("Brands that publish helpful guides") == 1
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Tests for outline-first, section-parallel drafting.
+"""
+
+import pytest
+
+from agent.drafting import (
+    parse_outline, slice_research, stitch_sections, parse_edits, apply_edits, write_sectioned_draft, OUTLINE_ATTEMPTS
+)
+from agent.graph import create_agent, get_thread_config
+from services.fakes import FakeOpenAIClient, use_fake_services
+from services.llm import track_usage
+
+OUTLINE = """# Composting at Home
+
+## Introduction
+- Why composting matters
+
+## Choosing a Bin
+- Bin types and sizes
+
+## Balancing Greens and Browns
+1. Nitrogen and carbon ratio
+
+## Keeping the Pile Healthy
+- Turning and moisture
+
+## Conclusion
+- Start this weekend
+"""
+
+def test_parse_outline():
+    """The outline gives the title and its parts, introduction first and conclusion last."""
+    outline = parse_outline(OUTLINE)
+    assert outline["title"] == "Composting at Home"
+    assert [part["heading"] for part in outline["parts"]] == [
+        "Introduction", "Choosing a Bin", "Balancing Greens and Browns", "Keeping the Pile Healthy", "Conclusion"
+    ]
+    assert outline["parts"][2]["points"] == ["Nitrogen and carbon ratio"]
+
+    # Without an introduction and conclusion the outline cannot be used
+    assert parse_outline("# Title\n\n## Only Section\n- point") is None
+
+    # Nor with fewer than three main sections
+    assert parse_outline(OUTLINE.replace("## Keeping the Pile Healthy\n- Turning and moisture\n\n", "")) is None
+
+def test_research_is_sliced_per_section():
+    """Each note goes to the section it matches; unmatched notes go to the introduction."""
+    parts = parse_outline(OUTLINE)["parts"]
+    research = "\n".join([
+        "- Plastic bin sizes range from 200 to 400 litres.",
+        "- A carbon to nitrogen ratio of 30:1 works best.",
+        "- Households throw away a third of their food."
+    ])
+    slices = slice_research(research, parts)
+    assert "food" in slices[0]
+    assert "litres" in slices[1]
+    assert "ratio" in slices[2]
+    assert slices[3] == slices[4] == ""
+
+def test_stitch_and_coherence_edits():
+    """Sections are joined under their headings and exact-match edits are applied."""
+    parts = parse_outline(OUTLINE)["parts"]
+    draft = stitch_sections("Composting at Home", ["Intro.", "## Choosing a Bin\n\nBins.", "Ratios.", "Turn it.", "Go."], parts)
+    assert draft.startswith("# Composting at Home\n\nIntro.\n\n## Choosing a Bin\n\nBins.")
+    assert draft.count("## Choosing a Bin") == 1
+
+    edits = parse_edits("REPLACE: Ratios.\nWITH: Once the bin is set up, ratios matter.\nREPLACE: Missing.\nWITH: Ignored.")
+    edited, applied = apply_edits(draft, edits)
+    assert applied == 1
+    assert "Once the bin is set up, ratios matter." in edited
+
+def test_section_drafting_graph():
+    """The graph writes the first draft from an outline, one call per part."""
+    graph, thread_id = create_agent({"section_drafting": True})
+    config = get_thread_config(thread_id)
+
+    with use_fake_services(FakeOpenAIClient(topic="content marketing")) as client:
+        list(graph.stream({"topic": "content marketing"}, config=config))
+
+    prompts = [call["prompt"] for call in client.calls]
+    assert sum("Section Writing Task" in prompt for prompt in prompts) == 5
+    assert sum("Coherence Pass" in prompt for prompt in prompts) == 1
+
+    state = graph.get_state(config).values
+    assert state["draft"].startswith("# A Practical Guide to content marketing")
+    assert state["draft"].count("## ") == 4
+    assert "Building on that" in state["draft"]
+    assert state["token_usage"]["calls"] == len(client.calls)
+
+class ShortOutlineClient(FakeOpenAIClient):
+    """Fake client whose outlines have too few main sections."""
+
+    def respond(self, prompt: str) -> str:
+        if "Article Outline Task" in prompt:
+            return "# Title\n\n## Introduction\n- Hook\n\n## Only Section\n- Point\n\n## Conclusion\n- Wrap up"
+        return super().respond(prompt)
+
+def test_short_outline_falls_back_to_one_completion():
+    """An outline with fewer than three main sections is asked for again, then drafted in one completion."""
+    graph, thread_id = create_agent({"section_drafting": True})
+    config = get_thread_config(thread_id)
+
+    with use_fake_services(ShortOutlineClient(topic="content marketing")) as client:
+        list(graph.stream({"topic": "content marketing"}, config=config))
+
+    prompts = [call["prompt"] for call in client.calls]
+    assert sum("Article Outline Task" in prompt for prompt in prompts) == OUTLINE_ATTEMPTS
+    assert sum("Section Writing Task" in prompt for prompt in prompts) == 0
+    assert sum("Content Creation Task" in prompt for prompt in prompts) == 1
+    assert graph.get_state(config).values["draft"]
+
+def test_failed_section_keeps_the_usage_of_the_others():
+    """When one section fails, the sections that were written are still charged."""
+    with use_fake_services(FakeOpenAIClient(topic="content marketing")) as client, track_usage() as usage:
+        client.fail_next("Section Writing Task", ValueError("section failed"))
+        with pytest.raises(ValueError, match="section failed"):
+            write_sectioned_draft("content marketing", "- Some research notes.")
+
+    # The outline and the four sections that were written
+    assert usage["calls"] == 5
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Tests for concurrent page fetching, extraction and the page cache, against a
+local HTTP server.
+"""
+
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from services.fetch import PageCache, extract_text, fetch_pages
+
+# Seconds each page takes to serve
+PAGE_DELAY = 0.2
+
+PAGE = """<html><head><title>Page {n}</title><script>var tracking = 1;</script></head>
+<body><nav>Home | About | Contact</nav>
+<article><h1>Heading {n}</h1><p>First paragraph of page {n}.</p><p>Second &amp; last paragraph.</p></article>
+<footer>Copyright</footer></body></html>"""
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        site = self.server.site
+        with site["lock"]:
+            site["requests"] += 1
+            site["active"] += 1
+            site["max_active"] = max(site["max_active"], site["active"])
+        try:
+            if self.path == "/slow":
+                time.sleep(2)
+            elif self.path == "/binary":
+                return self._send(200, b"\x00\x01", "application/octet-stream")
+
+            n = self.path.rsplit("/", 1)[-1]
+            etag = f'"v{n}"'
+            if self.headers.get("If-None-Match") == etag:
+                with site["lock"]:
+                    site["not_modified"] += 1
+                return self._send(304, b"", "text/html", etag)
+
+            time.sleep(PAGE_DELAY)
+            self._send(200, PAGE.format(n=n).encode("utf-8"), "text/html; charset=utf-8", etag)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with site["lock"]:
+                site["active"] -= 1
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def site():
+    """A local site that records request counts and concurrency."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.daemon_threads = True
+    server.site = {"lock": threading.Lock(), "requests": 0, "active": 0, "max_active": 0, "not_modified": 0}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.site["url"] = f"http://127.0.0.1:{server.server_port}"
+    yield server.site
+    server.shutdown()
+    server.server_close()
+
+def test_extraction_keeps_the_article_text():
+    page = extract_text(PAGE.format(n=1))
+    assert page["title"] == "Page 1"
+    assert page["text"] == "Heading 1\nFirst paragraph of page 1.\nSecond & last paragraph."
+
+def test_pages_are_fetched_concurrently_within_the_host_limit(site):
+    urls = [f"{site['url']}/page/{n}" for n in range(6)]
+
+    start = time.perf_counter()
+    pages = fetch_pages(urls, cache_dir=None, per_host=3)
+    elapsed = time.perf_counter() - start
+
+    assert [pages[url]["status"] for url in urls] == ["fetched"] * 6
+    assert pages[urls[2]]["text"].startswith("Heading 2")
+    assert site["max_active"] == 3
+    # Two rounds of three, not six sequential fetches
+    assert elapsed < PAGE_DELAY * 6 * 0.75
+
+def test_failures_do_not_hold_up_the_batch(site):
+    urls = [f"{site['url']}/slow", f"{site['url']}/binary", f"{site['url']}/page/1"]
+
+    start = time.perf_counter()
+    pages = fetch_pages(urls, cache_dir=None, timeout=0.5)
+
+    assert time.perf_counter() - start < 1.5
+    assert pages[urls[0]]["status"] == pages[urls[1]]["status"] == "error"
+    assert pages[urls[2]]["status"] == "fetched"
+
+def test_cache_revalidates_with_the_etag(site, tmp_path):
+    url = f"{site['url']}/page/7"
+    cache_dir = str(tmp_path / "pages")
+
+    assert fetch_pages([url], cache_dir=cache_dir)[url]["status"] == "fetched"
+    assert fetch_pages([url], cache_dir=cache_dir)[url]["status"] == "cached"
+    assert site["requests"] == 1
+
+    # Once the entry is stale, a conditional request confirms it is unchanged
+    cache = PageCache(cache_dir)
+    entry = cache.get(url)
+    entry["fetched"] = 0
+    cache.put(url, entry)
+
+    page = fetch_pages([url], cache_dir=cache_dir)[url]
+    assert page["status"] == "revalidated"
+    assert page["text"].startswith("Heading 7")
+    assert site["not_modified"] == 1
+
+def test_stale_page_is_used_when_revalidation_fails(tmp_path):
+    url = "http://127.0.0.1:1/page/8"
+    cache = PageCache(str(tmp_path / "pages"))
+    cache.put(url, {"url": url, "title": "Page 8", "text": "Heading 8\nCached text.", "etag": '"v8"', "fetched": 0})
+
+    # The site is down, so the stale text is better than nothing
+    page = fetch_pages([url], cache_dir=cache.directory, timeout=1.0)[url]
+    assert page["status"] == "stale"
+    assert page["text"].startswith("Heading 8")
+    assert page["error"]
@@ -4,20 +4,15 @@ Test script to debug the graph flow issue.
 """
 
 import logging
-import json
+from langgraph.types import Command
+
 from agent.graph import create_agent, get_thread_config
 from agent.state import FeedbackType
-from debug_helpers import log_state
+from services.fakes import use_fake_services
+from services.tracing import tracer
 
 # Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("graph_flow_debug.log"),
-        logging.StreamHandler()
-    ]
-)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def test_finalize_flow():
@@ -40,21 +35,115 @@ def test_finalize_flow():
     }
     
     logger.info("Starting graph execution with test state")
-    log_state(state, "INITIAL TEST STATE")
+    tracer.configure(sample_rate=1.0)
+    tracer.records.clear()
     
     # Run the graph
     try:
         # Use stream to see each step
-        for i, chunk in enumerate(graph.stream(state, config=config)):
-            logger.info(f"Step {i}: Received chunk")
-            log_state(chunk, f"CHUNK {i}")
-            
-            # Check for final_article
-            if "final_article" in chunk:
-                logger.info(f"Final article found in chunk {i}")
-                break
+        with use_fake_services():
+            for i, chunk in enumerate(graph.stream(state, config=config)):
+                logger.info(f"Step {i}: Received chunk")
+                tracer.state(f"chunk {i}", chunk)
+                
+                # Check for final_article
+                if "final_article" in chunk:
+                    logger.info(f"Final article found in chunk {i}")
+                    break
     except Exception as e:
         logger.error(f"Error executing graph: {str(e)}", exc_info=True)
+    finally:
+        tracer.configure(sample_rate=0)
+    
+    # Each node run left a span with the digests of its input and update
+    logger.info("\n".join(tracer.format_records()))
+    assert any(record[2] == "span" and record[3] == "conduct_research" for record in tracer.records)
+
+def interrupts(graph, payload, config):
+    """Run the graph until it pauses and return the interrupt values."""
+    values = []
+    for chunk in graph.stream(payload, config=config):
+        if "__interrupt__" in chunk:
+            values.extend(item.value for item in chunk["__interrupt__"])
+    return values
+
+def test_editing_cycle_waits_for_editor():
+    """The graph pauses in await_editor_action between drafts instead of looping."""
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+    
+    with use_fake_services() as client:
+        # Research and the first draft, then wait for the editor
+        waiting = interrupts(graph, {"topic": "test topic"}, config)
+        assert "options" in waiting[0]
+        assert graph.get_state(config).next == ("await_editor_action",)
+        calls = len(client.calls)
+        
+        # Ask for human feedback, provide it and get the updated draft
+        review = interrupts(graph, Command(resume=FeedbackType.HUMAN), config)
+        assert review[0]["version"] == 1
+        waiting = interrupts(graph, Command(resume="Add an example"), config)
+        assert waiting[0]["version"] == 2
+        
+        # Only the update call was made; research and drafting were not repeated
+        assert len(client.calls) == calls + 1
+        
+        # Skipping feedback goes straight back to waiting
+        interrupts(graph, Command(resume=FeedbackType.HUMAN), config)
+        waiting = interrupts(graph, Command(resume="skip"), config)
+        assert waiting[0]["version"] == 2
+        assert len(client.calls) == calls + 1
+        
+        # Finalizing ends the run
+        assert interrupts(graph, Command(resume=FeedbackType.NONE), config) == []
+        state = graph.get_state(config)
+        assert state.next == ()
+        assert state.values["final_article"] == state.values["draft"]
+
+def test_unknown_editor_action_asks_again():
+    """An action that isn't a FeedbackType repeats the request with an error."""
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+    
+    with use_fake_services():
+        interrupts(graph, {"topic": "test topic"}, config)
+        waiting = interrupts(graph, Command(resume="publish"), config)
+        assert "'publish'" in waiting[0]["error"]
+        assert [task.name for task in graph.get_state(config).tasks] == ["await_editor_action"]
+        
+        # A valid answer to the repeated request carries on as usual
+        assert interrupts(graph, Command(resume=FeedbackType.NONE), config) == []
+        assert graph.get_state(config).next == ()
+
+def test_unavailable_editor_action_asks_again():
+    """A valid action the draft can't take right now repeats the request instead of finalizing."""
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+    
+    with use_fake_services():
+        interrupts(graph, {"topic": "test topic", "token_budget": 100000}, config)
+        graph.update_state(config, {"token_usage": {"total_tokens": 100000}})
+        waiting = interrupts(graph, Command(resume=FeedbackType.HUMAN), config)
+    
+    assert waiting[0]["error"].startswith("human is not available for this draft")
+    assert [task.name for task in graph.get_state(config).tasks] == ["await_editor_action"]
+    assert "final_article" not in graph.get_state(config).values
+
+def test_fast_path_profile_skips_synthesis():
+    """The fast path profile drafts straight from the compact raw sources."""
+    graph, thread_id = create_agent({"profile": "fast_path"})
+    config = get_thread_config(thread_id)
+    
+    with use_fake_services() as client:
+        waiting = interrupts(graph, {"topic": "test topic"}, config)
+    
+    assert "options" in waiting[0]
+    assert len(client.calls) == 1
+    assert "Content Creation Task" in client.calls[0]["prompt"]
+    
+    research = graph.get_state(config).values["combined_research"]
+    assert research.startswith("- test topic result 0 (https://example.com/test-topic/0): ")
+    assert len(research) <= 1200 * 4
 
 if __name__ == "__main__":
     test_finalize_flow()
\ No newline at end of file
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Tests for the HTTP job server and its persistent job queue.
+"""
+
+import json
+import threading
+
+import httpx
+import pytest
+
+from agent.graph import create_agent
+from agent.jobs import JobManager, JobQueue, WAITING, COMPLETED, FAILED, checkpoint_path, open_checkpointer
+from api import create_server
+from services.fakes import use_fake_services
+
+@pytest.fixture
+def server():
+    """A job server with two workers on a free port, backed by the fakes."""
+    with use_fake_services():
+        graph, _ = create_agent()
+        manager = JobManager(graph, JobQueue(), workers=2).start()
+        http_server = create_server(manager, port=0)
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        with httpx.Client(base_url=f"http://127.0.0.1:{http_server.server_port}", timeout=30) as client:
+            yield client
+        http_server.shutdown()
+        http_server.server_close()
+        manager.shutdown()
+
+def read_events(client, job_id, after=0):
+    """Read the event stream of a job until the server closes it."""
+    events = []
+    with client.stream("GET", f"/jobs/{job_id}/events", headers={"Last-Event-ID": str(after)}) as response:
+        assert response.headers["content-type"] == "text/event-stream"
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+    return events
+
+def test_job_runs_through_feedback_to_article(server):
+    """A job is driven through an editing round over HTTP and streams its progress."""
+    job_id = server.post("/jobs", json={"topic": "seo"}).json()["id"]
+    assert server.get(f"/jobs/{job_id}/article").status_code == 409
+
+    events = read_events(server, job_id)
+    assert [event["node"] for event in events if event["type"] == "update"] == ["conduct_research", "write_draft"]
+    assert events[-1]["type"] == "interrupt"
+    assert server.get(f"/jobs/{job_id}").json()["status"] == WAITING
+
+    # Ask for a human feedback round, give the feedback, then finish
+    nodes = []
+    for value in ["human", "Shorter please.", "none"]:
+        last = events[-1]["id"]
+        assert server.post(f"/jobs/{job_id}/resume", json={"value": value}).status_code == 202
+        events = read_events(server, job_id, after=last)
+        assert all(event["id"] > last for event in events)
+        nodes += [event.get("node") for event in events]
+
+    assert "update_draft_human" in nodes
+    assert events[-1]["type"] == "completed"
+
+    # Once nobody is reading, a completed job keeps only its final event
+    assert [event["type"] for event in read_events(server, job_id)] == ["completed"]
+    job = server.get(f"/jobs/{job_id}").json()
+    assert job["status"] == COMPLETED and job["article"]
+    assert server.get(f"/jobs/{job_id}/article").json()["article"] == job["article"]
+
+    # A finished job cannot be resumed
+    assert server.post(f"/jobs/{job_id}/resume", json={"value": "none"}).status_code == 409
+
+def test_jobs_share_the_worker_pool(server):
+    """Several clients' jobs run on the same deployment and each reaches its interrupt."""
+    ids = [server.post("/jobs", json={"topic": f"topic {i}"}).json()["id"] for i in range(4)]
+    for job_id in ids:
+        read_events(server, job_id)
+    assert {server.get(f"/jobs/{job_id}").json()["status"] for job_id in ids} == {WAITING}
+    assert server.get("/health").json()["queued"] == 0
+
+def test_malformed_event_id_is_rejected(server):
+    """A Last-Event-ID or after value that isn't an integer gets a 400, not a dropped connection."""
+    job_id = server.post("/jobs", json={"topic": "seo"}).json()["id"]
+    assert server.get(f"/jobs/{job_id}/events", headers={"Last-Event-ID": "abc"}).status_code == 400
+    assert server.get(f"/jobs/{job_id}/events?after=1.5").status_code == 400
+
+def test_queue_survives_a_restart(tmp_path):
+    """Commands queued or running when the server stopped are picked up again."""
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(path)
+    job_id = queue.create("seo")
+    assert queue.claim()["job_id"] == job_id
+
+    restarted = JobQueue(path)
+    assert restarted.claim() is None
+    assert restarted.recover() == 1
+    command = restarted.claim()
+    assert command["job_id"] == job_id and command["kind"] == "start"
+
+def test_waiting_job_resumes_after_a_restart(tmp_path):
+    """A job waiting for input continues from its checkpoint on a restarted server."""
+    path = str(tmp_path / "jobs.db")
+    assert checkpoint_path(path) == str(tmp_path / "jobs.checkpoints.db")
+
+    with use_fake_services() as client:
+        graph, _ = create_agent(checkpointer=open_checkpointer(checkpoint_path(path)))
+        manager = JobManager(graph, JobQueue(path), workers=1).start()
+        job_id = manager.submit("seo")["id"]
+        assert manager.wait(job_id)["status"] == WAITING
+        manager.shutdown()
+        calls = len(client.calls)
+
+        graph, _ = create_agent(checkpointer=open_checkpointer(checkpoint_path(path)))
+        restarted = JobManager(graph, JobQueue(path), workers=1).start()
+        restarted.resume(job_id, "none")
+        job = restarted.wait(job_id)
+        restarted.shutdown()
+
+    assert job["status"] == COMPLETED and job["article"]
+    # Research and drafting were not repeated
+    assert len(client.calls) == calls
+
+def test_resume_without_checkpoint_fails_the_job(tmp_path):
+    """A job whose checkpoint was lost fails instead of starting over."""
+    path = str(tmp_path / "jobs.db")
+
+    with use_fake_services() as client:
+        graph, _ = create_agent()
+        manager = JobManager(graph, JobQueue(path), workers=1).start()
+        job_id = manager.submit("seo")["id"]
+        assert manager.wait(job_id)["status"] == WAITING
+        manager.shutdown()
+        calls = len(client.calls)
+
+        # The in-memory checkpoints are gone after the restart
+        graph, _ = create_agent()
+        restarted = JobManager(graph, JobQueue(path), workers=1).start()
+        restarted.resume(job_id, "none")
+        job = restarted.wait(job_id)
+        restarted.shutdown()
+
+    assert job["status"] == FAILED
+    assert "checkpoint is missing" in job["error"]
+    assert len(client.calls) == calls
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Tests for the local structure and style linter.
+"""
+
+from langgraph.types import Command
+
+from agent.graph import create_agent, get_thread_config
+from agent.lint import lint_draft, text_statistics
+from agent.state import FeedbackType
+from services.fakes import use_fake_services
+
+GOOD_DRAFT = """# How to Start Composting at Home
+
+Do you throw away kitchen scraps every day? Composting turns them into rich soil. It's easier than you think.
+
+## Choose a Bin
+
+A small bin fits most gardens. Pick one with a lid to keep pests out.
+
+## Balance Greens and Browns
+
+Mix kitchen scraps with dry leaves. Too many greens make the heap smell, while too many browns slow it down.
+
+- Greens: fruit peels, coffee grounds
+- Browns: leaves, cardboard
+
+## Turn the Heap
+
+Turn it every week or two. Air speeds everything up.
+
+## Conclusion
+
+Composting saves waste and feeds your garden. Start your first heap this weekend.
+"""
+
+BAD_DRAFT = """# The Complete and Definitive Guide to Every Aspect of Home Composting Today
+
+Composting is great! Really great! You will love it! Scraps rot. Soil forms. Gardens grow. Everyone wins.
+
+## Why Compost
+
+The comprehensive organisational implementation of decomposition methodologies necessitates considerable coordination.
+"""
+
+def rules(draft):
+    return [finding["rule"] for finding in lint_draft(draft)["findings"]]
+
+def test_clean_draft_has_no_findings():
+    assert rules(GOOD_DRAFT) == []
+
+def test_mechanical_problems_are_found():
+    """Each structure and tone rule broken by the draft is reported once."""
+    assert rules(BAD_DRAFT) == [
+        "title", "sections", "conclusion", "call_to_action", "lists",
+        "paragraph_length", "exclamations", "readability"
+    ]
+
+def test_text_statistics():
+    """Sentences, words and syllables are counted in one pass over the text."""
+    stats = text_statistics(["The cat sat on the mat. It was happy to be home with the family today."])
+    assert stats["words"] == 16
+    assert stats["sentences"] == 2
+    assert stats["longest_sentence"] == 10
+    assert stats["sentences_per_paragraph"] == [2]
+    assert stats["reading_ease"] > 80
+
+def test_lint_fixes_skip_the_review_round():
+    """Choosing the lint action updates the draft directly with the linter's findings."""
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+
+    with use_fake_services() as client:
+        chunks = list(graph.stream({"topic": "content marketing"}, config=config))
+        request = chunks[-1]["__interrupt__"][0].value
+        assert FeedbackType.LINT.value in request["options"]
+        assert request["lint"]
+
+        calls = len(client.calls)
+        list(graph.stream(Command(resume=FeedbackType.LINT), config=config))
+
+    # One update call and no review calls
+    assert len(client.calls) == calls + 1
+    assert "Add a bulleted or numbered list" in client.calls[-1]["prompt"]
+    state = graph.get_state(config)
+    assert state.values["draft_version"] == 2
+    assert state.next == ("await_editor_action",)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Tests for per-node model routing, rate-limit fallbacks and fast mode.
+"""
+
+import pytest
+from langgraph.types import Command
+
+import agent.nodes as nodes
+import services.llm as llm
+
+from agent.graph import create_agent, get_thread_config
+from agent.state import FeedbackType
+from services.fakes import FakeOpenAIClient, use_fake_services
+from services.llm import get_completion, get_usage_report, reset_usage_report, resolve_route
+from services.tokens import ContextOverflowError, count_message_tokens
+
+def models_by_node(calls):
+    """Map each recorded call to its node using the system prompt heading."""
+    markers = {
+        "Research Synthesis": "conduct_research",
+        "Content Creation Task": "write_draft",
+        "Article Update Task": "update_draft",
+        "Persona-Based Content Review": "persona_review"
+    }
+    routed = {}
+    for call in calls:
+        system = call["messages"][0]["content"]
+        node = next(node for marker, node in markers.items() if marker in system)
+        routed.setdefault(node, set()).add(call["model"])
+    return routed
+
+def run_session(fast_mode: bool):
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+
+    with use_fake_services() as client:
+        chunks = list(graph.stream({"topic": "seo", "fast_mode": fast_mode}, config=config))
+        chunks = list(graph.stream(Command(resume=FeedbackType.PERSONA), config=config))
+        suggestions = chunks[-1]["__interrupt__"][0].value["suggestions"]
+        list(graph.stream(Command(resume=[suggestions[0]["persona"]]), config=config))
+    return client.calls
+
+def test_nodes_use_their_routes():
+    """Research and persona reviews use the cheap tier; drafting keeps the flagship model."""
+    routed = models_by_node(run_session(fast_mode=False))
+
+    assert routed["conduct_research"] == {resolve_route("conduct_research")["model"]}
+    assert routed["persona_review"] == {resolve_route("persona_review")["model"]}
+    assert routed["write_draft"] == routed["update_draft"] == {resolve_route("write_draft")["model"]}
+    assert routed["persona_review"] != routed["write_draft"]
+
+def test_fast_mode_is_per_thread():
+    """A thread started in fast mode drafts with the fast model."""
+    routed = models_by_node(run_session(fast_mode=True))
+
+    fast_model = resolve_route("write_draft", fast=True)["model"]
+    assert fast_model != resolve_route("write_draft")["model"]
+    assert routed["write_draft"] == routed["update_draft"] == {fast_model}
+
+def test_rate_limited_model_falls_back():
+    """A rate-limited primary model is retried on the route's fallback."""
+    route = resolve_route("write_draft")
+    client = FakeOpenAIClient(rate_limited_models=[route["model"]])
+
+    with use_fake_services(client):
+        completion = get_completion("Write about {topic}", {"topic": "seo"}, node="write_draft")
+
+    assert completion
+    assert client.rate_limited_calls == [route["model"]]
+    assert [call["model"] for call in client.calls] == [route["fallbacks"][0]]
+    assert client.calls[0]["max_tokens"] == route["max_tokens"]
+
+# Routes with small context windows, so short prompts overflow them
+SMALL_CONTEXT_ROUTES = {
+    "default": {"model": "small", "temperature": 0.5, "max_tokens": 100, "fallbacks": []},
+    "context_windows": {"default": 16385, "small": 400, "large": 100000},
+    "nodes": {
+        "fallback": {"model": "small", "fallbacks": ["large"]},
+        "switch": {"overflow": ["larger_model"], "overflow_model": "large"},
+        "trim": {"overflow": ["trim"], "trim": "research"}
+    }
+}
+
+RESEARCH = "\n".join(f"- Finding {i} about search engine optimisation and how it is measured." for i in range(60))
+
+def test_prompts_are_counted_and_fitted_before_the_call(monkeypatch):
+    """Models too small for the prompt are skipped, or the overflow strategy makes it fit."""
+    monkeypatch.setattr(llm, "load_model_routes", lambda: SMALL_CONTEXT_ROUTES)
+    reset_usage_report()
+
+    with use_fake_services() as client:
+        for node in ("fallback", "switch", "trim"):
+            get_completion("Notes:\n{research}", {"research": RESEARCH}, node=node)
+
+    assert [call["model"] for call in client.calls] == ["large", "large", "small"]
+    trimmed = client.calls[-1]["messages"]
+    assert count_message_tokens(trimmed, "small") + 100 <= 400
+    assert trimmed[0]["content"].startswith("Notes:\n- Finding 0")
+
+    report = get_usage_report()
+    assert report["switch"]["overflow_larger_model"] == report["trim"]["overflow_trim"] == 1
+    assert report["fallback"]["overflows"] == 0
+    assert report["trim"]["counted_prompt_tokens"] <= 300
+
+def test_prompt_that_cannot_fit_is_not_sent(monkeypatch):
+    monkeypatch.setattr(llm, "load_model_routes", lambda: SMALL_CONTEXT_ROUTES)
+
+    with use_fake_services() as client, pytest.raises(ContextOverflowError) as error:
+        get_completion("Notes:\n{research}", {"research": RESEARCH}, node="other")
+
+    assert client.calls == []
+    assert error.value.limit == 400
+
+def test_update_overflow_is_reported_when_no_section_update_is_possible(monkeypatch):
+    """A draft too long to update whole fails with the overflow, not a budget message."""
+    monkeypatch.setattr(llm, "load_model_routes", lambda: SMALL_CONTEXT_ROUTES)
+    # The whole update is affordable, the section rewrite is not
+    answers = iter([True, False])
+    monkeypatch.setattr(nodes, "can_afford", lambda state, estimate: next(answers))
+    state = {"topic": "seo", "draft": "# Title\n\nIntro.\n\n## One\n\n" + RESEARCH, "human_feedback": "Shorter."}
+
+    with use_fake_services() as client, pytest.raises(ContextOverflowError):
+        nodes.update_draft(state, FeedbackType.HUMAN)
+
+    assert client.calls == []
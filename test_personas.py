@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""
+Tests for relevance-ranked persona selection.
+"""
+
+import json
+
+from langgraph.types import Command
+
+import agent.speculative as speculative
+from agent.graph import create_agent, get_thread_config
+from agent.personas import select_personas, review_draft_panel, parse_panel_review, PANEL_MAX_SUGGESTIONS
+from agent.state import FeedbackType
+from services.fakes import FakeOpenAIClient, use_fake_services
+
+PERSONAS = [
+    {"name": "SEO Specialist", "description": "search engine keywords rankings headings metadata"},
+    {"name": "Chef", "description": "recipes cooking kitchen ingredients flavour"},
+    {"name": "Content Editor", "description": "structure flow clarity grammar"},
+    {"name": "Gardener", "description": "plants soil watering compost seeds"}
+]
+
+DRAFT = "# Keyword research for search engine rankings\n\nPick keywords, write headings and metadata."
+
+def test_selection_ranks_caps_and_pins():
+    """Only the most relevant personas run, plus the pinned ones."""
+    selection = {"top_k": 1, "min_similarity": 0.1, "always_include": ["Content Editor"]}
+
+    with use_fake_services():
+        chosen = select_personas(PERSONAS, "search engine keywords", DRAFT, selection)
+
+    assert [persona["name"] for persona in chosen["selected"]] == ["SEO Specialist", "Content Editor"]
+    assert chosen["skipped"] == ["Chef", "Gardener"]
+    assert chosen["scores"]["SEO Specialist"] > chosen["scores"]["Chef"]
+
+def test_selection_without_settings_uses_everyone():
+    """A persona list without selection settings behaves as before."""
+    chosen = select_personas(PERSONAS, "anything", DRAFT, {})
+    assert chosen["selected"] == PERSONAS
+    assert chosen["skipped"] == []
+
+def test_persona_embeddings_are_computed_once():
+    """Persona descriptions are embedded once; later rounds only embed the draft."""
+    selection = {"top_k": 2}
+
+    with use_fake_services() as client:
+        select_personas(PERSONAS, "search", DRAFT, selection)
+        select_personas(PERSONAS, "search", DRAFT + " more", selection)
+
+    assert len(client.embedding_calls[0]["input"]) == len(PERSONAS)
+    assert [len(call["input"]) for call in client.embedding_calls[1:]] == [1, 1]
+
+def test_persona_round_does_not_repeat_reviews_on_resume():
+    """Selecting suggestions resumes without running the persona reviews again."""
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+
+    with use_fake_services() as client:
+        for payload in [{"topic": "seo"}, Command(resume=FeedbackType.PERSONA)]:
+            chunks = list(graph.stream(payload, config=config))
+
+        review = chunks[-1]["__interrupt__"][0].value
+        reviewed = [suggestion["persona"] for suggestion in review["suggestions"]]
+        assert reviewed
+        calls = len(client.calls)
+
+        list(graph.stream(Command(resume=reviewed[:1]), config=config))
+
+    # Only the update call ran after the selection
+    assert len(client.calls) == calls + 1
+    assert graph.get_state(config).values["draft_version"] == 2
+
+def test_speculative_reviews_are_ready_when_requested():
+    """With speculation on, asking for persona feedback makes no new review calls."""
+    speculative._reviewer = None
+    graph, thread_id = create_agent({"speculative_reviews": True})
+    config = get_thread_config(thread_id)
+
+    with use_fake_services() as client:
+        list(graph.stream({"topic": "seo"}, config=config))
+        reviewer = speculative.get_speculative_reviewer()
+        scheduled = reviewer.report()["scheduled"]
+        assert scheduled > 0
+
+        chunks = list(graph.stream(Command(resume=FeedbackType.PERSONA), config=config))
+
+    # Research and draft, plus the speculative reviews and nothing else
+    assert len(chunks[-1]["__interrupt__"][0].value["suggestions"]) == scheduled
+    assert len(client.calls) == 2 + scheduled
+    assert reviewer.report()["hit_rate"] == 1.0
+
+def test_panel_review_reviews_all_personas_in_one_call():
+    """A panel review sends the draft once and parses bounded suggestions per persona."""
+    with use_fake_services() as client:
+        suggestions = review_draft_panel(PERSONAS[:3], DRAFT, "search engine keywords")
+
+    assert len(client.calls) == 1
+    assert client.calls[0]["response_format"] == {"type": "json_object"}
+    assert [suggestion["persona"] for suggestion in suggestions] == [persona["name"] for persona in PERSONAS[:3]]
+    assert suggestions[0]["priority"] == "high"
+    assert suggestions[0]["suggestion"].startswith("1. ")
+    assert all(len(suggestion["suggestions"]) <= PANEL_MAX_SUGGESTIONS for suggestion in suggestions)
+
+def test_panel_reviews_in_the_graph():
+    """With panel reviews on, a persona round makes one review call and its suggestions can be applied."""
+    graph, thread_id = create_agent({"panel_reviews": True})
+    config = get_thread_config(thread_id)
+
+    with use_fake_services() as client:
+        list(graph.stream({"topic": "seo"}, config=config))
+        calls = len(client.calls)
+        chunks = list(graph.stream(Command(resume=FeedbackType.PERSONA), config=config))
+        assert len(client.calls) == calls + 1
+
+        review = chunks[-1]["__interrupt__"][0].value
+        list(graph.stream(Command(resume=[review["suggestions"][0]["persona"]]), config=config))
+
+    assert "Add a statistic to the introduction" in client.calls[-1]["prompt"]
+    assert graph.get_state(config).values["draft_version"] == 2
+
+def test_panel_review_is_validated_and_bounded():
+    """Invalid reviews are dropped and each persona's suggestions are capped."""
+    text = json.dumps({"reviews": [
+        {"persona": "SEO Specialist", "priority": "urgent", "suggestions": [f"Suggestion {i}." for i in range(10)]},
+        {"persona": "Chef", "suggestions": "not a list"},
+        {"persona": "Somebody Else", "suggestions": ["Ignored."]},
+        {"persona": "Content Editor", "priority": "low", "suggestions": ["x" * 2000, "Short."]}
+    ]})
+    parsed = parse_panel_review(text, PERSONAS)
+
+    assert set(parsed) == {"SEO Specialist", "Content Editor"}
+    assert len(parsed["SEO Specialist"]["suggestions"]) == PANEL_MAX_SUGGESTIONS
+    assert parsed["SEO Specialist"]["priority"] == "medium"
+    assert parsed["Content Editor"]["suggestions"] == ["x" * 2000]
+    assert parse_panel_review("not json", PERSONAS) == {}
+
+class EmptyPanelClient(FakeOpenAIClient):
+    """Fake client whose panel reviews leave every persona out."""
+
+    def respond(self, prompt: str) -> str:
+        if "Multi-Persona Content Review" in prompt:
+            return json.dumps({"reviews": []})
+        return super().respond(prompt)
+
+def test_panel_fallback_reviews_are_capped():
+    """Personas missing from a panel answer are reviewed alone only up to the cap."""
+    with use_fake_services(EmptyPanelClient()) as client:
+        suggestions = review_draft_panel(PERSONAS[:3], DRAFT, "search engine keywords", max_fallbacks=1)
+
+    assert len(client.calls) == 2
+    assert [suggestion["persona"] for suggestion in suggestions] == ["SEO Specialist"]
+
+def test_panel_fallbacks_are_skipped_when_the_budget_is_short():
+    """In economy mode a malformed panel answer costs one call, not one per persona."""
+    graph, thread_id = create_agent({"panel_reviews": True})
+    config = get_thread_config(thread_id)
+
+    with use_fake_services(EmptyPanelClient()) as client:
+        list(graph.stream({"topic": "seo", "token_budget": 100000}, config=config))
+        graph.update_state(config, {"token_usage": {"total_tokens": 80000}})
+        calls = len(client.calls)
+        list(graph.stream(Command(resume=FeedbackType.PERSONA), config=config))
+
+    assert len(client.calls) == calls + 1
+    selection = graph.get_state(config).values["persona_selection"]
+    assert selection["reviewed"] == []
+    assert selection["skipped"]
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""
+Tests for the cache-friendly prompt layout and per-node usage reporting.
+"""
+
+from langgraph.types import Command
+
+from agent.graph import create_agent, get_thread_config
+from agent.state import FeedbackType
+from services.fakes import FakeOpenAIClient, use_fake_services
+from services.llm import get_usage_report, reset_usage_report
+
+def test_static_instructions_come_first_and_are_cached():
+    """Update calls share their system prefix, and the cached tokens are reported per node."""
+    graph, thread_id = create_agent()
+    config = get_thread_config(thread_id)
+    reset_usage_report()
+
+    with use_fake_services(FakeOpenAIClient(sentences=12)) as client:
+        list(graph.stream({"topic": "seo"}, config=config))
+        for feedback in ["Shorter intro.", "More examples."]:
+            list(graph.stream(Command(resume=FeedbackType.HUMAN), config=config))
+            list(graph.stream(Command(resume=feedback), config=config))
+
+    updates = [call["messages"] for call in client.calls if "Article Update Task" in call["messages"][0]["content"]]
+    assert len(updates) == 2
+    assert all(messages[0]["role"] == "system" for messages in updates)
+    assert updates[0][0]["content"] == updates[1][0]["content"]
+    # The guides are inlined, not passed as file paths
+    assert "config/tone_of_voice.yaml" not in updates[0][0]["content"]
+
+    report = get_usage_report()
+    assert report["update_draft"]["calls"] == 2
+    assert report["update_draft"]["cached_tokens"] > 0
+    assert 0 < report["update_draft"]["cached_ratio"] <= 1
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Tests for node retry policies and re-running a failed node from its checkpoint.
+"""
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from agent.graph import create_agent, get_thread_config
+from agent.jobs import JobManager, JobQueue, FAILED, WAITING
+from agent.recovery import FatalNodeError, failed_node, is_transient
+from services.fakes import FakeOpenAIClient, use_fake_services
+
+# Retry at once, so the tests don't wait for the backoff
+NO_BACKOFF = {"default": {"initial_interval": 0, "jitter": False}}
+
+def timeout_error():
+    return APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+def research_calls(client):
+    return sum("Research Synthesis" in call["prompt"] for call in client.calls)
+
+def test_errors_are_classified():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    assert is_transient(timeout_error())
+    assert is_transient(httpx.HTTPStatusError("busy", request=request, response=httpx.Response(503, request=request)))
+    assert not is_transient(httpx.HTTPStatusError("bad", request=request, response=httpx.Response(400, request=request)))
+    assert not is_transient(KeyError("combined_research"))
+    assert not is_transient(FatalNodeError("Token budget too small"))
+
+def test_transient_errors_are_retried_within_the_run():
+    client = FakeOpenAIClient()
+    client.fail_next("Content Creation Task", timeout_error(), times=2)
+    with use_fake_services(client):
+        graph, thread_id = create_agent({"retry_policies": NO_BACKOFF})
+        config = get_thread_config(thread_id)
+        list(graph.stream({"topic": "seo"}, config=config))
+
+    assert graph.get_state(config).values["draft"]
+    assert graph.get_state(config).next == ("await_editor_action",)
+    assert research_calls(client) == 1
+
+def test_failed_node_halts_the_graph_and_is_rerun_from_its_checkpoint():
+    client = FakeOpenAIClient()
+    client.fail_next("Content Creation Task", ValueError("malformed completion"))
+    with use_fake_services(client):
+        graph, thread_id = create_agent({"retry_policies": NO_BACKOFF})
+        config = get_thread_config(thread_id)
+        with pytest.raises(ValueError):
+            list(graph.stream({"topic": "seo"}, config=config))
+
+        # Fatal errors are not retried, and the graph stops before the next node
+        assert failed_node(graph, config) == {"node": "write_draft", "error": "ValueError('malformed completion')"}
+        assert "draft" not in graph.get_state(config).values
+        calls = len(client.calls)
+
+        list(graph.stream(None, config=config))
+
+    assert failed_node(graph, config) is None
+    assert graph.get_state(config).values["draft"]
+    assert len(client.calls) == calls + 1
+    assert research_calls(client) == 1
+
+def test_failed_job_is_retried_without_repeating_research():
+    client = FakeOpenAIClient()
+    client.fail_next("Content Creation Task", ValueError("malformed completion"))
+    with use_fake_services(client):
+        graph, _ = create_agent({"retry_policies": NO_BACKOFF})
+        manager = JobManager(graph, JobQueue(), workers=1).start()
+        try:
+            job_id = manager.submit("seo")["id"]
+            job = manager.wait(job_id)
+            assert job["status"] == FAILED
+            assert job["failed_node"] == "write_draft"
+
+            manager.retry(job_id)
+            job = manager.wait(job_id)
+        finally:
+            manager.shutdown()
+
+    assert job["status"] == WAITING
+    assert job["error"] is None and job["failed_node"] is None
+    assert research_calls(client) == 1
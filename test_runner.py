@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Tests for the background graph runner used by the Streamlit UI.
+"""
+
+import logging
+import threading
+from typing import TypedDict
+
+import pytest
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph
+from langgraph.constants import START, END
+from langgraph.types import interrupt
+
+from agent.graph import create_agent
+from agent.runner import GraphRunner
+from agent.state import FeedbackType
+from services.fakes import use_fake_services
+
+logger = logging.getLogger(__name__)
+
+class ReviewState(TypedDict, total=False):
+    topic: str
+    draft: str
+    feedback: str
+
+def build_review_graph(calls):
+    """Build a small draft -> review graph that records node executions."""
+    def write(state):
+        calls.append("write")
+        return {"draft": f"Draft about {state['topic']}"}
+
+    def review(state):
+        calls.append("review")
+        feedback = interrupt({"task": "Review", "draft": state["draft"]})
+        return {"feedback": feedback}
+
+    builder = StateGraph(ReviewState)
+    builder.add_node("write", write)
+    builder.add_node("review", review)
+    builder.add_edge(START, "write")
+    builder.add_edge("write", "review")
+    builder.add_edge("review", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+def test_runner_surfaces_interrupt_and_resumes_without_rerunning_nodes():
+    """The runner pauses on interrupts and resumes from the checkpoint."""
+    calls = []
+    runner = GraphRunner(build_review_graph(calls), "test-thread")
+
+    runner.start({"topic": "testing"})
+    assert runner.wait(timeout=5)
+
+    events = runner.poll()
+    types = [event["type"] for event in events]
+    assert types == ["started", "update", "interrupt", "done"]
+    assert events[1]["node"] == "write"
+    assert runner.pending_interrupt == {"task": "Review", "draft": "Draft about testing"}
+
+    runner.resume("Looks good")
+    assert runner.wait(timeout=5)
+
+    events = runner.poll()
+    assert events[-1]["type"] == "done"
+    assert events[-1]["interrupted"] is False
+    assert any(e["type"] == "update" and e["data"] == {"feedback": "Looks good"} for e in events)
+    assert runner.pending_interrupt is None
+
+    # The draft node ran once; the review node ran once before and once after the interrupt
+    assert calls == ["write", "review", "review"]
+
+def test_runner_rejects_concurrent_runs_and_reports_errors():
+    """Only one run per thread is allowed and failures become error events."""
+    release = threading.Event()
+
+    def explode(state):
+        release.wait(timeout=5)
+        raise ValueError("boom")
+
+    builder = StateGraph(ReviewState)
+    builder.add_node("explode", explode)
+    builder.add_edge(START, "explode")
+    builder.add_edge("explode", END)
+    runner = GraphRunner(builder.compile(checkpointer=MemorySaver()), "error-thread")
+
+    runner.start({"topic": "testing"})
+    assert runner.busy
+    with pytest.raises(RuntimeError):
+        runner.start({"topic": "again"})
+
+    release.set()
+    assert runner.wait(timeout=5)
+
+    events = runner.poll()
+    assert events[-1]["type"] == "error"
+    assert "boom" in events[-1]["message"]
+
+def test_persona_round_makes_each_review_call_once():
+    """Answering the persona selection interrupt does not run the persona reviews again."""
+    graph, thread_id = create_agent()
+    runner = GraphRunner(graph, thread_id)
+
+    with use_fake_services() as client:
+        runner.start({"topic": "testing"})
+        assert runner.wait(timeout=30)
+        runner.resume(FeedbackType.PERSONA)
+        assert runner.wait(timeout=30)
+        suggestions = runner.pending_interrupt["suggestions"]
+
+        reviews = sum("Persona-Based Content Review" in call["prompt"] for call in client.calls)
+        runner.resume([suggestions[0]["persona"]])
+        assert runner.wait(timeout=30)
+
+    assert reviews == len(suggestions)
+    assert sum("Persona-Based Content Review" in call["prompt"] for call in client.calls) == reviews
+    assert runner.pending_interrupt["task"] == "Choose the next step for the draft"
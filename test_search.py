@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Tests for hedged multi-provider search and the provider circuit breakers.
+"""
+
+import time
+
+from services.search import SearchProvider, HedgedSearch, CircuitBreaker, LatencyTracker, create_search
+
+class ScriptedProvider(SearchProvider):
+    """Provider with a fixed latency that can be made to fail."""
+
+    def __init__(self, name, latency=0.0, fail=False):
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def search(self, query, max_results):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return [{"title": f"{self.name} result", "body": query, "url": "", "source": "internet_search"}]
+
+def test_fast_primary_answers_alone():
+    primary, secondary = ScriptedProvider("primary"), ScriptedProvider("secondary")
+    results = HedgedSearch([primary, secondary], default_hedge_delay=0.5).search("seo")
+
+    assert results[0]["provider"] == "primary"
+    assert secondary.calls == 0
+
+def test_slow_primary_is_hedged():
+    """The secondary starts after the hedge delay and its answer is used."""
+    primary, secondary = ScriptedProvider("primary", latency=1.0), ScriptedProvider("secondary", latency=0.05)
+    search = HedgedSearch([primary, secondary], default_hedge_delay=0.1)
+
+    start = time.perf_counter()
+    results = search.search("seo")
+
+    assert results[0]["provider"] == "secondary"
+    assert time.perf_counter() - start < 0.5
+
+def test_failing_provider_is_skipped_once_its_breaker_opens():
+    primary, secondary = ScriptedProvider("primary", fail=True), ScriptedProvider("secondary")
+    search = HedgedSearch([primary, secondary], breaker_options={"failure_threshold": 2, "reset_timeout": 60})
+
+    for _ in range(4):
+        assert search.search("seo")[0]["provider"] == "secondary"
+
+    assert primary.calls == 2
+    assert search.breakers["primary"].state == "open"
+
+def test_breaker_allows_one_trial_after_the_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_hedge_delay_follows_the_p95_latency():
+    tracker = LatencyTracker()
+    assert tracker.p95() is None
+    for seconds in [0.1] * 19 + [0.9]:
+        tracker.record(seconds)
+    assert tracker.p95() == 0.9
+
+def test_all_providers_failing_returns_no_results():
+    search = HedgedSearch([ScriptedProvider("a", fail=True), ScriptedProvider("b", fail=True)])
+    assert search.search("seo") == []
+
+def test_providers_are_configured_by_name():
+    assert [provider.name for provider in create_search(["stub", "duckduckgo"]).providers] == ["stub", "duckduckgo"]
+    assert create_search(["stub"]).search("seo")[0]["provider"] == "stub"
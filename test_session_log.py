@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Tests for the bounded UI session log.
+"""
+
+from agent.session_log import SessionLog, MAX_EVENT_TEXT
+
+def draft(version: int) -> str:
+    return f"# Draft {version}\n\n" + "A long paragraph of article text. " * 200
+
+def test_history_stays_within_its_bounds():
+    """A long session keeps only the newest events and draft versions."""
+    log = SessionLog(max_events=5, max_drafts=3)
+
+    for version in range(1, 21):
+        log.record_interrupt({"task": "Choose the next step for the draft", "draft": draft(version), "version": version})
+        log.record("user", "x" * (MAX_EVENT_TEXT * 2), version)
+
+    assert len(log) == 5
+    assert log.total_events == 40
+    assert [event["id"] for event in log.page(page_size=10)] == [40, 39, 38, 37, 36]
+    assert log.draft_versions == [18, 19, 20]
+    assert log.get_draft(1) is None
+    assert all(len(event["text"]) <= MAX_EVENT_TEXT + 1 for event in log.events)
+    assert log.page_count(page_size=2) == 3
+
+def test_events_reference_drafts_instead_of_copying_them():
+    """Events carry the draft version; the text is stored once per version."""
+    log = SessionLog()
+    text = draft(1)
+    suggestions = [{"persona": "SEO Specialist", "suggestion": "Add keywords. " * 100}]
+
+    log.record_interrupt({"task": "Review the draft", "draft": text, "version": 1})
+    log.record_interrupt({"task": "Select suggestions", "draft": text, "suggestions": suggestions, "version": 1})
+
+    assert log.draft_versions == [1]
+    assert log.get_draft(1) is text
+    for event in log.events:
+        assert event["draft_version"] == 1
+        assert text not in event["text"]
+        assert all(text not in str(value) for value in event.values())
+    assert log.events[-1]["details"] == ["SEO Specialist"]
+    assert "Add keywords" not in str(log.events[-1])
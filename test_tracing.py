@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Tests for the ring-buffer tracer.
+"""
+
+from services.tracing import Tracer, NO_SPAN, with_tracing, tracer
+
+def test_ring_buffer_keeps_recent_records():
+    """Only the newest records are kept, and values are formatted only when dumped."""
+    trace = Tracer(sample_rate=1.0, capacity=3)
+    with trace.span("node") as span:
+        for i in range(5):
+            trace.event("step", i=i, prompt="x" * 1000)
+        span.set(done=True)
+
+    assert [record[3] for record in trace.records] == ["step", "step", "node"]
+    lines = trace.format_records()
+    assert lines[0].endswith("(1000 chars)") and "node/step" in lines[0]
+    assert "span node" in lines[-1] and "done=True" in lines[-1]
+
+def test_sampling_is_decided_at_the_root():
+    """Tracing off records nothing; an unsampled root keeps its children out of the buffer."""
+    trace = Tracer(sample_rate=0)
+    assert trace.span("node") is NO_SPAN
+    trace.event("ignored")
+
+    trace.configure(sample_rate=0.5)
+    trace.sample_rate = 1e-9  # always below the random draw
+    with trace.span("root"):
+        with trace.span("child"):
+            trace.event("ignored")
+    assert not trace.records
+
+def test_failed_node_dumps_the_buffer(caplog):
+    """A node returning an error dumps the recent records, including its own span and state."""
+    def failing_node(state):
+        tracer.event("working", topic=state["topic"])
+        return {"error": "Research error: no results"}
+
+    tracer.configure(sample_rate=1.0)
+    try:
+        dumps = tracer.dumps
+        update = with_tracing(failing_node, "conduct_research")({"topic": "seo", "draft": "d" * 500})
+    finally:
+        tracer.configure(sample_rate=0)
+
+    assert update == {"error": "Research error: no results"}
+    assert tracer.dumps == dumps + 1
+    assert not tracer.records
+    dump = caplog.records[-1].getMessage()
+    assert "conduct_research failed: Research error" in dump
+    assert "state conduct_research/input topic='seo' draft='str[500]#" in dump
+    assert "event conduct_research/working topic='seo'" in dump
+    assert "span conduct_research" in dump
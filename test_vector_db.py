@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Tests for filtered, tunable and sharded content library retrieval.
+"""
+
+import uuid
+
+from services.bm25 import BM25Index, reciprocal_rank_fusion
+from services.fakes import HashedEmbeddingFunction
+from services.vector_db import VectorDBClient, query_vector_db, shard_values, without_field
+
+DOCUMENTS = [
+    ("Keyword research and search ranking for blog posts", {"title": "SEO basics", "vertical": "seo", "year": 2024}),
+    ("Old keyword research tips for search ranking", {"title": "SEO in 2019", "vertical": "seo", "year": 2019}),
+    ("Writing welcome emails that newsletter subscribers open", {"title": "Welcome emails", "vertical": "email", "year": 2023}),
+    ("Brand voice guidelines for every channel", {"title": "Brand voice", "year": 2022})
+]
+
+def open_library(**settings):
+    # In-memory clients share one ChromaDB system, so each test gets its own collection
+    client = VectorDBClient.open(
+        None, {"collection": f"test-{uuid.uuid4().hex[:8]}", "max_distance": 0.7, **settings}, HashedEmbeddingFunction()
+    )
+    client.add_documents([text for text, _ in DOCUMENTS], [metadata for _, metadata in DOCUMENTS])
+    return client
+
+def titles(results):
+    return [result["title"] for result in results]
+
+def test_where_filter_and_distance_cutoff():
+    """Metadata filters narrow the search and distant documents are dropped."""
+    library = open_library()
+
+    results = library.query("keyword research search ranking")
+    assert sorted(titles(results)[:2]) == ["SEO basics", "SEO in 2019"]
+    assert all(result["distance"] <= 0.7 for result in results)
+    assert "Brand voice" not in titles(results)
+
+    assert titles(library.query("keyword research search ranking", where={"year": {"$gte": 2021}})) == ["SEO basics"]
+    assert len(library.query("keyword research", n_results=1, max_distance=float("inf"))) == 1
+
+def test_sharded_library_merges_and_routes_queries():
+    """Documents go to per-vertical shards; unfiltered queries merge them all, filtered ones search one."""
+    library = open_library(sharding={"enabled": True, "field": "vertical"})
+    assert sorted(library._shards) == ["email", "seo"]
+    assert library.collection.count() == 1
+
+    results = library.query("keyword research emails brand voice", max_distance=float("inf"))
+    assert sorted(titles(results)) == ["Brand voice", "SEO basics", "SEO in 2019", "Welcome emails"]
+    assert [result["distance"] for result in results] == sorted(result["distance"] for result in results)
+
+    filtered = library.query("keyword research", where={"$and": [{"vertical": "seo"}, {"year": {"$lt": 2020}}]})
+    assert titles(filtered) == ["SEO in 2019"]
+    assert library.query("keyword research", where={"vertical": "video"}) == []
+
+    # Existing shards are found when the library is opened again
+    reopened = VectorDBClient.open(None, library.settings, HashedEmbeddingFunction())
+    assert sorted(reopened._shards) == ["email", "seo"]
+
+def test_shard_filter_helpers():
+    where = {"$and": [{"vertical": {"$in": ["seo", "email"]}}, {"year": {"$gte": 2021}}]}
+    assert shard_values(where, "vertical") == ["seo", "email"]
+    assert shard_values({"year": 2020}, "vertical") is None
+    assert without_field(where, "vertical") == {"year": {"$gte": 2021}}
+    assert without_field({"vertical": "seo"}, "vertical") is None
+
+def test_keyword_index_replaces_merges_and_reloads(tmp_path):
+    """Replaced documents drop out, and merged segments and pending additions survive a reload."""
+    index = BM25Index(str(tmp_path), merge_threshold=3)
+    index.add([("a", "lib", "GA4 conversion rate rose 3.5% in Q2"), ("b", "lib", "Email conversion tips")])
+    assert sorted(hit[0] for hit in index.search("conversion")) == ["a", "b"]
+
+    index.add([("b", "lib", "Email subject lines"), ("c", "lib", "Another GA4 guide")])  # merges
+    index.add([("d", "lib", "Video scripts")])
+    assert [hit[0] for hit in index.search("conversion")] == ["a"]
+
+    reloaded = BM25Index(str(tmp_path))
+    assert len(reloaded) == 4
+    assert [hit[0] for hit in reloaded.search("ga4 3.5%")] == ["a", "c"]
+    assert [hit[0] for hit in reloaded.search("video")] == ["d"]
+
+def test_hybrid_retrieval_finds_exact_names():
+    """A product code the embedding search misses is found by the keyword index and fused into the results."""
+    library = VectorDBClient.open(
+        None,
+        {"collection": f"test-{uuid.uuid4().hex[:8]}", "max_distance": 0.5, "hybrid": {"enabled": True, "candidates": 10}},
+        HashedEmbeddingFunction()
+    )
+    filler = [f"Pricing plans and pricing pages that convert, part {i}" for i in range(20)]
+    library.add_documents(filler + ["Launch notes for the ZX-4821 widget"], [{"title": f"doc {i}"} for i in range(21)])
+
+    assert "doc 20" not in titles(library.query("ZX-4821 pricing"))
+    assert titles(library.keyword_query("ZX-4821", n_results=1)) == ["doc 20"]
+
+    saved = VectorDBClient._instance
+    VectorDBClient._instance = library
+    try:
+        results = query_vector_db("ZX-4821", n_results=3)
+    finally:
+        VectorDBClient._instance = saved
+    assert titles(results) == ["doc 20"]
+    assert results[0]["rrf"] > 0
+
+def test_rank_fusion_favours_agreement():
+    vector = [{"id": "a", "body": "A"}, {"id": "b", "body": "B"}]
+    keyword = [{"id": "c", "body": "C"}, {"id": "b", "body": "B", "bm25": 2.0}]
+    fused = reciprocal_rank_fusion([vector, keyword])
+    assert [result["id"] for result in fused] == ["b", "a", "c"]
+    assert fused[0]["bm25"] == 2.0